@@ -0,0 +1,86 @@
+import asyncio
+import os
+from typing import List, Dict, Any, Iterable, Iterator, AsyncIterator
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Most ids sent in one `column=in.(...)` filter
+BULK_FETCH_CHUNK_SIZE: int = int(os.getenv("BULK_FETCH_CHUNK_SIZE", "100"))
+# Longest id list (in characters) per request, well under common URL limits
+BULK_FETCH_MAX_IDS_LENGTH: int = int(os.getenv("BULK_FETCH_MAX_IDS_LENGTH", "4000"))
+# Chunk requests in flight at once per bulk fetch
+BULK_FETCH_CONCURRENCY: int = int(os.getenv("BULK_FETCH_CONCURRENCY", "8"))
+
+
+def chunk_ids(ids: Iterable[Any], chunk_size: int = BULK_FETCH_CHUNK_SIZE,
+              max_length: int = BULK_FETCH_MAX_IDS_LENGTH) -> Iterator[List[str]]:
+    """
+    Split ids into chunks of at most chunk_size ids whose comma-joined form
+    fits in max_length characters, dropping duplicates and keeping order
+    """
+    seen = set()
+    chunk: List[str] = []
+    length = 0
+    for value in ids:
+        value = str(value)
+        if value in seen:
+            continue
+        seen.add(value)
+        # +1 for the separating comma
+        if chunk and (len(chunk) >= chunk_size or length + 1 + len(value) > max_length):
+            yield chunk
+            chunk = []
+            length = 0
+        length += len(value) + (1 if chunk else 0)
+        chunk.append(value)
+    if chunk:
+        yield chunk
+
+
+async def iter_rows_by_ids(client: httpx.AsyncClient, url: str, column: str, ids: Iterable[Any],
+                           headers: Dict[str, str], chunk_size: int = BULK_FETCH_CHUNK_SIZE,
+                           concurrency: int = BULK_FETCH_CONCURRENCY) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Fetch the rows of a Supabase REST table whose column is in ids
+
+    The ids are split into bounded chunks, one `column=in.(...)` request
+    each, run concurrently with at most `concurrency` in flight. Rows are
+    yielded as soon as their chunk arrives, so the order across chunks is
+    not defined. `url` is the table endpoint with any other filters, e.g.
+    ".../rest/v1/books?status=eq.available".
+
+    Raises httpx.HTTPStatusError for the first chunk that fails; the
+    remaining requests are cancelled.
+    """
+    chunks = list(chunk_ids(ids, chunk_size))
+    if not chunks:
+        return
+
+    separator = "&" if "?" in url else "?"
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_chunk(chunk: List[str]) -> List[Dict[str, Any]]:
+        async with semaphore:
+            response = await client.get(f"{url}{separator}{column}=in.({','.join(chunk)})", headers=headers)
+            response.raise_for_status()
+            return response.json()
+
+    tasks = [asyncio.ensure_future(fetch_chunk(chunk)) for chunk in chunks]
+    try:
+        for next_chunk in asyncio.as_completed(tasks):
+            for row in await next_chunk:
+                yield row
+    finally:
+        # Stop outstanding requests if the caller stops early or a chunk failed
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def fetch_rows_by_ids(client: httpx.AsyncClient, url: str, column: str, ids: Iterable[Any],
+                            headers: Dict[str, str], chunk_size: int = BULK_FETCH_CHUNK_SIZE,
+                            concurrency: int = BULK_FETCH_CONCURRENCY) -> List[Dict[str, Any]]:
+    """Collect every row from iter_rows_by_ids into a list"""
+    return [row async for row in iter_rows_by_ids(client, url, column, ids, headers, chunk_size, concurrency)]
@@ -0,0 +1,61 @@
+from typing import Optional
+import httpx
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Connection pool and timeout settings for the shared outbound HTTP client
+HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_CONNECT_TIMEOUT: float = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_TIMEOUT: float = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Create the pooled, keep-alive client shared by everything that talks to Supabase REST"""
+    return httpx.AsyncClient(
+        http2=HTTP2_ENABLED,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+    )
+
+
+class HttpClientHolder:
+    """
+    Base for services that call Supabase REST through `self.client`
+
+    Given the app's shared client, a service uses it and leaves closing it to
+    the app lifespan. Without one, it creates a pooled client of its own on
+    first use, so a service that never makes a request (as in the precompute
+    job) never opens one, and aclose() closes it.
+    """
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self._client = client
+        self._owns_client = False
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = create_http_client()
+            self._owns_client = True
+        return self._client
+
+    @client.setter
+    def client(self, client: httpx.AsyncClient) -> None:
+        self._client = client
+        self._owns_client = False
+
+    async def aclose(self) -> None:
+        """Close the client this service created, if any; a shared client stays open"""
+        if self._owns_client:
+            await self._client.aclose()
+            self._client = None
+            self._owns_client = False
@@ -0,0 +1,68 @@
+import base64
+import json
+from typing import List, Dict, Any, Optional, Tuple
+
+# Listings are ordered newest first on (created_at, id); id breaks ties so
+# the order is total and a cursor names exactly one position
+ORDER_COLUMNS = ("created_at", "id")
+
+
+def encode_cursor(*values) -> str:
+    """Opaque, URL-safe cursor holding the sort key of the last row on a page"""
+    return base64.urlsafe_b64encode(json.dumps(list(values), separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int = len(ORDER_COLUMNS)) -> List[Any]:
+    """Sort key from encode_cursor; raises ValueError for anything else"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def _quote(value) -> str:
+    """Double-quote a filter value so PostgREST doesn't split on its '.', ':' or ','"""
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def paginate(query, limit: Optional[int] = None, offset: int = 0,
+             cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Fetch one page of a Supabase select query, newest first
+
+    With a cursor, the page starts right after the row it names (keyset
+    pagination): the database seeks on (created_at, id) instead of counting
+    past `offset` rows, and rows added meanwhile don't shift the page.
+    Without one, `offset` is used as before. With no limit every remaining
+    row is returned and offset is ignored.
+
+    Returns:
+        (rows, next_cursor): next_cursor is None on the last page
+    """
+    created_at_column, id_column = ORDER_COLUMNS
+    query = query.order(created_at_column, desc=True).order(id_column, desc=True)
+
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        if not isinstance(created_at, str) or not isinstance(row_id, (str, int)):
+            raise ValueError("Invalid cursor")
+        # The plain lte bound lets the (created_at, id) index seek; the or
+        # filter then only drops the rows at the boundary timestamp
+        query = query.lte(created_at_column, created_at).or_(
+            f"{created_at_column}.lt.{_quote(created_at)},"
+            f"and({created_at_column}.eq.{_quote(created_at)},{id_column}.lt.{_quote(row_id)})"
+        )
+        offset = 0
+
+    if limit is None:
+        return query.execute().data, None
+
+    # One extra row tells whether another page follows
+    rows = query.range(offset, offset + limit).execute().data
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], encode_cursor(last[created_at_column], last[id_column])
@@ -0,0 +1,38 @@
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+
+class BackgroundRefresh:
+    """
+    Runs a process-local copy's reload as a task of its own, one at a time
+
+    A request that finds its copy stale starts the reload and carries on with
+    the copy it has. Only a request that finds nothing loaded yet waits, and
+    it waits through a shield: a per-request deadline (or a disconnect)
+    cancels the wait, never the reload, so a slow load still lands for the
+    requests that follow.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def run(self, load: Callable[[], Awaitable[None]], wait: bool) -> None:
+        """Start load() unless a reload is already running; with wait, await its completion"""
+        loop = asyncio.get_running_loop()
+        task = self._task
+        # A task left on another (e.g. closed) event loop can never finish here
+        if task is None or task.done() or task.get_loop() is not loop:
+            task = self._task = loop.create_task(self._run(load))
+        if wait:
+            await asyncio.shield(task)
+
+    async def _run(self, load: Callable[[], Awaitable[None]]) -> None:
+        try:
+            await load()
+        except Exception as e:
+            print(f"Error refreshing {self.name}: {e}")
@@ -0,0 +1,109 @@
+import asyncio
+import hashlib
+import os
+import uuid
+from typing import Dict, Any, Optional
+from dotenv import load_dotenv
+from fastapi import UploadFile
+
+load_dotenv()
+
+# Largest upload accepted, in bytes
+UPLOAD_MAX_BYTES: int = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+# Bytes read from the upload and written to disk per step
+UPLOAD_CHUNK_SIZE: int = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+# Accepted image types, by the signature their files start with
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png", ".png"),
+    (b"GIF87a", "image/gif", ".gif"),
+    (b"GIF89a", "image/gif", ".gif"),
+)
+# Declared types let through to the signature check; clients that can't tell send octet-stream
+IMAGE_CONTENT_TYPES = {"image/jpeg", "image/jpg", "image/pjpeg", "image/png", "image/gif", "image/webp",
+                       "application/octet-stream"}
+
+
+class UploadRejected(ValueError):
+    """An upload refused for its size or type; status_code is the HTTP status to answer with"""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def sniff_image_type(head: bytes) -> Optional[tuple]:
+    """(content type, extension) of an image from its first bytes, or None if not an accepted image"""
+    for signature, content_type, extension in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return content_type, extension
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp", ".webp"
+    return None
+
+
+def _write_chunk(file, hasher, chunk: bytes) -> None:
+    hasher.update(chunk)
+    file.write(chunk)
+
+
+async def save_image_upload(upload_file: UploadFile, directory: str,
+                            max_bytes: int = UPLOAD_MAX_BYTES) -> Dict[str, Any]:
+    """
+    Stream an uploaded image to a new file in a directory without blocking the event loop
+
+    The declared content type and the file's own signature are checked on
+    the first chunk, before anything is written, and the upload is cut off
+    as soon as it passes max_bytes. Disk writes and hashing run in worker
+    threads; a rejected or failed upload leaves no file behind.
+
+    Returns:
+        {"path", "filename", "size", "sha256", "content_type"}
+
+    Raises:
+        UploadRejected: 415 for a non-image, 413 for an oversized upload
+    """
+    if upload_file.content_type and upload_file.content_type.lower() not in IMAGE_CONTENT_TYPES:
+        raise UploadRejected(f"Unsupported file type: {upload_file.content_type}", 415)
+    # Starlette knows the size of a multipart file once it is parsed
+    if upload_file.size is not None and upload_file.size > max_bytes:
+        raise UploadRejected(f"File is larger than {max_bytes} bytes", 413)
+
+    chunk = await upload_file.read(UPLOAD_CHUNK_SIZE)
+    image_type = sniff_image_type(chunk)
+    if image_type is None:
+        raise UploadRejected("File is not a JPEG, PNG, GIF or WebP image", 415)
+    content_type, extension = image_type
+
+    filename = f"{uuid.uuid4()}{extension}"
+    path = os.path.join(directory, filename)
+    # Written under a temporary name, so a half-written file is never served
+    partial_path = f"{path}.part"
+    hasher = hashlib.sha256()
+    size = 0
+
+    file = await asyncio.to_thread(open, partial_path, "wb")
+    try:
+        while chunk:
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadRejected(f"File is larger than {max_bytes} bytes", 413)
+            await asyncio.to_thread(_write_chunk, file, hasher, chunk)
+            chunk = await upload_file.read(UPLOAD_CHUNK_SIZE)
+        await asyncio.to_thread(file.close)
+        await asyncio.to_thread(os.replace, partial_path, path)
+    except BaseException:
+        await asyncio.to_thread(file.close)
+        await asyncio.to_thread(_remove, partial_path)
+        raise
+
+    return {"path": path, "filename": filename, "size": size, "sha256": hasher.hexdigest(),
+            "content_type": content_type}
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,20 @@
+from fastapi import Request
+from app.services.unified_recommendation_service import UnifiedRecommendationService
+from app.services.recommenders.genre_based_recommender import GenreBasedRecommender
+from app.services.recommenders.location_based_recommender import LocationBasedRecommender
+from app.services.recommenders.collaborative_recommender import CollaborativeRecommender
+
+# The recommenders are created once in the app lifespan (see app.main) and
+# shared across requests, together with their pooled HTTP client.
+
+def get_unified_recommendation_service(request: Request) -> UnifiedRecommendationService:
+    return request.app.state.unified_recommendation_service
+
+def get_genre_recommender(request: Request) -> GenreBasedRecommender:
+    return request.app.state.genre_recommender
+
+def get_location_recommender(request: Request) -> LocationBasedRecommender:
+    return request.app.state.location_recommender
+
+def get_collaborative_recommender(request: Request) -> CollaborativeRecommender:
+    return request.app.state.collaborative_recommender
@@ -0,0 +1,68 @@
+"""
+Delete uploaded images that no book or profile points at any more.
+
+Run from the backend directory:
+    python -m app.jobs.collect_uploads [--dry-run] [--skip-recount] [--grace SECONDS]
+
+The API keeps reference counts as covers and photos are attached, replaced
+and deleted. This job first recounts from the rows themselves, correcting
+any drift, then removes files (and their thumbnail and medium variants)
+unreferenced for longer than the grace period. Files stored before the
+content-addressed layout are never touched. --dry-run changes nothing: it
+skips the recount and reports what the stored counts would remove.
+"""
+
+import argparse
+import time
+from typing import List
+from app.database import supabase
+from app.services.upload_store import upload_store, UPLOAD_GC_GRACE
+
+PAGE_SIZE = 1000
+
+
+def fetch_urls(table: str, column: str) -> List[str]:
+    """Every non-null value of a URL column, a page at a time"""
+    urls = []
+    fetched = 0
+    while True:
+        response = (supabase.table(table)
+            .select(column)
+            .not_.is_(column, "null")
+            .order("id")
+            .range(fetched, fetched + PAGE_SIZE - 1)
+            .execute())
+        fetched += len(response.data)
+        urls.extend(row[column] for row in response.data)
+        if len(response.data) < PAGE_SIZE:
+            return urls
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Delete unreferenced uploaded images")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be deleted without deleting")
+    parser.add_argument("--skip-recount", action="store_true",
+                        help="Trust the stored reference counts instead of recounting from the database")
+    parser.add_argument("--grace", type=float, default=UPLOAD_GC_GRACE,
+                        help="Seconds a file must have been unreferenced before it is deleted")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.dry_run and not args.skip_recount:
+        # A recount rewrites the stored counts; a dry run must leave them alone
+        print("Dry run: recount skipped, using the stored reference counts")
+    elif not args.skip_recount:
+        urls = fetch_urls("books", "image_url") + fetch_urls("users", "profile_photo_url")
+        referenced = upload_store.recount(urls)
+        print(f"Recounted references from {len(urls)} rows: {referenced} stored files in use")
+
+    upload_store.grace = args.grace
+    result = upload_store.collect(dry_run=args.dry_run)
+    verb = "Would remove" if args.dry_run else "Removed"
+    print(f"{verb} {result['removed']} files ({result['bytes'] / 1024 / 1024:.1f} MB) "
+          f"in {time.perf_counter() - start:.1f}s")
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Bulk-import books for one user from a CSV or NDJSON file.
+
+Run from the backend directory:
+    python -m app.jobs.import_books FILE --owner-id USER_ID [--format csv|ndjson] [--batch-size N]
+
+CSV files need a header row naming the BookCreate fields (title, author,
+genre, condition, status and optionally description); NDJSON files hold
+one such object per line. The file is streamed, so its size is not limited
+by memory. Books imported here reach the similar-books index at its next
+rebuild (app.jobs.rebuild_similar_books).
+"""
+
+import argparse
+from app.services.book_import import BOOK_IMPORT_BATCH_SIZE, IMPORT_FORMATS, detect_format, import_books, iter_rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-import books from a CSV or NDJSON file")
+    parser.add_argument("file", help="CSV (with a header row) or NDJSON file")
+    parser.add_argument("--owner-id", required=True, help="User the imported books belong to")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="File format; taken from the extension when omitted")
+    parser.add_argument("--batch-size", type=int, default=BOOK_IMPORT_BATCH_SIZE, help="Rows per insert request")
+    args = parser.parse_args(argv)
+
+    file_format = args.format or detect_format(args.file)
+    with open(args.file, encoding="utf-8-sig", newline="") as stream:
+        report = import_books(iter_rows(stream, file_format), args.owner_id, batch_size=args.batch_size)
+
+    print(f"Imported {report['imported']} books, {report['failed']} failed, in {report['seconds']:.1f}s "
+          f"({report['rows_per_second']} rows/s)")
+    for error in report["errors"]:
+        print(f"  row {error['row']}: {error['error']}")
+    if report["errors_truncated"]:
+        print(f"  ... {report['failed'] - len(report['errors'])} more errors not shown")
+    return report
+
+
+if __name__ == "__main__":
+    main()
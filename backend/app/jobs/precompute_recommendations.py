@@ -0,0 +1,132 @@
+"""
+Precompute genre, location and unified recommendations for every user.
+
+Run from the backend directory (e.g. daily, off-peak):
+    python -m app.jobs.precompute_recommendations [--workers N] [--output PATH]
+
+Users, books and exchange requests are loaded once, handed to a pool of
+worker processes, and each worker ranks its share of users against in-memory
+copies of the book catalog, owner index and co-request matrix. The results
+replace the SQLite store that the API reads when
+RECOMMENDATIONS_SERVE_PRECOMPUTED=true.
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import List, Dict, Any, Tuple
+from app.database import supabase
+from app.services.book_catalog import book_catalog
+from app.services.precomputed_recommendations import (
+    PrecomputedRecommendationStore,
+    PRECOMPUTED_RECOMMENDATIONS_PATH,
+    PRECOMPUTED_LIMIT,
+    PRECOMPUTED_MAX_DISTANCE,
+)
+from app.services.recommenders.genre_based_recommender import GenreBasedRecommender, parse_favorite_genres
+from app.services.recommenders.location_based_recommender import LocationBasedRecommender
+from app.services.recommenders.collaborative_recommender import CollaborativeRecommender, co_requests
+from app.services.recommenders.spatial_index import owner_index, parse_location
+from app.services.unified_recommendation_service import UnifiedRecommendationService
+
+PAGE_SIZE = 1000
+USERS_PER_TASK = 200
+
+# Per-process state, set up once by init_worker
+_service: UnifiedRecommendationService = None
+_limit = PRECOMPUTED_LIMIT
+_max_distance = PRECOMPUTED_MAX_DISTANCE
+
+
+def fetch_table(table: str, columns: str, order: str = "id") -> List[Dict[str, Any]]:
+    """Fetch every row of a table, a page at a time"""
+    rows = []
+    while True:
+        response = (supabase.table(table)
+            .select(columns)
+            .order(order)
+            .range(len(rows), len(rows) + PAGE_SIZE - 1)
+            .execute())
+        rows.extend(response.data)
+        if len(response.data) < PAGE_SIZE:
+            return rows
+
+
+def init_worker(users: List[Dict[str, Any]], books: List[Dict[str, Any]], requests: List[Dict[str, Any]],
+                limit: int, max_distance: float) -> None:
+    """Load the shared data into this process's catalog, owner index and co-request matrix"""
+    global _service, _limit, _max_distance
+    book_catalog.load(books)
+    owner_index.build(users)
+    co_requests.build(requests)
+    _service = UnifiedRecommendationService(
+        GenreBasedRecommender(), LocationBasedRecommender(), CollaborativeRecommender()
+    )
+    _limit = limit
+    _max_distance = max_distance
+
+
+def recommend_user(user: Dict[str, Any]) -> List[Tuple[str, str, List[Dict[str, Any]]]]:
+    """The three recommendation lists for one user, as the live endpoints would build them"""
+    user_id = user["id"]
+    genre_recommender = _service.genre_recommender
+    location_recommender = _service.location_recommender
+
+    favorite_genres = parse_favorite_genres(user.get("favorite_genres"))
+    candidates = book_catalog.find(status="available", exclude_owner=user_id) if favorite_genres else []
+
+    location = parse_location(user.get("location"))
+    nearby_owners = owner_index.query_radius(*location, _max_distance, exclude_id=user_id) if location else []
+
+    # Each list needs its own streams: the unified merge annotates the records it pulls
+    genre = list(islice(genre_recommender.rank_books(favorite_genres, candidates), _limit))
+    nearby = list(islice(location_recommender.rank_books(nearby_owners), _limit))
+    unified = _service.combine(
+        genre_recommender.rank_books(favorite_genres, candidates),
+        location_recommender.rank_books(nearby_owners),
+        user_id,
+        _limit,
+        _service.collaborative_recommender.rank_from_catalog(user_id)
+    )
+    return [(user_id, "genre", genre), (user_id, "location", nearby), (user_id, "unified", unified)]
+
+
+def recommend_users(users: List[Dict[str, Any]]) -> List[Tuple[str, str, List[Dict[str, Any]]]]:
+    rows = []
+    for user in users:
+        rows.extend(recommend_user(user))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute recommendations for every user")
+    parser.add_argument("--output", default=PRECOMPUTED_RECOMMENDATIONS_PATH, help="Where to write the store")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--limit", type=int, default=PRECOMPUTED_LIMIT, help="Recommendations kept per list")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    users = fetch_table("users", "id, favorite_genres, location")
+    books = fetch_table("books", "*")
+    requests = fetch_table("book_request", "from_user_id, book_id", order="created_at")
+    fetched = time.perf_counter()
+    print(f"Fetched {len(users)} users, {len(books)} books and {len(requests)} requests in {fetched - start:.1f}s")
+
+    chunks = [users[i:i + USERS_PER_TASK] for i in range(0, len(users), USERS_PER_TASK)]
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=init_worker,
+        initargs=(users, books, requests, args.limit, PRECOMPUTED_MAX_DISTANCE)
+    ) as executor:
+        rows = [row for chunk_rows in executor.map(recommend_users, chunks) for row in chunk_rows]
+    computed = time.perf_counter()
+    print(f"Computed recommendations for {len(users)} users on {args.workers} workers in {computed - fetched:.1f}s")
+
+    count = PrecomputedRecommendationStore(args.output).write(rows)
+    print(f"Wrote {count} lists to {args.output} in {time.perf_counter() - computed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Rebuild the precomputed similar-books neighbour table.
+
+Run from the backend directory:
+    python -m app.jobs.rebuild_similar_books [--output PATH] [--neighbours N]
+
+The API loads the file at startup and keeps it current as listings change;
+a periodic rebuild refreshes idf weights and neighbour lists that incremental
+updates only approximate.
+"""
+
+import argparse
+import time
+from typing import List, Dict, Any
+from app.database import supabase
+from app.services.recommenders.content_similarity import (
+    ContentSimilarityIndex,
+    SIMILAR_BOOKS_INDEX_PATH,
+    SIMILAR_BOOKS_NEIGHBOURS,
+    SIMILAR_BOOKS_MAX_DF,
+    SIMILAR_BOOKS_MAX_TERMS,
+)
+
+PAGE_SIZE = 1000
+
+
+def fetch_books() -> List[Dict[str, Any]]:
+    """Fetch the text columns of every book, a page at a time"""
+    books = []
+    while True:
+        response = (supabase.table("books")
+            .select("id, title, author, genre, description")
+            .order("id")
+            .range(len(books), len(books) + PAGE_SIZE - 1)
+            .execute())
+        books.extend(response.data)
+        if len(response.data) < PAGE_SIZE:
+            return books
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the similar-books neighbour table")
+    parser.add_argument("--output", default=SIMILAR_BOOKS_INDEX_PATH, help="Where to write the index")
+    parser.add_argument("--neighbours", type=int, default=SIMILAR_BOOKS_NEIGHBOURS, help="Neighbours kept per book")
+    parser.add_argument("--max-terms", type=int, default=SIMILAR_BOOKS_MAX_TERMS, help="Terms kept per book vector")
+    parser.add_argument("--max-df", type=int, default=SIMILAR_BOOKS_MAX_DF,
+                        help="Books per term above which the term is too common to score on")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    books = fetch_books()
+    fetched = time.perf_counter()
+    print(f"Fetched {len(books)} books in {fetched - start:.1f}s")
+
+    index = ContentSimilarityIndex(neighbours=args.neighbours, max_terms=args.max_terms, max_df=args.max_df)
+    index.build(books)
+    built = time.perf_counter()
+    print(f"Built index over {len(index)} books and {len(index.term_ids)} terms in {built - fetched:.1f}s")
+
+    index.save(args.output)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
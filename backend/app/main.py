@@ -1,13 +1,104 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.routers import book, auth, exchange, user, recommendation
+from app.core.http_client import create_http_client
+from app.services.unified_recommendation_service import UnifiedRecommendationService
+from app.services.recommenders.genre_based_recommender import GenreBasedRecommender
+from app.services.recommenders.location_based_recommender import LocationBasedRecommender
+from app.services.recommenders.collaborative_recommender import CollaborativeRecommender
+from app.services.book_catalog import book_catalog
+from app.services.recommenders.content_similarity import content_index, SIMILAR_BOOKS_INDEX_PATH
+from app.services.search_index import search_index
+from app.services import image_variants
+from app.services.trending_tracker import trending_tracker, TRENDING_SNAPSHOT_PATH, TRENDING_SNAPSHOT_INTERVAL
+import asyncio
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import os
 
+def load_similar_books_index() -> bool:
+    """Load the similar-books table written by the rebuild job, if there is one"""
+    if not os.path.exists(SIMILAR_BOOKS_INDEX_PATH):
+        return False
+    content_index.load(SIMILAR_BOOKS_INDEX_PATH)
+    content_index.sync(book_catalog.find())
+    print(f"Similar-books index ready with {len(content_index)} books")
+    return True
+
+def build_similar_books_index():
+    """Build the similar-books table from the catalog; tens of seconds for a large catalog"""
+    content_index.build(book_catalog.find())
+    # Pick up books written while it was building, which skipped the index
+    content_index.sync(book_catalog.find())
+    print(f"Similar-books index built with {len(content_index)} books")
+
+def build_search_index():
+    search_index.build(book_catalog.find(), book_catalog.loaded_at)
+    print(f"Search index built with {len(search_index)} books")
+
+async def snapshot_trending():
+    """Write the trending scores to disk periodically so a crash loses little activity"""
+    while True:
+        await asyncio.sleep(TRENDING_SNAPSHOT_INTERVAL)
+        try:
+            await asyncio.to_thread(trending_tracker.save, TRENDING_SNAPSHOT_PATH)
+        except OSError as e:
+            print(f"Error saving trending snapshot: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the recommenders once per process; they share one pooled,
+    # keep-alive HTTP client so requests reuse open connections to Supabase
+    http_client = create_http_client()
+    genre_recommender = GenreBasedRecommender(client=http_client)
+    location_recommender = LocationBasedRecommender(client=http_client)
+    collaborative_recommender = CollaborativeRecommender(client=http_client)
+
+    app.state.http_client = http_client
+    app.state.genre_recommender = genre_recommender
+    app.state.location_recommender = location_recommender
+    app.state.collaborative_recommender = collaborative_recommender
+    app.state.unified_recommendation_service = UnifiedRecommendationService(
+        genre_recommender=genre_recommender,
+        location_recommender=location_recommender,
+        collaborative_recommender=collaborative_recommender
+    )
+
+    # Load the books table into the in-memory catalog before serving traffic
+    await book_catalog.ensure_loaded(http_client, genre_recommender.supabase_url, genre_recommender.headers)
+    similar_books_task = None
+    if book_catalog.loaded:
+        if not await asyncio.to_thread(load_similar_books_index):
+            # No snapshot from the rebuild job: build in the background rather
+            # than hold up startup; /similar falls back to genre until it lands
+            similar_books_task = asyncio.create_task(asyncio.to_thread(build_similar_books_index))
+        await asyncio.to_thread(build_search_index)
+
+    if os.path.exists(TRENDING_SNAPSHOT_PATH):
+        try:
+            trending_tracker.load(TRENDING_SNAPSHOT_PATH)
+            print(f"Trending scores restored for {len(trending_tracker)} books")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading trending snapshot: {e}")
+    snapshot_task = asyncio.create_task(snapshot_trending())
+    try:
+        yield
+    finally:
+        snapshot_task.cancel()
+        if similar_books_task is not None:
+            similar_books_task.cancel()
+        image_variants.shutdown()
+        try:
+            trending_tracker.save(TRENDING_SNAPSHOT_PATH)
+        except OSError as e:
+            print(f"Error saving trending snapshot: {e}")
+        await http_client.aclose()
+
 app = FastAPI(
     title="B2B",
     description="P2P Book Exchange",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # include routers
@@ -23,7 +114,8 @@ app.add_middleware(
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=["X-Recommendations-Partial", "X-Next-Cursor"]
 )
 
 # Mount the static directory
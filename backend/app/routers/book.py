@@ -1,13 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, File, UploadFile, Form
-from app.schemas.book import BookCreate, AutoFillRequest, StatusUpdateRequest
-from app.services import book_service
+from fastapi import APIRouter, Depends, HTTPException, Query, File, UploadFile, Form, Request, Response, BackgroundTasks
+from fastapi.responses import StreamingResponse
+from app.schemas.book import BookCreate, AutoFillRequest, AutoFillBatchRequest, StatusUpdateRequest
+from app.services import book_service, book_import
+from app.services.auto_fill_cache import auto_fill_cache
+from app.services.book_catalog import book_catalog
+from app.services.search_index import search_index
+from app.services.trending_tracker import trending_tracker
 from app.dependencies.auth import get_current_user
+from app.core.uploads import UploadRejected
 from typing import Optional
+import asyncio
+import json
 
 router = APIRouter(prefix="/books", tags=["Books"])
 
 @router.post("/")
 async def create_book(
+    background_tasks: BackgroundTasks,
     title: str = Form(...),
     author: str = Form(...),
     genre: str = Form(...),
@@ -26,32 +35,68 @@ async def create_book(
         status=status,
     )
     
-    created = await book_service.create_book_with_image(book, image, user["sub"])
+    try:
+        created = await book_service.create_book_with_image(book, image, user["sub"])
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    # Thumbnails are rendered in the worker pool after the response goes out
+    for row in created or []:
+        background_tasks.add_task(book_service.attach_book_image_variants, row)
     return created
 
 @router.get("/")
-def list_books(
+async def list_books(
+    request: Request,
+    response: Response,
     user=Depends(get_current_user),
     owner_id: Optional[str] = Query(None),
     search: Optional[str] = Query(None),
     genre: Optional[str] = Query(None),
     limit: int = Query(10, ge=1, le=100),
-    offset: int = Query(0, ge=0)
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page; replaces offset"),
+    fields: Optional[str] = Query(None, description="Comma-separated extra columns, e.g. description")
 ):
-    return book_service.get_filtered_books(
-        user_id=user["sub"],
-        owner_id=owner_id,
-        search=search,
-        genre=genre,
-        limit=limit,
-        offset=offset
-    )
+    if search:
+        # Searches rank from the in-memory catalog; a stale one reloads in the
+        # background (with the search index) while this request uses the current copy
+        recommender = request.app.state.genre_recommender
+        await search_index.ensure_synced(book_catalog, request.app.state.http_client,
+                                         recommender.supabase_url, recommender.headers)
+    try:
+        books, next_cursor = await asyncio.to_thread(
+            book_service.get_filtered_books,
+            user_id=user["sub"],
+            owner_id=owner_id,
+            search=search,
+            genre=genre,
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+            fields=fields
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return books
 
 @router.get("/me")
 def list_my_books(
-    user=Depends(get_current_user)
+    response: Response,
+    user=Depends(get_current_user),
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description="Comma-separated extra columns, e.g. description")
 ):
-    return book_service.get_my_books(user["sub"])
+    try:
+        books, next_cursor = book_service.get_my_books(user["sub"], limit, offset, cursor, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return books
 
 
 @router.get("/{book_id}")
@@ -59,18 +104,70 @@ def get_book(book_id: int):
     book = book_service.get_book_by_id(book_id)
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
+    trending_tracker.record_view(book_id)
     return book
 
 
 @router.post("/auto-fill")
-async def auto_fill_book(request: AutoFillRequest, user=Depends(get_current_user)):
+async def auto_fill_book(request: AutoFillRequest, http_request: Request, user=Depends(get_current_user)):
     try:
-        return await book_service.auto_fill_book_details(request.title)
+        return await book_service.auto_fill_book_details(request.title, http_request.app.state.http_client)
     except Exception as e:
         print("Auto-fill error:", e)
         raise HTTPException(status_code=500, detail="Failed to auto-fill book info")
 
 
+@router.post("/auto-fill/batch")
+async def auto_fill_books(request: AutoFillBatchRequest, http_request: Request, user=Depends(get_current_user)):
+    """
+    Auto-fill a list of titles at once. Results stream back as NDJSON, one
+    line per title in completion order, each carrying the title's index in
+    the request.
+    """
+    async def lines():
+        async for result in book_service.auto_fill_batch(request.titles, http_request.app.state.http_client):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.get("/auto-fill/cache/stats")
+async def get_auto_fill_cache_stats(user=Depends(get_current_user)):
+    """
+    Get hit, miss and coalesced-call counters of the auto-fill cache.
+    Useful for tuning AUTO_FILL_CACHE_TTL.
+    """
+    return auto_fill_cache.stats()
+
+
+@router.post("/import", status_code=202)
+async def import_books(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, description="csv or ndjson; taken from the file name when omitted"),
+    batch_size: int = Query(book_import.BOOK_IMPORT_BATCH_SIZE, ge=1, le=1000),
+    user=Depends(get_current_user)
+):
+    """
+    Import books from a CSV (with a header row) or NDJSON upload. The file is
+    saved and imported in the background, in batches; the response is the
+    import job, and GET /books/import/{job_id} reports its progress, then
+    imported and failed rows, per-row errors and throughput.
+    """
+    file_format = format or book_import.detect_format(file.filename, file.content_type)
+    try:
+        return await book_import.start_import(file, user["sub"], file_format, batch_size=batch_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/import/{job_id}")
+def get_import(job_id: str, user=Depends(get_current_user)):
+    job = book_import.import_jobs.get(job_id)
+    if job is None or job["owner_id"] != user["sub"]:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return job
+
+
 @router.patch("/{book_id}/toggle-availability")
 def toggle_availability(book_id: str, user=Depends(get_current_user)):
     try:
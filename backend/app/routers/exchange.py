@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import Optional
 from app.services import exchange_service
 from app.schemas.exchange import ExchangeCreate, ExchangeResponse, ExchangeStatusUpdate
 from app.dependencies.auth import get_current_user
@@ -10,12 +11,36 @@ def create_exchange_request(data: ExchangeCreate, user=Depends(get_current_user)
     return exchange_service.create_request(data, user["sub"])
 
 @router.get("/my-requests", response_model=list[ExchangeResponse])
-def get_my_requests(user=Depends(get_current_user)):
-    return exchange_service.get_sent_requests(user["sub"])
+def get_my_requests(
+    response: Response,
+    user=Depends(get_current_user),
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None)
+):
+    try:
+        requests, next_cursor = exchange_service.get_sent_requests(user["sub"], limit, offset, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return requests
 
 @router.get("/incoming", response_model=list[ExchangeResponse])
-def get_incoming_requests(user=Depends(get_current_user)):
-    return exchange_service.get_received_requests(user["sub"])
+def get_incoming_requests(
+    response: Response,
+    user=Depends(get_current_user),
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None)
+):
+    try:
+        requests, next_cursor = exchange_service.get_received_requests(user["sub"], limit, offset, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return requests
 
 @router.post("/{request_id}/respond", response_model=ExchangeResponse)
 def respond_to_request(request_id: str, update: ExchangeStatusUpdate, user=Depends(get_current_user)):
@@ -1,13 +1,30 @@
 # app/routers/recommendations.py
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from typing import List, Optional
 import asyncio
+import heapq
 from app.dependencies.auth import get_current_user
-from app.schemas.book import BookResponse
+from app.dependencies.recommendation import (
+    get_unified_recommendation_service,
+    get_genre_recommender,
+    get_location_recommender,
+    get_collaborative_recommender,
+)
+from app.schemas.book import BookResponse, BOOK_LIST_FIELDS
 from app.services.unified_recommendation_service import UnifiedRecommendationService
 from app.services.recommenders.genre_based_recommender import GenreBasedRecommender
 from app.services.recommenders.location_based_recommender import LocationBasedRecommender
+from app.services.recommenders.collaborative_recommender import CollaborativeRecommender
+from app.services.recommendation_cache import recommendation_cache
+from app.services.book_catalog import book_catalog
+from app.services.recommenders.content_similarity import content_index
+from app.services.trending_tracker import trending_tracker
+from app.services.precomputed_recommendations import (
+    precomputed_store,
+    RECOMMENDATIONS_SERVE_PRECOMPUTED,
+    PRECOMPUTED_MAX_DISTANCE,
+)
 from app.database import supabase
 
 router = APIRouter(
@@ -15,21 +32,46 @@ router = APIRouter(
     tags=["recommendations"],
 )
 
+async def serve_precomputed(user_id: str, kind: str, limit: int):
+    """Stored results from the precompute job, or None to compute live"""
+    if not RECOMMENDATIONS_SERVE_PRECOMPUTED:
+        return None
+    # The store reads SQLite synchronously; keep it off the event loop
+    return await asyncio.to_thread(precomputed_store.lookup, user_id, kind, limit)
+
 @router.get("/unified", response_model=List[BookResponse])
 async def get_unified_recommendations(
+    response: Response,
     limit: int = Query(20, ge=1, le=50),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    recommendation_service: UnifiedRecommendationService = Depends(get_unified_recommendation_service)
 ):
     """
     Get a unified set of personalized book recommendations.
-    Combines multiple recommendation sources (genre, location) to provide diverse suggestions.
+    Combines multiple recommendation sources (genre, location, collaborative) to provide diverse suggestions.
+    Sources that exceed RECOMMENDATION_SOURCE_TIMEOUT or fail are left out, and
+    the X-Recommendations-Partial header lists them.
     """
+    cache_key = (current_user["sub"], "unified", limit)
+    cached = recommendation_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    precomputed = await serve_precomputed(current_user["sub"], "unified", limit)
+    if precomputed is not None:
+        recommendation_cache.set(cache_key, precomputed)
+        return precomputed
+
     try:
-        recommendation_service = UnifiedRecommendationService()
-        recommendations = await recommendation_service.get_unified_recommendations(
-            user_id=current_user["sec"], 
+        recommendations, missing_sources = await recommendation_service.get_unified_feed(
+            user_id=current_user["sub"], 
             limit=limit
         )
+        if missing_sources:
+            # Built without a slow or failing source; tell the client and don't cache it
+            response.headers["X-Recommendations-Partial"] = ",".join(missing_sources)
+        else:
+            recommendation_cache.set(cache_key, recommendations)
         return recommendations
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting recommendations: {str(e)}")
@@ -37,19 +79,29 @@ async def get_unified_recommendations(
 @router.get("/genre", response_model=List[BookResponse])
 async def get_genre_recommendations(
     limit: int = Query(20, ge=1, le=50),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    recommender: GenreBasedRecommender = Depends(get_genre_recommender)
 ):
     """
     Get book recommendations based on the user's favorite genres.
     Suggests books that match or are similar to the genres the user likes.
     """
+    cache_key = (current_user["sub"], "genre", limit)
+    cached = recommendation_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    precomputed = await serve_precomputed(current_user["sub"], "genre", limit)
+    if precomputed is not None:
+        recommendation_cache.set(cache_key, precomputed)
+        return precomputed
+
     try:
-        recommender = GenreBasedRecommender()
-        print("Testing1")
         recommendations = await recommender.get_recommendations(
-            user_id=current_user["sec"], 
+            user_id=current_user["sub"], 
+            limit=limit
         )
-        print("Testing2")
+        recommendation_cache.set(cache_key, recommendations)
         return recommendations
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting genre recommendations: {str(e)}")
@@ -58,23 +110,60 @@ async def get_genre_recommendations(
 async def get_location_recommendations(
     max_distance: float = Query(50.0, ge=0.1, le=500.0),
     limit: int = Query(20, ge=1, le=50),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    recommender: LocationBasedRecommender = Depends(get_location_recommender)
 ):
     """
     Get book recommendations based on proximity to the user.
     Suggests books that are available from users located near the current user.
     """
+    cache_key = (current_user["sub"], f"location:{max_distance}", limit)
+    cached = recommendation_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    if max_distance == PRECOMPUTED_MAX_DISTANCE:
+        precomputed = await serve_precomputed(current_user["sub"], "location", limit)
+        if precomputed is not None:
+            recommendation_cache.set(cache_key, precomputed)
+            return precomputed
+
     try:
-        recommender = LocationBasedRecommender()
         recommendations = await recommender.get_recommendations(
-            user_id=current_user["sec"], 
+            user_id=current_user["sub"], 
             max_distance=max_distance,
             limit=limit
         )
+        recommendation_cache.set(cache_key, recommendations)
         return recommendations
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting location recommendations: {str(e)}")
 
+@router.get("/collaborative", response_model=List[BookResponse])
+async def get_collaborative_recommendations(
+    limit: int = Query(20, ge=1, le=50),
+    current_user = Depends(get_current_user),
+    recommender: CollaborativeRecommender = Depends(get_collaborative_recommender)
+):
+    """
+    Get book recommendations from exchange history.
+    Suggests books requested by people who requested the same books as the user.
+    """
+    cache_key = (current_user["sub"], "collaborative", limit)
+    cached = recommendation_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        recommendations = await recommender.get_recommendations(
+            user_id=current_user["sub"], 
+            limit=limit
+        )
+        recommendation_cache.set(cache_key, recommendations)
+        return recommendations
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting collaborative recommendations: {str(e)}")
+
 @router.get("/similar/{book_id}", response_model=List[BookResponse])
 async def get_similar_books(
     book_id: int,
@@ -84,28 +173,66 @@ async def get_similar_books(
     """
     Get books similar to the specified book.
     Useful for 'You might also like' recommendations on book detail pages.
+    Served from the precomputed content-similarity neighbour table when the
+    book is indexed and a neighbour is available, otherwise falls back to
+    books of the same genre, then to any available book.
     """
     try:
-        from app.database import supabase
-        
-        # First get the book to find its genre
-        book_response = supabase.table("books").select("*").eq("id", book_id).execute()
+        neighbours = content_index.similar(book_id) if content_index.ready else []
+        if neighbours and book_catalog.loaded:
+            book = book_catalog.get(book_id)
+            similar_books = []
+            for similar_id, similarity in neighbours:
+                similar_book = book_catalog.get(similar_id)
+                if not similar_book or similar_book.get("status") != "available":
+                    continue
+                similar_book = dict(similar_book)
+                similar_book["score"] = similarity * 100
+                similar_book["reason"] = f"Similar to {book['title']}" if book else "Similar content"
+                similar_books.append(similar_book)
+                if len(similar_books) == limit:
+                    break
+            if similar_books:
+                return similar_books
+            # Every precomputed neighbour is reserved or gone; fall back to the genre
         
-        if not book_response.data:
-            raise HTTPException(status_code=404, detail="Book not found")
-                
-        book = book_response.data[0]
-        
-        # Get books with the same genre, excluding this book
-        similar_response = (supabase.table("books")
-            .select("*")
-            .eq("genre", book["genre"])
-            .neq("id", book_id)
-            .eq("status", "available")
-            .limit(limit)
-            .execute())
-        
-        similar_books = similar_response.data
+        if book_catalog.loaded:
+            # Served from the in-memory catalog
+            book = book_catalog.get(book_id)
+            if not book:
+                raise HTTPException(status_code=404, detail="Book not found")
+            
+            similar_books = [
+                dict(similar_book)
+                for similar_book in book_catalog.find(genre=book["genre"], status="available")
+                if str(similar_book["id"]) != str(book_id)
+            ][:limit]
+            if not similar_books:
+                # Nothing else in the genre is available either; offer the rest of the catalog
+                return [
+                    {**similar_book, "reason": "Available now"}
+                    for similar_book in book_catalog.find(status="available")
+                    if str(similar_book["id"]) != str(book_id)
+                ][:limit]
+        else:
+            # First get the book to find its genre
+            book_response = supabase.table("books").select("id,genre").eq("id", book_id).execute()
+            
+            if not book_response.data:
+                raise HTTPException(status_code=404, detail="Book not found")
+                    
+            book = book_response.data[0]
+            
+            # Get books with the same genre, excluding this book
+            similar_response = (supabase.table("books")
+                .select(",".join(BOOK_LIST_FIELDS))
+                .eq("genre", book["genre"])
+                .neq("id", book_id)
+                .eq("status", "available")
+                .limit(limit)
+                .execute())
+            
+            similar_books = similar_response.data
         
         # Add a reason field
         for similar_book in similar_books:
@@ -122,21 +249,53 @@ async def get_trending_books(
 ):
     """
     Get currently trending books on the platform.
-    Trending books are determined by recent activity and popularity.
+    Trending books are ranked by time-decayed exchange requests and detail
+    page views; with no recorded activity yet, the newest books are returned.
     """
     try:
-        from app.database import supabase
-        
-        # This is a placeholder for trending books logic
-        # In a real implementation, you would track book views, requests, etc.
-        trending_response = (supabase.table("books")
-            .select("*")
-            .eq("status", "available")
-            .order("created_at", desc=True)
-            .limit(limit)
-            .execute())
-        
-        trending_books = trending_response.data
+        leaders = trending_tracker.top()
+        if leaders:
+            if book_catalog.loaded:
+                books_by_id = {book_id: book_catalog.get(book_id) for book_id, _ in leaders}
+            else:
+                books_response = (supabase.table("books")
+                    .select(",".join(BOOK_LIST_FIELDS))
+                    .in_("id", [book_id for book_id, _ in leaders])
+                    .execute())
+                books_by_id = {str(book["id"]): book for book in books_response.data}
+
+            trending_books = []
+            for book_id, score in leaders:
+                book = books_by_id.get(book_id)
+                if not book or book.get("status") != "available":
+                    continue
+                book = dict(book)
+                book["score"] = score
+                book["reason"] = "Trending now"
+                trending_books.append(book)
+                if len(trending_books) == limit:
+                    break
+            if trending_books:
+                return trending_books
+
+        if book_catalog.loaded:
+            trending_books = [
+                dict(book)
+                for book in heapq.nlargest(
+                    limit,
+                    book_catalog.find(status="available"),
+                    key=lambda book: book.get("created_at") or ""
+                )
+            ]
+        else:
+            trending_response = (supabase.table("books")
+                .select(",".join(BOOK_LIST_FIELDS))
+                .eq("status", "available")
+                .order("created_at", desc=True)
+                .limit(limit)
+                .execute())
+            
+            trending_books = trending_response.data
         
         # Add a reason field
         for book in trending_books:
@@ -144,4 +303,27 @@ async def get_trending_books(
             
         return trending_books
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error getting trending books: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error getting trending books: {str(e)}")
+
+@router.get("/cache/stats")
+async def get_cache_stats(
+    current_user = Depends(get_current_user),
+    recommendation_service: UnifiedRecommendationService = Depends(get_unified_recommendation_service)
+):
+    """
+    Get hit/miss counters and occupancy of the recommendation cache, how
+    often precomputed results could be served, and per-source latency and
+    timeout counters of the unified feed.
+    Useful for tuning RECOMMENDATION_CACHE_SIZE and RECOMMENDATION_CACHE_TTL.
+    """
+    return {
+        **recommendation_cache.stats(),
+        "precomputed": {
+            "enabled": RECOMMENDATIONS_SERVE_PRECOMPUTED,
+            "hits": precomputed_store.hits,
+            "misses": precomputed_store.misses,
+        },
+        "sources": {
+            name: stats.snapshot() for name, stats in recommendation_service.source_stats.items()
+        },
+    }
\ No newline at end of file
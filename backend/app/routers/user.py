@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks
 from app.dependencies.auth import get_current_user
+from app.core.uploads import UploadRejected
 from app.schemas.user import UserProfile, UserProfileUpdate
 from app.services import user_service
 from app.database import supabase
@@ -24,6 +25,7 @@ async def update_my_profile(data: UserProfileUpdate, user=Depends(get_current_us
 
 @router.post("/upload-photo", response_model=dict)
 async def upload_profile_photo(
+    background_tasks: BackgroundTasks,
     profile_photo: UploadFile = File(...),
     user = Depends(get_current_user)
 ):
@@ -31,7 +33,12 @@ async def upload_profile_photo(
     try:
         # Use the service to handle all the logic
         result = await user_service.upload_and_update_profile_photo(user, profile_photo)
+        # Thumbnails are rendered in the worker pool after the response goes out
+        background_tasks.add_task(user_service.attach_profile_photo_variants, user["sub"],
+                                  result["profile_photo_url"])
         return result
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         # Log the error for debugging
         import traceback
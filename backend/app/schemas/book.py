@@ -1,6 +1,15 @@
 from fastapi import UploadFile, File, Form
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional, Union
+import os
+
+# Columns fetched for list views (grids, dashboards, recommendations) and for
+# the single-book detail view. List views leave out the description, the one
+# large column; callers that render it ask for it with `fields=`. Grids show
+# thumbnail_url; image_variants holds every size and format of the cover.
+BOOK_LIST_FIELDS = ("id", "title", "author", "genre", "condition", "status", "image_url", "thumbnail_url",
+                    "owner_id", "created_at")
+BOOK_DETAIL_FIELDS = BOOK_LIST_FIELDS + ("description", "image_variants")
 
 # For file upload with form data
 class BookCreate(BaseModel):
@@ -36,8 +45,27 @@ async def create_book_form(
 class AutoFillRequest(BaseModel):
     title: str
 
+# Most titles accepted by one batch auto-fill request
+AUTO_FILL_BATCH_MAX_TITLES: int = int(os.getenv("AUTO_FILL_BATCH_MAX_TITLES", "50"))
+
+class AutoFillBatchRequest(BaseModel):
+    titles: List[str] = Field(..., min_length=1, max_length=AUTO_FILL_BATCH_MAX_TITLES)
+
+# Slim list-view book (BOOK_LIST_FIELDS)
+class BookListItem(BaseModel):
+    id: Union[int, str]
+    title: str
+    author: Optional[str] = None
+    genre: Optional[str] = None
+    condition: Optional[str] = None
+    status: Optional[str] = None
+    image_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    owner_id: Optional[str] = None
+    created_at: Optional[str] = None
+
 # Add this new model for recommendations
-class BookResponse(BaseModel):
+class BookResponse(BookListItem):
     # Recommendation-specific fields
     source: Optional[str] = None
     reason: Optional[str] = None
@@ -7,6 +7,9 @@ class ExchangeCreate(BaseModel):
 class ExchangeStatusUpdate(BaseModel):
     status: Literal["accepted", "rejected"]
 
+# Columns of book_request returned to clients
+EXCHANGE_FIELDS = ("id", "book_id", "from_user_id", "to_user_id", "status", "created_at")
+
 class ExchangeResponse(BaseModel):
     id: str
     book_id: str
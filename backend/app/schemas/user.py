@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 class UserProfileBase(BaseModel):
@@ -19,6 +19,9 @@ class UserProfileUpdate(BaseModel):
 class UserProfile(UserProfileBase):
     id: str
     email: Optional[EmailStr] = None
+    profile_photo_url: Optional[str] = None
+    profile_photo_thumbnail_url: Optional[str] = None
+    profile_photo_variants: Optional[Dict[str, Dict[str, str]]] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
@@ -0,0 +1,135 @@
+# app/services/auto_fill_cache.py
+
+from typing import Dict, Any, Optional, Callable, Awaitable
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+AUTO_FILL_CACHE_PATH: str = os.getenv("AUTO_FILL_CACHE_PATH", "data/auto_fill_cache.db")
+# Seconds a title's details are reused before asking the model again
+AUTO_FILL_CACHE_TTL: float = float(os.getenv("AUTO_FILL_CACHE_TTL", "2592000"))
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS auto_fill (
+    title_key TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    payload TEXT NOT NULL
+)
+"""
+
+
+def normalize_title(title: str) -> str:
+    """Cache key for a title: case, punctuation and spacing don't matter"""
+    return " ".join(TOKEN_PATTERN.findall(title.casefold()))
+
+
+class AutoFillCache:
+    """
+    SQLite-backed cache of auto-filled book details, keyed by normalized title
+
+    Entries survive restarts and are shared by every worker process using the
+    same file. Concurrent lookups of the same title in one process share a
+    single upstream call instead of each paying for their own.
+    """
+
+    def __init__(self, path: str = AUTO_FILL_CACHE_PATH, ttl: float = AUTO_FILL_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        # title key -> upstream call in progress
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=5)
+        connection.execute(SCHEMA)
+        return connection
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached details for a title key, or None when missing or expired"""
+        try:
+            connection = self._connect()
+            try:
+                row = connection.execute(
+                    "SELECT created_at, payload FROM auto_fill WHERE title_key = ?", (key,)
+                ).fetchone()
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            print(f"Error reading auto-fill cache: {e}")
+            return None
+
+        if row is None or time.time() - row[0] > self.ttl:
+            return None
+        return json.loads(row[1])
+
+    def set(self, key: str, details: Dict[str, Any]) -> None:
+        """Store details for a title key, dropping expired entries on the way"""
+        now = time.time()
+        try:
+            connection = self._connect()
+            try:
+                connection.execute(
+                    "INSERT OR REPLACE INTO auto_fill VALUES (?, ?, ?)", (key, now, json.dumps(details))
+                )
+                connection.execute("DELETE FROM auto_fill WHERE created_at < ?", (now - self.ttl,))
+                connection.commit()
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            print(f"Error writing auto-fill cache: {e}")
+
+    async def get_or_fetch(self, title: str,
+                           fetch: Callable[[], Awaitable[Optional[Dict[str, Any]]]]) -> Dict[str, Any]:
+        """
+        Cached details for a title, or the result of fetch()
+
+        fetch returns None for an unusable response, which is passed on as {}
+        and not cached. Callers asking for a title that is already being
+        fetched wait for that call rather than starting another.
+        """
+        key = normalize_title(title)
+        if not key:
+            return await fetch() or {}
+
+        cached = await asyncio.to_thread(self.get, key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        task = self._in_flight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._fetch_and_store(key, fetch))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+
+        # Shielded so one caller disconnecting doesn't cancel the call the others wait on
+        details = await asyncio.shield(task)
+        return dict(details) if details else {}
+
+    async def _fetch_and_store(self, key: str,
+                               fetch: Callable[[], Awaitable[Optional[Dict[str, Any]]]]) -> Optional[Dict[str, Any]]:
+        details = await fetch()
+        if details:
+            await asyncio.to_thread(self.set, key, details)
+        return details
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced, "ttl": self.ttl}
+
+
+# Shared per-process cache in front of the auto-fill model
+auto_fill_cache = AutoFillCache()
@@ -0,0 +1,158 @@
+# app/services/book_catalog.py
+
+from typing import List, Dict, Any, Optional, Iterable
+from collections import defaultdict
+import os
+import threading
+import time
+import httpx
+from dotenv import load_dotenv
+from app.core.refresh import BackgroundRefresh
+
+load_dotenv()
+
+# Seconds before the catalog is reloaded from the books table, to pick up
+# writes made by other worker processes
+BOOK_CATALOG_TTL: float = float(os.getenv("BOOK_CATALOG_TTL", "900"))
+BOOK_CATALOG_PAGE_SIZE: int = int(os.getenv("BOOK_CATALOG_PAGE_SIZE", "1000"))
+
+INDEXED_FIELDS = ("genre", "owner_id", "status")
+
+
+class BookCatalog:
+    """
+    Process-local copy of the books table with secondary indexes
+
+    Loaded once from Supabase and then kept current by the write paths in
+    book_service and exchange_service, so recommenders can read candidate
+    books without a network round trip. Rows are shared, so callers must copy
+    a book before adding fields to it.
+    """
+
+    def __init__(self):
+        self.books: Dict[str, Dict[str, Any]] = {}
+        # field -> value -> ordered set of book ids (dicts keep insertion order)
+        self.indexes: Dict[str, Dict[Any, Dict[str, None]]] = {
+            field: defaultdict(dict) for field in INDEXED_FIELDS
+        }
+        self.loaded_at: Optional[float] = None
+        self._lock = threading.RLock()  # Sync write endpoints run in the threadpool
+        self._refresh = BackgroundRefresh("book catalog")
+
+    def __len__(self) -> int:
+        return len(self.books)
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    @property
+    def is_stale(self) -> bool:
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > BOOK_CATALOG_TTL
+
+    def load(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """Replace the catalog contents with the given rows"""
+        with self._lock:
+            self.books = {}
+            self.indexes = {field: defaultdict(dict) for field in INDEXED_FIELDS}
+            for row in rows:
+                self._insert(row)
+            self.loaded_at = time.monotonic()
+
+    def _insert(self, row: Dict[str, Any]) -> None:
+        book_id = str(row["id"])
+        self.books[book_id] = row
+        for field in INDEXED_FIELDS:
+            self.indexes[field][row.get(field)][book_id] = None
+
+    def _unindex(self, book_id: str) -> Optional[Dict[str, Any]]:
+        row = self.books.pop(book_id, None)
+        if row is None:
+            return None
+        for field in INDEXED_FIELDS:
+            bucket = self.indexes[field].get(row.get(field))
+            if bucket is not None:
+                bucket.pop(book_id, None)
+                if not bucket:
+                    del self.indexes[field][row.get(field)]
+        return row
+
+    def upsert(self, row: Dict[str, Any]) -> None:
+        """Apply an insert or update; partial rows are merged into the cached one"""
+        with self._lock:
+            existing = self._unindex(str(row["id"]))
+            self._insert({**existing, **row} if existing else dict(row))
+
+    def upsert_many(self, rows: Iterable[Dict[str, Any]]) -> None:
+        for row in rows:
+            self.upsert(row)
+
+    def remove(self, book_id) -> None:
+        with self._lock:
+            self._unindex(str(book_id))
+
+    def get(self, book_id) -> Optional[Dict[str, Any]]:
+        return self.books.get(str(book_id))
+
+    def find(self, genre: Optional[str] = None, owner_id: Optional[str] = None,
+             status: Optional[str] = None, exclude_owner: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Books matching every given field, in catalog order"""
+        with self._lock:
+            filters = [
+                self.indexes[field].get(value, {})
+                for field, value in (("genre", genre), ("owner_id", owner_id), ("status", status))
+                if value is not None
+            ]
+            if filters:
+                filters.sort(key=len)
+                smallest, others = filters[0], filters[1:]
+                book_ids = [
+                    book_id for book_id in smallest
+                    if all(book_id in other for other in others)
+                ]
+            else:
+                book_ids = list(self.books)
+
+            books = [self.books[book_id] for book_id in book_ids]
+
+        if exclude_owner is not None:
+            books = [book for book in books if book.get("owner_id") != exclude_owner]
+        return books
+
+    async def ensure_loaded(self, client: httpx.AsyncClient, supabase_url: str, headers: Dict[str, str],
+                            wait: bool = False) -> None:
+        """
+        Load the books table on first use; once loaded, a stale catalog is
+        reloaded in the background while callers keep reading the current one,
+        unless `wait` asks for the reload to be awaited too
+        """
+        if self.is_stale:
+            await self._refresh.run(lambda: self._load(client, supabase_url, headers), wait=wait or not self.loaded)
+
+    async def _load(self, client: httpx.AsyncClient, supabase_url: str, headers: Dict[str, str]) -> None:
+        # Page through the table; PostgREST caps the rows returned per request
+        rows: List[Dict[str, Any]] = []
+        while True:
+            try:
+                response = await client.get(
+                    f"{supabase_url}/rest/v1/books?select=*&order=id"
+                    f"&limit={BOOK_CATALOG_PAGE_SIZE}&offset={len(rows)}",
+                    headers=headers
+                )
+            except httpx.HTTPError as e:
+                print(f"Error loading book catalog: {e}")
+                return
+            if response.status_code != 200:
+                print(f"Error loading book catalog: {response.text}")
+                return
+            page = response.json()
+            rows.extend(page)
+            if len(page) < BOOK_CATALOG_PAGE_SIZE:
+                break
+
+        self.load(rows)
+        print(f"Book catalog loaded with {len(self)} books")
+
+
+# Shared per-process catalog, updated by the book and exchange write paths
+book_catalog = BookCatalog()
@@ -0,0 +1,302 @@
+# app/services/book_import.py
+
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple, TextIO, Callable
+import asyncio
+import csv
+import json
+import os
+import sqlite3
+import time
+import uuid
+from dotenv import load_dotenv
+from fastapi import UploadFile
+from pydantic import ValidationError
+from app.core.uploads import UPLOAD_CHUNK_SIZE
+from app.database import supabase
+from app.schemas.book import BookCreate
+from app.services.book_service import apply_book_changes
+from app.services.recommendation_cache import recommendation_cache
+
+load_dotenv()
+
+# Rows sent per insert request
+BOOK_IMPORT_BATCH_SIZE: int = int(os.getenv("BOOK_IMPORT_BATCH_SIZE", "500"))
+# Row errors included in the report; the count of failures is always exact
+BOOK_IMPORT_MAX_ERRORS: int = int(os.getenv("BOOK_IMPORT_MAX_ERRORS", "100"))
+# Status of each import, shared by the worker processes on the host
+BOOK_IMPORT_JOBS_PATH: str = os.getenv("BOOK_IMPORT_JOBS_PATH", "data/import_jobs.db")
+# Uploaded files wait here until their import has read them
+BOOK_IMPORT_SPOOL_DIR: str = os.getenv("BOOK_IMPORT_SPOOL_DIR", "data/imports")
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# A parsed row: (line number in the file, fields) or (line number, parse error)
+ParsedRow = Tuple[int, Dict[str, Any], Optional[str]]
+
+JOBS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS import_jobs (
+    id TEXT PRIMARY KEY,
+    owner_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    report TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str] = None) -> str:
+    """csv or ndjson from a file name or content type; csv when neither says"""
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or (content_type or "").endswith(("ndjson", "jsonl")):
+        return "ndjson"
+    return "csv"
+
+
+def iter_csv_rows(stream: TextIO) -> Iterator[ParsedRow]:
+    """Rows of a CSV file with a header line, read one at a time"""
+    reader = csv.DictReader(stream)
+    try:
+        for row in reader:
+            # Empty cells mean "not given", so optional fields fall back to their defaults
+            yield reader.line_num, {key: value for key, value in row.items() if key and value not in ("", None)}, None
+    except csv.Error as e:
+        yield reader.line_num, {}, f"Invalid CSV: {e}"
+
+
+def iter_ndjson_rows(stream: TextIO) -> Iterator[ParsedRow]:
+    """Rows of a newline-delimited JSON file, read one line at a time"""
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, {}, f"Invalid JSON: {e.msg}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, {}, "Invalid JSON: expected an object"
+            continue
+        yield line_number, row, None
+
+
+def iter_rows(stream: TextIO, file_format: str) -> Iterator[ParsedRow]:
+    if file_format not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format: {file_format}")
+    return iter_ndjson_rows(stream) if file_format == "ndjson" else iter_csv_rows(stream)
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'row'}: {detail['msg']}" for detail in error.errors()
+    )
+
+
+class ImportReport:
+    """Counts, capped row errors and throughput of one import"""
+
+    def __init__(self, max_errors: int = BOOK_IMPORT_MAX_ERRORS):
+        self.max_errors = max_errors
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.started_at = time.perf_counter()
+
+    def fail(self, row: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "error": error})
+
+    def as_dict(self) -> Dict[str, Any]:
+        seconds = time.perf_counter() - self.started_at
+        return {
+            "imported": self.imported,
+            "failed": self.failed,
+            # Retried batches report their rows after later validation errors
+            "errors": sorted(self.errors, key=lambda error: error["row"]),
+            "errors_truncated": self.failed > len(self.errors),
+            "seconds": round(seconds, 3),
+            "rows_per_second": round((self.imported + self.failed) / seconds, 1) if seconds else None,
+        }
+
+
+def import_books(rows: Iterable[ParsedRow], user_id: str, batch_size: int = BOOK_IMPORT_BATCH_SIZE,
+                 client=None, on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Validate parsed rows against BookCreate and insert them for a user in batches
+
+    Rows are consumed lazily, so memory stays bounded by one batch whatever
+    the file size. A batch the database rejects is retried row by row to
+    pin the error on the rows that caused it. on_progress, if given, gets
+    the report so far after every batch. Cached recommendations are dropped
+    once, after the last batch.
+
+    Returns:
+        The import report: imported and failed counts, row errors (capped at
+        BOOK_IMPORT_MAX_ERRORS), elapsed seconds and rows per second
+    """
+    client = client or supabase
+    report = ImportReport()
+    batch: List[Tuple[int, Dict[str, Any]]] = []
+
+    line_number = 0
+    try:
+        for line_number, row, error in rows:
+            if error:
+                report.fail(line_number, error)
+                continue
+            try:
+                book = BookCreate(**row)
+            except ValidationError as e:
+                report.fail(line_number, _validation_message(e))
+                continue
+            batch.append((line_number, {**book.dict(), "owner_id": user_id}))
+            if len(batch) >= batch_size:
+                _insert_batch(client, batch, report)
+                batch = []
+                if on_progress:
+                    on_progress(report.as_dict())
+    except UnicodeDecodeError:
+        # Nothing past an undecodable byte can be trusted; keep what came before it
+        report.fail(line_number + 1, f"File is not valid UTF-8; nothing after row {line_number} was read")
+
+    if batch:
+        _insert_batch(client, batch, report)
+    if report.imported:
+        recommendation_cache.invalidate_all()
+    return report.as_dict()
+
+
+def _insert_batch(client, batch: List[Tuple[int, Dict[str, Any]]], report: ImportReport) -> None:
+    try:
+        response = client.table("books").insert([payload for _, payload in batch]).execute()
+        inserted = response.data
+    except Exception as e:
+        if len(batch) == 1:
+            report.fail(batch[0][0], f"Insert failed: {e}")
+            return
+        print(f"Book import batch of {len(batch)} rows failed, retrying row by row: {e}")
+        for item in batch:
+            _insert_batch(client, [item], report)
+        return
+
+    report.imported += len(inserted)
+    # Per-book similar-books updates would dominate a large import; new books
+    # join that index at its next rebuild or restart
+    apply_book_changes(inserted, update_similar=False, invalidate=False)
+
+
+class ImportJobStore:
+    """
+    Status and latest report of each background import, in SQLite
+
+    An import runs in the worker process that accepted its upload; keeping
+    its progress in a file lets a status request answered by any worker on
+    the host see it.
+    """
+
+    def __init__(self, path: str = BOOK_IMPORT_JOBS_PATH):
+        self.path = path
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=5)
+        connection.execute(JOBS_SCHEMA)
+        return connection
+
+    def create(self, owner_id: str) -> Dict[str, Any]:
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        connection = self._connect()
+        try:
+            connection.execute(
+                "INSERT INTO import_jobs (id, owner_id, status, created_at, updated_at) VALUES (?, ?, 'queued', ?, ?)",
+                (job_id, owner_id, now, now)
+            )
+            connection.commit()
+        finally:
+            connection.close()
+        return self.get(job_id)
+
+    def update(self, job_id: str, status: str, report: Optional[Dict[str, Any]] = None) -> None:
+        connection = self._connect()
+        try:
+            connection.execute(
+                "UPDATE import_jobs SET status = ?, report = COALESCE(?, report), updated_at = ? WHERE id = ?",
+                (status, json.dumps(report) if report is not None else None, time.time(), job_id)
+            )
+            connection.commit()
+        finally:
+            connection.close()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        connection = self._connect()
+        try:
+            row = connection.execute(
+                "SELECT id, owner_id, status, report, created_at, updated_at FROM import_jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        finally:
+            connection.close()
+        if row is None:
+            return None
+        job_id, owner_id, status, report, created_at, updated_at = row
+        return {"id": job_id, "owner_id": owner_id, "status": status,
+                "report": json.loads(report) if report else None,
+                "created_at": created_at, "updated_at": updated_at}
+
+
+def run_import_job(job_id: str, path: str, user_id: str, file_format: str,
+                   batch_size: int = BOOK_IMPORT_BATCH_SIZE) -> None:
+    """Import a spooled file, recording progress on the job, then delete the file"""
+    import_jobs.update(job_id, "running")
+    try:
+        with open(path, encoding="utf-8-sig", newline="") as stream:
+            report = import_books(iter_rows(stream, file_format), user_id, batch_size=batch_size,
+                                  on_progress=lambda progress: import_jobs.update(job_id, "running", progress))
+        import_jobs.update(job_id, "done", report)
+    except Exception as e:
+        print(f"Book import {job_id} failed: {e}")
+        import_jobs.update(job_id, "failed", {"error": str(e)})
+    finally:
+        os.remove(path)
+
+
+async def start_import(upload_file: UploadFile, user_id: str, file_format: str,
+                       batch_size: int = BOOK_IMPORT_BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Save an uploaded file and import it in the background
+
+    The upload is copied to BOOK_IMPORT_SPOOL_DIR in chunks, then imported
+    in a thread of the event loop's default executor, so neither the
+    request nor the threadpool serving sync endpoints waits for the
+    inserts. Poll import_jobs.get(job id) for progress and the report.
+
+    Returns:
+        The new job: id, status ("queued", then "running", "done" or "failed"), report
+    """
+    if file_format not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format: {file_format}")
+    job = await asyncio.to_thread(import_jobs.create, user_id)
+    await asyncio.to_thread(os.makedirs, BOOK_IMPORT_SPOOL_DIR, exist_ok=True)
+    path = os.path.join(BOOK_IMPORT_SPOOL_DIR, f"{job['id']}.{file_format}")
+
+    file = await asyncio.to_thread(open, path, "wb")
+    try:
+        while chunk := await upload_file.read(UPLOAD_CHUNK_SIZE):
+            await asyncio.to_thread(file.write, chunk)
+        await asyncio.to_thread(file.close)
+    except BaseException:
+        await asyncio.to_thread(file.close)
+        await asyncio.to_thread(os.remove, path)
+        await asyncio.to_thread(import_jobs.update, job["id"], "failed", {"error": "Upload was not received"})
+        raise
+
+    asyncio.get_running_loop().run_in_executor(None, run_import_job, job["id"], path, user_id, file_format,
+                                               batch_size)
+    return job
+
+
+# Shared job table for the import endpoints
+import_jobs = ImportJobStore()
@@ -1,34 +1,90 @@
 import os
 import httpx
-import uuid
-import shutil
 import json
 from fastapi import UploadFile
 from app.database import supabase
-from app.schemas.book import BookCreate
-from typing import List, Optional, Tuple
+from app.schemas.book import BookCreate, BOOK_LIST_FIELDS, BOOK_DETAIL_FIELDS
+from app.services.recommendation_cache import recommendation_cache
+from app.services.book_catalog import book_catalog
+from app.services.recommenders.content_similarity import content_index
+from app.services.trending_tracker import trending_tracker
+from app.services.search_index import search_index
+from app.services.auto_fill_cache import auto_fill_cache
+from app.services.image_variants import generate_variants, variant_urls
+from app.core.pagination import paginate, encode_cursor, decode_cursor
+from app.services.upload_store import upload_store
+from typing import List, Optional, Tuple, AsyncIterator
+import asyncio
+import heapq
+
+# Directory of the upload store that holds book covers
+UPLOAD_DIR = "book_covers"
+
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+# The model takes around a second; allow for slow responses but never hang a request
+AUTO_FILL_TIMEOUT: float = float(os.getenv("AUTO_FILL_TIMEOUT", "20"))
+AUTO_FILL_CONNECT_TIMEOUT: float = float(os.getenv("AUTO_FILL_CONNECT_TIMEOUT", "5"))
+# Model calls in flight at once for one batch auto-fill request
+AUTO_FILL_BATCH_CONCURRENCY: int = int(os.getenv("AUTO_FILL_BATCH_CONCURRENCY", "8"))
+
+def apply_book_changes(rows: List[dict], update_similar: bool = True, invalidate: bool = True):
+    """
+    Push written rows into the in-memory indexes and drop cached recommendations
 
-# Define the base URL for your uploads
-UPLOAD_DIR = "uploads/book_covers"
-BASE_URL = "http://localhost:8000"  # Change to your server URL
+    update_similar=False skips the similar-books index, whose per-book update
+    is too slow for bulk writes; those books join it at its next rebuild.
+    invalidate=False leaves the recommendation cache to the caller, so a
+    bulk write can drop it once at the end instead of once per batch.
+    """
+    for row in rows or []:
+        book_catalog.upsert(row)
+        if update_similar and content_index.ready:
+            content_index.upsert(book_catalog.get(row["id"]))
+        if search_index.ready:
+            search_index.upsert(book_catalog.get(row["id"]))
+    if invalidate:
+        recommendation_cache.invalidate_all()
+
+def apply_book_deletes(rows: List[dict]):
+    """Remove deleted rows from the in-memory indexes and drop cached recommendations"""
+    for row in rows or []:
+        book_catalog.remove(row["id"])
+        content_index.remove(row["id"])
+        trending_tracker.remove(row["id"])
+        search_index.remove(row["id"])
+    recommendation_cache.invalidate_all()
+
+def book_columns(fields: Optional[str] = None) -> List[str]:
+    """List-view columns plus any detail columns named in a comma-separated `fields`"""
+    columns = list(BOOK_LIST_FIELDS)
+    for field in (fields or "").split(","):
+        field = field.strip()
+        if not field or field in columns:
+            continue
+        if field not in BOOK_DETAIL_FIELDS:
+            raise ValueError(f"Unknown book field: {field}")
+        columns.append(field)
+    return columns
 
 def create_book(book: BookCreate, user_id: str):
     payload = {**book.dict(), "owner_id": user_id}
     print("🚨 Payload being inserted:", payload)  # Add this
     response = supabase.table("books").insert(payload).execute()
+    apply_book_changes(response.data)
     return response.data
 
 def get_all_books():
-    response = supabase.table("books").select("*").execute()
+    response = supabase.table("books").select(",".join(BOOK_LIST_FIELDS)).execute()
     return response.data
 
 def get_book_by_id(book_id: int):
-    response = supabase.table("books").select("*").eq("id", book_id).single().execute()
+    response = supabase.table("books").select(",".join(BOOK_DETAIL_FIELDS)).eq("id", book_id).single().execute()
     return response.data
 
-def get_my_books(user_id):
-    response=supabase.table("books").select("*").eq("owner_id", user_id).execute()
-    return response.data
+def get_my_books(user_id, limit: Optional[int] = None, offset: int = 0, cursor: Optional[str] = None,
+                 fields: Optional[str] = None):
+    query = supabase.table("books").select(",".join(book_columns(fields))).eq("owner_id", user_id)
+    return paginate(query, limit, offset, cursor)
 
 def toggle_book_availability(book_id: str, user_id: str):
     print("Looking for book ID:", book_id)
@@ -57,6 +113,7 @@ def toggle_book_availability(book_id: str, user_id: str):
         .eq("owner_id", user_id) \
         .execute()
 
+    apply_book_changes(updated.data)
     return updated.data[0]
 
 
@@ -67,6 +124,10 @@ def delete_book(book_id: str, user_id: str):
         .eq("owner_id", user_id) \
         .execute()
 
+    if result.data:
+        apply_book_deletes(result.data)
+        for row in result.data:
+            upload_store.release(row.get("image_url"))
     return result.data
 
 
@@ -77,8 +138,20 @@ def get_filtered_books(
     genre: Optional[str] = None,
     limit: int = 10,
     offset: int = 0,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
 ):
-    query = supabase.table("books").select("*").neq("owner_id", user_id)
+    """
+    One page of other users' books and the cursor for the next page (None on
+    the last). Searches are ranked by relevance, everything else is newest
+    first; cursors from one ordering aren't valid for the other. Rows carry
+    the list-view columns plus any named in `fields`.
+    """
+    columns = book_columns(fields)
+    if search and book_catalog.loaded and search_index.ready:
+        return search_books(user_id, search, owner_id, genre, limit, offset, cursor, columns)
+
+    query = supabase.table("books").select(",".join(columns)).neq("owner_id", user_id)
 
     if owner_id:
         query = query.eq("owner_id", owner_id)
@@ -89,27 +162,59 @@ def get_filtered_books(
             f"title.ilike.%{search}%,author.ilike.%{search}%"
         )
 
-    query = query.range(offset, offset + limit - 1)  # Supabase uses 0-based inclusive ranges
+    return paginate(query, limit, offset, cursor)
 
-    result = query.execute()
-    return result.data
+def search_books(
+    user_id: str,
+    search: str,
+    owner_id: Optional[str] = None,
+    genre: Optional[str] = None,
+    limit: int = 10,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    columns: Tuple[str, ...] = BOOK_LIST_FIELDS,
+):
+    """
+    Relevance-ranked search over the in-memory catalog, with the same filters
+    as the database query. The router keeps the index current through
+    search_index.ensure_synced; this only reads it.
+    """
+    after = None
+    if cursor:
+        # The cursor is the (score, id) of the last result shown
+        score, book_id = decode_cursor(cursor)
+        if not isinstance(score, (int, float)) or not isinstance(book_id, str):
+            raise ValueError("Invalid cursor")
+        after = (-score, book_id)
+        offset = 0
+
+    scores = search_index.search(search)
+    matches = []
+    for book_id, score in scores.items():
+        book = book_catalog.get(book_id)
+        if (book is None or book.get("owner_id") == user_id
+                or (owner_id and book.get("owner_id") != owner_id)
+                or (genre and book.get("genre") != genre)):
+            continue
+        key = (-score, book_id)
+        if after is None or key > after:
+            matches.append((key, book))
+
+    # Best first; ties in a stable order so pages don't overlap
+    ranked = heapq.nsmallest(offset + limit + 1, matches, key=lambda match: match[0])
+    page = ranked[offset:offset + limit]
+    next_cursor = None
+    if len(ranked) > offset + limit:
+        (negative_score, book_id), _ = page[-1]
+        next_cursor = encode_cursor(-negative_score, book_id)
+    return [{column: book.get(column) for column in columns} for _, book in page], next_cursor
 
 async def save_upload_file(upload_file: UploadFile) -> str:
-    """Save an uploaded file and return its URL path."""
+    """Stream an uploaded file to disk and return its URL path."""
     if not upload_file:
         return None
-        
-    # Create a unique filename
-    file_extension = os.path.splitext(upload_file.filename)[1]
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = os.path.join(UPLOAD_DIR, unique_filename)
-    
-    # Save the file
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(upload_file.file, buffer)
-    
-    # Return the URL path to the file
-    return f"{BASE_URL}/uploads/book_covers/{unique_filename}"
+    saved = await upload_store.save(upload_file, UPLOAD_DIR)
+    return saved["url"]
 
 async def create_book_with_image(book: BookCreate, image: UploadFile, user_id: str):
     # Save the image if provided
@@ -121,9 +226,84 @@ async def create_book_with_image(book: BookCreate, image: UploadFile, user_id: s
     payload = {**book.dict(), "owner_id": user_id, "image_url": image_url}
     print("🚨 Payload being inserted:", payload)
     response = supabase.table("books").insert(payload).execute()
+    apply_book_changes(response.data)
+    if image_url and response.data:
+        await asyncio.to_thread(upload_store.acquire, image_url)
+    return response.data
+
+async def attach_book_image_variants(book: dict):
+    """
+    Render the thumbnail and medium variants of a book's cover and record
+    their URLs on the book. Meant to run after the response is sent; until
+    it finishes, clients fall back to image_url.
+    """
+    image_url = book.get("image_url")
+    path = upload_store.path(image_url)
+    if not path:
+        return None
+    try:
+        variants = await generate_variants(path, "book_cover")
+        urls = variant_urls(variants, upload_store.url)
+        # Matching on image_url keeps a slow render from overwriting a newer cover's variants
+        response = (supabase.table("books")
+            .update({"thumbnail_url": urls["thumbnail"]["webp"], "image_variants": urls})
+            .eq("id", book["id"])
+            .eq("image_url", image_url)
+            .execute())
+    except Exception as e:
+        print(f"Error generating image variants for book {book.get('id')}: {e}")
+        return None
+    apply_book_changes(response.data)
     return response.data
 
-async def auto_fill_book_details(title: str):
+async def auto_fill_book_details(title: str, client: Optional[httpx.AsyncClient] = None):
+    """
+    Suggested author, genre and description for a title
+
+    Answers are cached by normalized title (see auto_fill_cache), and
+    concurrent requests for the same title share one model call. `client` is
+    the app's pooled HTTP client; without one a short-lived client is used.
+    """
+    async def fetch():
+        if client is not None:
+            return await request_book_details(title, client)
+        async with httpx.AsyncClient() as own_client:
+            return await request_book_details(title, own_client)
+
+    return await auto_fill_cache.get_or_fetch(title, fetch)
+
+async def auto_fill_batch(titles: List[str], client: Optional[httpx.AsyncClient] = None,
+                          concurrency: int = AUTO_FILL_BATCH_CONCURRENCY) -> AsyncIterator[dict]:
+    """
+    Auto-fill many titles concurrently, yielding each result as it completes
+
+    Yields {"index", "title", "details"} per title, or {"index", "title",
+    "error"} when its lookup failed; one failure doesn't stop the others.
+    Wall time is close to the slowest lookup rather than the sum of them.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def lookup(index: int, title: str) -> dict:
+        async with semaphore:
+            try:
+                details = await auto_fill_book_details(title, client)
+            except Exception as e:
+                print("Auto-fill error:", e)
+                return {"index": index, "title": title, "error": "Failed to auto-fill book info"}
+        return {"index": index, "title": title, "details": details}
+
+    tasks = [asyncio.ensure_future(lookup(index, title)) for index, title in enumerate(titles)]
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            yield await next_result
+    finally:
+        # The client went away or stopped reading; don't keep calling the model
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+async def request_book_details(title: str, client: httpx.AsyncClient):
+    """Ask the model for a title's details; None when the reply isn't a JSON object"""
     prompt = f"""
     Given the book title "{title}", return a JSON object with the following fields if possible:
     - title
@@ -147,18 +327,26 @@ async def auto_fill_book_details(title: str):
         ]
     }
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post("https://openrouter.ai/api/v1/chat/completions", json=body, headers=headers)
-        response.raise_for_status()
-        result = response.json()
+    response = await client.post(
+        OPENROUTER_URL,
+        json=body,
+        headers=headers,
+        timeout=httpx.Timeout(AUTO_FILL_TIMEOUT, connect=AUTO_FILL_CONNECT_TIMEOUT)
+    )
+    response.raise_for_status()
+    result = response.json()
 
     try:
         message = result["choices"][0]["message"]["content"]
         print("[Claude Response]", message)
-        return json.loads(message)
+        details = json.loads(message)
     except Exception as e:
         print("Failed to parse response:", e)
-        return {}
+        return None
+    if not isinstance(details, dict):
+        print("Failed to parse response: not a JSON object")
+        return None
+    return details
 
 def update_book_status(book_id: str, user_id: str, new_status: str):
     valid_statuses = ["available", "unavailable", "reserved", "exchanged"]
@@ -174,6 +362,7 @@ def update_book_status(book_id: str, user_id: str, new_status: str):
     if not result.data:
         raise Exception("Book not found or you don't have permission to modify it")
 
+    apply_book_changes(result.data)
     return result.data[0]
 
 
@@ -187,5 +376,6 @@ def update_book_status_admin(book_id: str, new_status: str):
     if not result.data:
         raise Exception("Book not found")
 
+    apply_book_changes(result.data)
     return result.data[0]
 
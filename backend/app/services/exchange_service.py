@@ -1,4 +1,11 @@
 from app.database import supabase
+from app.services.book_service import apply_book_changes
+from app.services.trending_tracker import trending_tracker
+from app.services.recommenders.collaborative_recommender import co_requests
+from app.services.recommendation_cache import recommendation_cache
+from app.core.pagination import paginate
+from app.schemas.exchange import EXCHANGE_FIELDS
+from typing import Optional
 from uuid import uuid4
 
 
@@ -18,16 +25,20 @@ def create_request(data, user_id):
         "status": "pending"
     }
     response = supabase.table("book_request").insert(payload).execute()
+    trending_tracker.record_request(data.book_id)
+    # The request adds co-occurrences with the user's earlier requests
+    co_requests.record(user_id, data.book_id)
+    recommendation_cache.invalidate_user(user_id)
     return response.data[0]
 
-def get_sent_requests(user_id):
-    response = supabase.table("book_request").select("*").eq("from_user_id", user_id).execute()
-    return response.data
+def get_sent_requests(user_id, limit: Optional[int] = None, offset: int = 0, cursor: Optional[str] = None):
+    query = supabase.table("book_request").select(",".join(EXCHANGE_FIELDS)).eq("from_user_id", user_id)
+    return paginate(query, limit, offset, cursor)
 
 
-def get_received_requests(user_id):
-    response = supabase.table("book_request").select("*").eq("to_user_id", user_id).execute()
-    return response.data
+def get_received_requests(user_id, limit: Optional[int] = None, offset: int = 0, cursor: Optional[str] = None):
+    query = supabase.table("book_request").select(",".join(EXCHANGE_FIELDS)).eq("to_user_id", user_id)
+    return paginate(query, limit, offset, cursor)
 
 
 def respond_to_request(request_id, status, user_id):
@@ -47,7 +58,8 @@ def respond_to_request(request_id, status, user_id):
     # If accepted, mark the book as no longer available (or exchanged)
     if status.lower() == "accepted":
         book_id = request_data["book_id"]
-        supabase.table("books").update({"status": "reserved"}).eq("id", book_id).execute()
+        reserved = supabase.table("books").update({"status": "reserved"}).eq("id", book_id).execute()
+        apply_book_changes(reserved.data)
 
     return update.data[0]
 
@@ -55,7 +67,7 @@ def respond_to_request(request_id, status, user_id):
 def delete_request(request_id, user_id):
     # First check if the request exists and belongs to this user
     response = supabase.table("book_request") \
-        .select("*") \
+        .select("id") \
         .eq("id", request_id) \
         .eq("status", "pending") \
         .eq("from_user_id", user_id) \
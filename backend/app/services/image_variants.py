@@ -0,0 +1,116 @@
+# app/services/image_variants.py
+
+from typing import Callable, Dict, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import multiprocessing
+import os
+from dotenv import load_dotenv
+from PIL import Image, ImageOps
+
+load_dotenv()
+
+# Worker processes that resize uploads; decoding a phone photo takes a core for a while
+IMAGE_VARIANT_WORKERS: int = int(os.getenv("IMAGE_VARIANT_WORKERS", "2"))
+# Longest side of the medium variant, used for detail views
+IMAGE_MEDIUM_SIZE: int = int(os.getenv("IMAGE_MEDIUM_SIZE", "1024"))
+IMAGE_WEBP_QUALITY: int = int(os.getenv("IMAGE_WEBP_QUALITY", "80"))
+IMAGE_JPEG_QUALITY: int = int(os.getenv("IMAGE_JPEG_QUALITY", "82"))
+
+# Fixed thumbnail size per kind of upload, cropped to fill: book covers fill
+# listing and recommendation cards, profile photos a square avatar
+THUMBNAIL_SIZES: Dict[str, Tuple[int, int]] = {
+    "book_cover": (400, 300),
+    "profile_photo": (200, 200),
+}
+
+FORMATS = {
+    "webp": ("WEBP", {"quality": IMAGE_WEBP_QUALITY, "method": 4}),
+    "jpeg": ("JPEG", {"quality": IMAGE_JPEG_QUALITY, "optimize": True, "progressive": True}),
+}
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    """RGB copy of an image, with any transparency laid over white"""
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def render_variants(source_path: str, thumbnail_size: Tuple[int, int],
+                    medium_size: int = IMAGE_MEDIUM_SIZE) -> Dict[str, Dict[str, str]]:
+    """
+    Write thumbnail and medium variants of an image next to it, in WebP and JPEG
+
+    Runs in a worker process. Orientation from EXIF is applied to the pixels,
+    then the metadata is dropped: variants carry no EXIF (camera, GPS).
+
+    Returns:
+        {"thumbnail": {"webp": path, "jpeg": path}, "medium": {...}}
+    """
+    stem = os.path.splitext(source_path)[0]
+    variants = {
+        name: {extension: f"{stem}_{name}.{extension}" for extension in FORMATS}
+        for name in ("thumbnail", "medium")
+    }
+    # Identical uploads share one stored file, so its variants may already exist
+    if all(os.path.exists(path) for formats in variants.values() for path in formats.values()):
+        return variants
+
+    with Image.open(source_path) as image:
+        # Let the JPEG decoder scale down while decoding instead of
+        # producing every pixel of a 12MP photo and throwing most away
+        image.draft("RGB", (medium_size, medium_size))
+        image = _flatten(ImageOps.exif_transpose(image))
+
+    medium = image.copy()
+    medium.thumbnail((medium_size, medium_size), Image.LANCZOS, reducing_gap=3.0)
+    thumbnail = ImageOps.fit(medium, thumbnail_size, Image.LANCZOS)
+
+    for name, variant in (("thumbnail", thumbnail), ("medium", medium)):
+        for extension, (pil_format, options) in FORMATS.items():
+            # Written aside and renamed, so a reader never sees a partial file
+            partial_path = f"{variants[name][extension]}.part"
+            variant.save(partial_path, pil_format, **options)
+            os.replace(partial_path, variants[name][extension])
+    return variants
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # Spawned workers import only this module, not a copy of the running server
+        _pool = ProcessPoolExecutor(max_workers=IMAGE_VARIANT_WORKERS,
+                                    mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def generate_variants(source_path: str, kind: str) -> Dict[str, Dict[str, str]]:
+    """
+    Render an upload's variants in the worker pool, keeping the event loop free
+
+    Returns:
+        Variant file paths by name and format, as from render_variants
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_pool(), render_variants, source_path, THUMBNAIL_SIZES[kind])
+
+
+def variant_urls(variants: Dict[str, Dict[str, str]], url: Callable[[str], str]) -> Dict[str, Dict[str, str]]:
+    """Variant paths from render_variants as URLs, given the store's path-to-URL mapping"""
+    return {
+        name: {extension: url(path) for extension, path in formats.items()}
+        for name, formats in variants.items()
+    }
@@ -0,0 +1,133 @@
+# app/services/precomputed_recommendations.py
+
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+import json
+import os
+import sqlite3
+import time
+from dotenv import load_dotenv
+from app.services.book_catalog import book_catalog
+
+load_dotenv()
+
+# Answer recommendation requests from the precompute job's output when possible
+RECOMMENDATIONS_SERVE_PRECOMPUTED: bool = os.getenv("RECOMMENDATIONS_SERVE_PRECOMPUTED", "false").lower() == "true"
+PRECOMPUTED_RECOMMENDATIONS_PATH: str = os.getenv(
+    "PRECOMPUTED_RECOMMENDATIONS_PATH", "data/precomputed_recommendations.db"
+)
+# Seconds after which a precomputed result is ignored (the job is meant to run daily)
+PRECOMPUTED_MAX_AGE: float = float(os.getenv("PRECOMPUTED_MAX_AGE", "172800"))
+# Results stored per user and list; the endpoints allow at most 50
+PRECOMPUTED_LIMIT: int = int(os.getenv("PRECOMPUTED_LIMIT", "50"))
+# Search radius the location list is precomputed for (the endpoint default)
+PRECOMPUTED_MAX_DISTANCE: float = float(os.getenv("PRECOMPUTED_MAX_DISTANCE", "50"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recommendations (
+    user_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    generated_at REAL NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (user_id, kind)
+)
+"""
+
+
+class PrecomputedRecommendationStore:
+    """
+    SQLite file of recommendation lists written by the precompute job
+
+    Rows are keyed by (user_id, kind) where kind is "unified", "genre" or
+    "location". The job writes a complete new file and swaps it in, so a
+    connection is opened per lookup to always read the latest file. Reads
+    and writes block on SQLite, so async callers run them in a thread.
+    """
+
+    def __init__(self, path: str = PRECOMPUTED_RECOMMENDATIONS_PATH, max_age: float = PRECOMPUTED_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+
+    def write(self, rows: Iterable[Tuple[str, str, List[Dict[str, Any]]]]) -> int:
+        """Replace the store with the given (user_id, kind, recommendations) rows"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+        generated_at = time.time()
+        connection = sqlite3.connect(tmp_path)
+        try:
+            connection.execute(SCHEMA)
+            cursor = connection.executemany(
+                "INSERT INTO recommendations VALUES (?, ?, ?, ?)",
+                ((str(user_id), kind, generated_at, json.dumps(recs)) for user_id, kind, recs in rows)
+            )
+            count = cursor.rowcount
+            connection.commit()
+        finally:
+            connection.close()
+        os.replace(tmp_path, self.path)
+        return count
+
+    def get(self, user_id, kind: str) -> Optional[List[Dict[str, Any]]]:
+        """A user's stored list, or None when missing or older than max_age"""
+        if not os.path.exists(self.path):
+            return None
+        connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        try:
+            row = connection.execute(
+                "SELECT generated_at, payload FROM recommendations WHERE user_id = ? AND kind = ?",
+                (str(user_id), kind)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Error reading precomputed recommendations: {e}")
+            return None
+        finally:
+            connection.close()
+
+        if row is None or time.time() - row[0] > self.max_age:
+            return None
+        return json.loads(row[1])
+
+    def lookup(self, user_id, kind: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Serve `limit` stored recommendations, dropping books that have since
+        been reserved or deleted; None means the caller should compute live
+        """
+        stored = self.get(user_id, kind)
+        if stored is None:
+            self.misses += 1
+            return None
+
+        recommendations = stored
+        if book_catalog.loaded:
+            recommendations = [
+                rec for rec in stored
+                if (book_catalog.get(rec["id"]) or {}).get("status") == "available"
+            ]
+        # A list cut off at PRECOMPUTED_LIMIT may have had more candidates behind
+        # it; if too few remain to fill the page, compute live instead
+        if len(recommendations) < limit and len(stored) >= PRECOMPUTED_LIMIT:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return recommendations[:limit]
+
+    def discard(self, user_id) -> None:
+        """Drop a user's stored lists, e.g. after they change their profile"""
+        if not os.path.exists(self.path):
+            return
+        connection = sqlite3.connect(self.path)
+        try:
+            connection.execute("DELETE FROM recommendations WHERE user_id = ?", (str(user_id),))
+            connection.commit()
+        except sqlite3.Error as e:
+            print(f"Error discarding precomputed recommendations: {e}")
+        finally:
+            connection.close()
+
+
+# Shared store read by the recommendation endpoints and written by the precompute job
+precomputed_store = PrecomputedRecommendationStore()
@@ -0,0 +1,93 @@
+# app/services/recommendation_cache.py
+
+from typing import List, Dict, Any, Optional, Tuple, Hashable
+from collections import OrderedDict
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RECOMMENDATION_CACHE_SIZE: int = int(os.getenv("RECOMMENDATION_CACHE_SIZE", "1024"))
+RECOMMENDATION_CACHE_TTL: float = float(os.getenv("RECOMMENDATION_CACHE_TTL", "300"))
+
+CacheKey = Tuple[str, str, Hashable]
+
+
+class RecommendationCache:
+    """
+    Bounded LRU cache of recommendation results with a time-to-live
+
+    Keys are (user_id, endpoint, limit) tuples. Book writes drop every entry,
+    since any listing change can alter any user's candidate set; profile writes
+    drop the entries of the affected user.
+    """
+
+    def __init__(self, maxsize: int = RECOMMENDATION_CACHE_SIZE, ttl: float = RECOMMENDATION_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[CacheKey, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()  # Sync book endpoints invalidate from the threadpool
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: CacheKey) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(value)
+
+    def set(self, key: CacheKey, value: List[Dict[str, Any]]) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, list(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Drop every cached result for one user"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+            self.invalidations += 1
+
+    def invalidate_all(self) -> None:
+        """Drop every cached result (the candidate book set changed)"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
+
+
+# Shared per-process cache used by the recommendation endpoints
+recommendation_cache = RecommendationCache()
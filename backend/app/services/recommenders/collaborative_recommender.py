@@ -0,0 +1,254 @@
+# app/services/recommenders/collaborative_recommender.py
+
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator
+from collections import Counter, defaultdict
+from itertools import islice
+import heapq
+import math
+import os
+import threading
+import time
+import httpx
+from dotenv import load_dotenv
+from app.core.bulk_fetch import fetch_rows_by_ids
+from app.core.http_client import HttpClientHolder
+from app.core.refresh import BackgroundRefresh
+from app.schemas.book import BOOK_LIST_FIELDS
+from app.services.book_catalog import book_catalog
+
+load_dotenv()
+
+SUPABASE_URL: str = os.getenv("SUPABASE_URL")
+SUPABASE_KEY: str = os.getenv("SUPABASE_KEY")
+
+# Seconds before the co-request matrix is rebuilt from the book_request table
+COLLABORATIVE_TTL: float = float(os.getenv("COLLABORATIVE_TTL", "900"))
+# Each request pairs with at most this many of the user's earlier requests,
+# bounding the quadratic cost of very active users
+COLLABORATIVE_MAX_HISTORY: int = int(os.getenv("COLLABORATIVE_MAX_HISTORY", "50"))
+# Neighbours considered per requested book when scoring candidates
+COLLABORATIVE_NEIGHBOURS: int = int(os.getenv("COLLABORATIVE_NEIGHBOURS", "100"))
+COLLABORATIVE_PAGE_SIZE: int = int(os.getenv("COLLABORATIVE_PAGE_SIZE", "1000"))
+
+
+class CoRequestMatrix:
+    """
+    Sparse item-item co-occurrence counts from exchange request history
+
+    Two books co-occur when the same user requested both. Counts are kept as
+    a dict-of-keys sparse matrix (book -> Counter of books), which takes
+    single-cell increments when a new request arrives; similarity is the
+    cosine of the two books' requester sets, count / sqrt(n_a * n_b).
+    """
+
+    def __init__(self, max_history: int = COLLABORATIVE_MAX_HISTORY, ttl: float = COLLABORATIVE_TTL):
+        self.max_history = max_history
+        self.ttl = ttl
+        # user id -> requested book ids in request order (dicts as ordered sets)
+        self.user_books: Dict[str, Dict[str, None]] = {}
+        self.book_counts: Counter = Counter()
+        self.co_counts: Dict[str, Counter] = defaultdict(Counter)
+        self.loaded_at: Optional[float] = None
+        self._lock = threading.Lock()  # create_request records from the threadpool
+        self._refresh = BackgroundRefresh("co-request matrix")
+
+    def __len__(self) -> int:
+        return len(self.book_counts)
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    @property
+    def is_stale(self) -> bool:
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > self.ttl
+
+    def build(self, requests: Iterable[Dict[str, Any]]) -> None:
+        """Replace the matrix with the given book_request rows (from_user_id, book_id), oldest first"""
+        with self._lock:
+            self.user_books = {}
+            self.book_counts = Counter()
+            self.co_counts = defaultdict(Counter)
+            for request in requests:
+                self._add(str(request["from_user_id"]), str(request["book_id"]))
+            self.loaded_at = time.monotonic()
+
+    def _add(self, user_id: str, book_id: str) -> None:
+        books = self.user_books.setdefault(user_id, {})
+        if book_id in books:
+            return  # Repeat requests for the same book carry no new signal
+        for other_id in list(books)[-self.max_history:]:
+            self.co_counts[book_id][other_id] += 1
+            self.co_counts[other_id][book_id] += 1
+        books[book_id] = None
+        self.book_counts[book_id] += 1
+
+    def record(self, user_id, book_id) -> None:
+        """Apply a new exchange request"""
+        with self._lock:
+            self._add(str(user_id), str(book_id))
+
+    def requested_by(self, user_id) -> List[str]:
+        return list(self.user_books.get(str(user_id), ()))
+
+    def neighbours(self, book_id, k: int = COLLABORATIVE_NEIGHBOURS) -> List[Tuple[str, float]]:
+        """The k books most often co-requested with a book, by cosine similarity"""
+        book_id = str(book_id)
+        with self._lock:
+            row = list(self.co_counts.get(book_id, {}).items())
+            count = self.book_counts[book_id]
+            counts = self.book_counts
+            similarities = [
+                (other_id, co_count / math.sqrt(count * counts[other_id]))
+                for other_id, co_count in row
+            ]
+        return heapq.nlargest(k, similarities, key=lambda item: item[1])
+
+    async def ensure_loaded(self, client: httpx.AsyncClient, supabase_url: str, headers: Dict[str, str]) -> None:
+        """
+        Build the matrix from the book_request table on first use; once built,
+        a stale matrix is rebuilt in the background while callers keep using it
+        """
+        if self.is_stale:
+            await self._refresh.run(lambda: self._load(client, supabase_url, headers), wait=not self.loaded)
+
+    async def _load(self, client: httpx.AsyncClient, supabase_url: str, headers: Dict[str, str]) -> None:
+        rows: List[Dict[str, Any]] = []
+        while True:
+            try:
+                response = await client.get(
+                    f"{supabase_url}/rest/v1/book_request?select=from_user_id,book_id&order=created_at"
+                    f"&limit={COLLABORATIVE_PAGE_SIZE}&offset={len(rows)}",
+                    headers=headers
+                )
+            except httpx.HTTPError as e:
+                print(f"Error loading exchange history: {e}")
+                return
+            if response.status_code != 200:
+                print(f"Error loading exchange history: {response.text}")
+                return
+            page = response.json()
+            rows.extend(page)
+            if len(page) < COLLABORATIVE_PAGE_SIZE:
+                break
+
+        self.build(rows)
+        print(f"Co-request matrix built from {len(rows)} requests over {len(self)} books")
+
+
+# Shared per-process matrix, updated by exchange_service when a request is created
+co_requests = CoRequestMatrix()
+
+
+class CollaborativeRecommender(HttpClientHolder):
+    """Recommends books requested by people who requested the same books as the user"""
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        # The app's shared client, or one of our own created on first use (see aclose)
+        super().__init__(client)
+        # Supabase client configuration
+        self.supabase_url = SUPABASE_URL
+        self.supabase_key = SUPABASE_KEY
+        self.headers = {
+            "apikey": self.supabase_key,
+            "Authorization": f"Bearer {self.supabase_key}",
+            "Content-Type": "application/json"
+        }
+
+    async def get_recommendations(self, user_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Generate "people who requested this also requested" recommendations
+
+        Args:
+            user_id: The ID of the user to get recommendations for
+            limit: Maximum number of recommendations to return
+
+        Returns:
+            A list of recommended books with score and reason
+        """
+        return list(islice(await self.iter_recommendations(user_id), limit))
+
+    async def iter_recommendations(self, user_id: str) -> Iterator[Dict[str, Any]]:
+        """
+        Score books co-requested with the user's own requests and return them
+        as a stream in descending score order
+        """
+        await co_requests.ensure_loaded(self.client, self.supabase_url, self.headers)
+        requested = co_requests.requested_by(user_id)
+        if not requested:
+            return iter(())
+
+        scores = self.score_candidates(requested)
+        if not scores:
+            return iter(())
+
+        # Only available books the user doesn't own, from the catalog unless it could not be loaded
+        await book_catalog.ensure_loaded(self.client, self.supabase_url, self.headers)
+        if book_catalog.loaded:
+            return self.rank_from_catalog(user_id, requested, scores)
+
+        try:
+            rows = await fetch_rows_by_ids(
+                self.client,
+                f"{self.supabase_url}/rest/v1/books?select={','.join(BOOK_LIST_FIELDS)}"
+                f"&status=eq.available&owner_id=neq.{user_id}",
+                "id",
+                scores,
+                self.headers
+            )
+        except httpx.HTTPStatusError:
+            return iter(())
+        books = {str(book["id"]): book for book in rows}
+        return self.rank_books(scores, books, {})
+
+    def rank_from_catalog(self, user_id: str, requested: Optional[List[str]] = None,
+                          scores: Optional[Dict[str, Tuple[float, str]]] = None) -> Iterator[Dict[str, Any]]:
+        """Rank candidates against the in-memory catalog, without I/O (used by the precompute job)"""
+        if requested is None:
+            requested = co_requests.requested_by(user_id)
+        if scores is None:
+            scores = self.score_candidates(requested)
+        books = {book_id: book_catalog.get(book_id) for book_id in scores}
+        books = {
+            book_id: book for book_id, book in books.items()
+            if book and book.get("status") == "available" and book.get("owner_id") != user_id
+        }
+        titles = {book_id: (book_catalog.get(book_id) or {}).get("title") for book_id in requested}
+        return self.rank_books(scores, books, titles)
+
+    def score_candidates(self, requested: List[str]) -> Dict[str, Tuple[float, str]]:
+        """
+        Sum the similarity of each candidate to every book the user requested
+
+        Returns:
+            candidate book id -> (summed similarity, requested book contributing most)
+        """
+        requested_set = set(requested)
+        totals: Dict[str, float] = defaultdict(float)
+        strongest: Dict[str, Tuple[float, str]] = {}
+        for book_id in requested:
+            for other_id, similarity in co_requests.neighbours(book_id):
+                if other_id in requested_set:
+                    continue
+                totals[other_id] += similarity
+                if similarity > strongest.get(other_id, (0.0, ""))[0]:
+                    strongest[other_id] = (similarity, book_id)
+        return {book_id: (total, strongest[book_id][1]) for book_id, total in totals.items()}
+
+    def rank_books(self, scores: Dict[str, Tuple[float, str]], books: Dict[str, Dict[str, Any]],
+                   titles: Dict[str, Optional[str]]) -> Iterator[Dict[str, Any]]:
+        """Yield candidate books highest score first (ties by book id)"""
+        ranked = sorted(
+            (book_id for book_id in scores if book_id in books),
+            key=lambda book_id: (-scores[book_id][0], book_id)
+        )
+        for book_id in ranked:
+            total, because_of = scores[book_id]
+            book = dict(books[book_id])  # Catalog rows are shared; copy before annotating
+            book["score"] = min(1.0, total) * 100
+            title = titles.get(because_of)
+            book["reason"] = (
+                f"People who requested {title} also requested this" if title
+                else "Requested by readers with similar requests"
+            )
+            yield book
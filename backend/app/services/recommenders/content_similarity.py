@@ -0,0 +1,293 @@
+# app/services/recommenders/content_similarity.py
+
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+from array import array
+from collections import Counter
+import math
+import os
+import pickle
+import re
+import threading
+import zlib
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Number of neighbours precomputed per book
+SIMILAR_BOOKS_NEIGHBOURS: int = int(os.getenv("SIMILAR_BOOKS_NEIGHBOURS", "50"))
+# Highest-weighted terms kept in each book's vector
+SIMILAR_BOOKS_MAX_TERMS: int = int(os.getenv("SIMILAR_BOOKS_MAX_TERMS", "24"))
+# Terms held by more books than this are too common to score on: their idf
+# weight is low, and walking their postings would dominate the build
+SIMILAR_BOOKS_MAX_DF: int = int(os.getenv("SIMILAR_BOOKS_MAX_DF", "250"))
+# Where the rebuild job writes the index and the app loads it from at startup
+SIMILAR_BOOKS_INDEX_PATH: str = os.getenv("SIMILAR_BOOKS_INDEX_PATH", "data/similar_books.pkl")
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has he her his in is it its of on or "
+    "she that the their this to was were will with you your".split()
+)
+
+# Relative weight of each field's terms
+FIELD_WEIGHTS = {"title": 2.0, "author": 1.5, "genre": 1.0, "description": 1.0}
+
+NO_DOCS = np.empty(0, dtype=np.int32)
+NO_SCORES = np.empty(0, dtype=np.float32)
+
+
+def book_terms(book: Dict[str, Any]) -> Counter:
+    """Weighted term counts for a book; author and genre terms get their own namespace"""
+    terms: Counter = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        text = book.get(field)
+        if not text:
+            continue
+        if field == "genre":
+            terms[f"g:{text.lower()}"] += weight
+            continue
+        prefix = "a:" if field == "author" else ""
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            if len(token) > 1 and token not in STOPWORDS:
+                terms[prefix + token] += weight
+    return terms
+
+
+def _signature(terms: Counter) -> int:
+    """Stable (process-independent) fingerprint of a book's terms"""
+    return zlib.crc32(repr(sorted(terms.items())).encode())
+
+
+# Book writes arrive from threadpool workers; serialise index mutations
+_write_lock = threading.RLock()
+
+
+class ContentSimilarityIndex:
+    """
+    Sparse TF-IDF vectors over title, author, genre and description with a
+    precomputed top-N cosine neighbour table
+
+    Books are numbered documents. Each keeps its strongest terms as small
+    (term id, weight) arrays normalised to unit length, and every term has a
+    compact postings list of (document, weight). A book's neighbours are found
+    by gathering the postings of its terms and summing the weight products
+    with NumPy, then stored as (document, score) arrays so lookups are a
+    constant-time read.
+
+    Removed and edited books leave a tombstone that lookups skip, and books
+    added after a build use that build's idf values; both approximations are
+    cleared by the next rebuild.
+    """
+
+    def __init__(self, neighbours: int = SIMILAR_BOOKS_NEIGHBOURS, max_terms: int = SIMILAR_BOOKS_MAX_TERMS,
+                 max_df: int = SIMILAR_BOOKS_MAX_DF):
+        self.neighbour_count = neighbours
+        self.max_terms = max_terms
+        self.max_df = max_df
+        self.term_ids: Dict[str, int] = {}
+        self.df: Counter = Counter()
+        self.book_count = 0
+        # document -> book id, and the reverse for live books
+        self.ids: List[Optional[str]] = []
+        self.docs: Dict[str, int] = {}
+        self.alive = bytearray()
+        # book id -> hash of its weighted terms, to skip edits that leave the text unchanged
+        self.signatures: Dict[str, int] = {}
+        self.doc_terms: List[np.ndarray] = []
+        self.doc_weights: List[np.ndarray] = []
+        self.posting_docs: Dict[int, array] = {}
+        self.posting_weights: Dict[int, array] = {}
+        # document -> neighbour documents and cosine scores, most similar first
+        self.neighbour_docs: List[np.ndarray] = []
+        self.neighbour_scores: List[np.ndarray] = []
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def _term_id(self, term: str) -> int:
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            term_id = self.term_ids[term] = len(self.term_ids)
+        return term_id
+
+    def _vectorize(self, terms: Counter) -> Tuple[np.ndarray, np.ndarray]:
+        """Unit-length TF-IDF vector of a book's strongest terms"""
+        weighted = []
+        for term, count in terms.items():
+            term_id = self.term_ids[term]
+            idf = math.log((1 + self.book_count) / (1 + self.df[term_id])) + 1
+            weighted.append(((1 + math.log(count)) * idf, term_id))
+        if not weighted:
+            return NO_DOCS, NO_SCORES
+
+        weighted.sort(reverse=True)
+        weighted = weighted[:self.max_terms]
+        norm = math.sqrt(sum(weight * weight for weight, _ in weighted))
+        term_ids = np.array([term_id for _, term_id in weighted], dtype=np.int32)
+        weights = np.array([weight / norm for weight, _ in weighted], dtype=np.float32)
+        return term_ids, weights
+
+    def _new_doc(self, book_id: str, terms: Counter) -> int:
+        doc = len(self.ids)
+        self.ids.append(book_id)
+        self.docs[book_id] = doc
+        self.alive.append(1)
+        self.signatures[book_id] = _signature(terms)
+        self.doc_terms.append(NO_DOCS)
+        self.doc_weights.append(NO_SCORES)
+        self.neighbour_docs.append(NO_DOCS)
+        self.neighbour_scores.append(NO_SCORES)
+        return doc
+
+    def _add_postings(self, doc: int) -> None:
+        for term_id, weight in zip(self.doc_terms[doc].tolist(), self.doc_weights[doc].tolist()):
+            if term_id not in self.posting_docs:
+                self.posting_docs[term_id] = array("i")
+                self.posting_weights[term_id] = array("f")
+            self.posting_docs[term_id].append(doc)
+            self.posting_weights[term_id].append(weight)
+
+    def _scores(self, doc: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Cosine scores of every live book sharing a scorable term with `doc`"""
+        doc_parts = []
+        weight_parts = []
+        for term_id, weight in zip(self.doc_terms[doc].tolist(), self.doc_weights[doc].tolist()):
+            posting_docs = self.posting_docs.get(term_id)
+            if posting_docs is None or len(posting_docs) > self.max_df:
+                continue
+            # Views over the postings buffers; concatenate() below copies them, so
+            # no view outlives this call (an exported buffer cannot be appended to)
+            doc_parts.append(np.frombuffer(posting_docs, dtype=np.int32))
+            weight_parts.append(np.frombuffer(self.posting_weights[term_id], dtype=np.float32) * weight)
+        if not doc_parts:
+            return NO_DOCS, NO_SCORES
+
+        candidates, inverse = np.unique(np.concatenate(doc_parts), return_inverse=True)
+        del doc_parts
+        scores = np.bincount(inverse, weights=np.concatenate(weight_parts)).astype(np.float32)
+        alive = np.frombuffer(self.alive, dtype=np.bool_)
+        keep = alive[candidates] & (candidates != doc)
+        del alive
+        return candidates[keep], scores[keep]
+
+    def _top(self, candidates: np.ndarray, scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Best `neighbour_count` candidates, highest score first (ties by document)"""
+        if len(scores) > self.neighbour_count:
+            best = np.argpartition(-scores, self.neighbour_count - 1)[:self.neighbour_count]
+            candidates, scores = candidates[best], scores[best]
+        order = np.lexsort((candidates, -scores))
+        return candidates[order].astype(np.int32), scores[order]
+
+    def build(self, books: Iterable[Dict[str, Any]]) -> None:
+        """
+        Rebuild vectors, postings and the full neighbour table
+
+        The new table is built aside and swapped in, so lookups keep reading
+        the current one (or see ready=False before the first build) and book
+        writes are not held up for the length of the build.
+        """
+        fresh = ContentSimilarityIndex(self.neighbour_count, self.max_terms, self.max_df)
+        fresh._build(books)
+        with _write_lock:
+            self.__dict__.update(fresh.__dict__)
+
+    def _build(self, books: Iterable[Dict[str, Any]]) -> None:
+        all_terms = []
+        for book in books:
+            terms = book_terms(book)
+            self._new_doc(str(book["id"]), terms)
+            all_terms.append(terms)
+            for term in terms:
+                self.df[self._term_id(term)] += 1
+        self.book_count = len(all_terms)
+
+        for doc, terms in enumerate(all_terms):
+            self.doc_terms[doc], self.doc_weights[doc] = self._vectorize(terms)
+            self._add_postings(doc)
+
+        for doc in range(len(self.ids)):
+            self.neighbour_docs[doc], self.neighbour_scores[doc] = self._top(*self._scores(doc))
+        self.ready = True
+
+    def sync(self, books: List[Dict[str, Any]]) -> None:
+        """Bring a loaded snapshot up to date with the current set of books"""
+        current_ids = {str(book["id"]) for book in books}
+        for book_id in [book_id for book_id in self.docs if book_id not in current_ids]:
+            self.remove(book_id)
+        for book in books:
+            self.upsert(book)
+
+    def upsert(self, book: Dict[str, Any]) -> None:
+        """Add a new or edited listing and splice it into existing neighbour lists"""
+        with _write_lock:
+            book_id = str(book["id"])
+            terms = book_terms(book)
+            if self.signatures.get(book_id) == _signature(terms):
+                return  # e.g. a status change; the text and its neighbours are unchanged
+            self._remove(book_id)
+
+            doc = self._new_doc(book_id, terms)
+            self.book_count += 1
+            for term in terms:
+                self.df[self._term_id(term)] += 1
+            self.doc_terms[doc], self.doc_weights[doc] = self._vectorize(terms)
+            self._add_postings(doc)
+
+            candidates, scores = self._scores(doc)
+            self.neighbour_docs[doc], self.neighbour_scores[doc] = self._top(candidates, scores)
+
+            # The new book may belong in the neighbour lists of the books it resembles
+            for other, score in zip(candidates.tolist(), scores.tolist()):
+                other_docs = self.neighbour_docs[other]
+                other_scores = self.neighbour_scores[other]
+                if len(other_docs) >= self.neighbour_count and score <= other_scores[-1]:
+                    continue
+                position = int(np.searchsorted(-other_scores, -score, side="right"))
+                self.neighbour_docs[other] = np.insert(other_docs, position, doc)[:self.neighbour_count]
+                self.neighbour_scores[other] = np.insert(other_scores, position, score)[:self.neighbour_count]
+
+    def remove(self, book_id) -> None:
+        """Drop a listing; it stops appearing in lookups straight away"""
+        with _write_lock:
+            self._remove(str(book_id))
+
+    def _remove(self, book_id: str) -> None:
+        doc = self.docs.pop(book_id, None)
+        if doc is None:
+            return
+        self.signatures.pop(book_id, None)
+        self.alive[doc] = 0
+        self.book_count -= 1
+        self.neighbour_docs[doc] = NO_DOCS
+        self.neighbour_scores[doc] = NO_SCORES
+
+    def similar(self, book_id) -> List[Tuple[str, float]]:
+        """Precomputed neighbours of a book as (book id, cosine score), most similar first"""
+        doc = self.docs.get(str(book_id))
+        if doc is None:
+            return []
+        return [
+            (self.ids[other], score)
+            for other, score in zip(self.neighbour_docs[doc].tolist(), self.neighbour_scores[doc].tolist())
+            if self.alive[other]
+        ]
+
+    def save(self, path: str = SIMILAR_BOOKS_INDEX_PATH) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(self.__dict__, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str = SIMILAR_BOOKS_INDEX_PATH) -> None:
+        """Replace this index with one written by save() (only load files this app wrote)"""
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        with _write_lock:
+            self.__dict__.update(state)
+
+
+# Shared per-process index, kept current by the book write paths
+content_index = ContentSimilarityIndex()
@@ -0,0 +1,22 @@
+# app/services/recommenders/distance_engine.py
+
+import numpy as np
+
+EARTH_RADIUS_MILES = 3959  # Radius of the earth in miles
+
+
+def haversine_miles_batch(lat: float, lng: float, lat_rad: np.ndarray, lng_rad: np.ndarray,
+                          cos_lat: np.ndarray) -> np.ndarray:
+    """
+    Distances in miles from one origin (degrees) to many points in a single pass
+
+    The points are given in radians together with the cosine of their latitude,
+    so a caller scoring the same points repeatedly can compute that once.
+    """
+    origin_lat = np.radians(lat)
+    origin_lng = np.radians(lng)
+    sin_dlat = np.sin((lat_rad - origin_lat) * 0.5)
+    sin_dlng = np.sin((lng_rad - origin_lng) * 0.5)
+    a = sin_dlat * sin_dlat + np.cos(origin_lat) * cos_lat * sin_dlng * sin_dlng
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
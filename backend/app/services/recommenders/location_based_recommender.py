@@ -1,21 +1,28 @@
 # app/services/recommenders/location_based_recommender.py
 
-from typing import List, Dict, Any, Optional, Tuple
-import json
-import math
+from typing import List, Dict, Any, Optional, Tuple, Iterator
+from itertools import islice
 import httpx
 import os
 from dotenv import load_dotenv
+from app.core.bulk_fetch import fetch_rows_by_ids
+from app.core.http_client import HttpClientHolder
+from app.schemas.book import BOOK_LIST_FIELDS
+from app.services.book_catalog import book_catalog
+from app.services.recommenders.spatial_index import owner_index, parse_location, haversine_miles
+from app.services.recommenders.user_location_store import user_location_store
 
 load_dotenv()
 
 SUPABASE_URL: str = os.getenv("SUPABASE_URL")
 SUPABASE_KEY: str = os.getenv("SUPABASE_KEY")
 
-class LocationBasedRecommender:
+class LocationBasedRecommender(HttpClientHolder):
     """Recommends books based on proximity to the user"""
     
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        # The app's shared client, or one of our own created on first use (see aclose)
+        super().__init__(client)
         # Constants for Earth radius calculation
         self.EARTH_RADIUS_KM = 6371  # Radius of the earth in kilometers
         self.EARTH_RADIUS_MILES = 3959  # Radius of the earth in miles
@@ -41,117 +48,98 @@ class LocationBasedRecommender:
         Returns:
             A list of recommended books with distance information
         """
-        async with httpx.AsyncClient() as client:
-            # Get the user and their location
-            user_response = await client.get(
+        return list(islice(await self.iter_recommendations(user_id, max_distance), limit))
+    
+    async def iter_recommendations(self, user_id: int, max_distance: float = 50.0) -> Iterator[Dict[str, Any]]:
+        """
+        Look up the user's neighbours and return a lazy stream of their available
+        books, closest first
+        """
+        # Loading the owner index also loads the parsed location of every user
+        await owner_index.ensure_loaded(self.client, self.supabase_url, self.headers)
+        user_location = user_location_store.get(user_id)
+        
+        if not user_location:
+            # Not in the store (e.g. a location set through another worker); ask the database
+            user_response = await self.client.get(
                 f"{self.supabase_url}/rest/v1/users?id=eq.{user_id}&select=location",
                 headers=self.headers
             )
             
             if user_response.status_code != 200 or not user_response.json():
-                return []
+                return iter(())
             
             user_data = user_response.json()[0]
             user_location = self._parse_location(user_data.get("location"))
+        
+        if not user_location:
+            return iter(())
             
-            if not user_location:
-                return []
-                
-            user_lat, user_lng = user_location
-            
-            # Get all owners with location information
-            owners_response = await client.get(
-                f"{self.supabase_url}/rest/v1/users?id=neq.{user_id}&select=id,location",
-                headers=self.headers
-            )
-            
-            if owners_response.status_code != 200:
-                return []
-                
-            owners = owners_response.json()
-            
-            # Filter owners with valid location and calculate distances
-            owner_distances = {}
-            for owner in owners:
-                owner_location = self._parse_location(owner.get("location"))
-                if not owner_location:
-                    continue
-                    
-                owner_lat, owner_lng = owner_location
-                distance = self._calculate_distance(user_lat, user_lng, owner_lat, owner_lng)
-                
-                if distance <= max_distance:
-                    owner_distances[owner["id"]] = distance
-            
-            if not owner_distances:
-                return []
-                
-            # Get all available books from owners within distance
-            owner_ids = list(owner_distances.keys())
+        user_lat, user_lng = user_location
+        
+        # Look up nearby owners in the spatial index instead of scanning every user;
+        # they come back ordered by distance
+        nearby_owners = owner_index.query_radius(user_lat, user_lng, max_distance, exclude_id=user_id)
+        
+        if not nearby_owners:
+            return iter(())
             
-            # Build a query for books from these owners
-            # Note: This is a simplification. Supabase may require multiple queries 
-            # if there are many owner IDs, or you might need to use a more complex filter
-            books_response = await client.get(
-                f"{self.supabase_url}/rest/v1/books?is_available=eq.true&owner_id=in.({','.join(map(str, owner_ids))})",
-                headers=self.headers
+        # Get all available books from owners within distance
+        await book_catalog.ensure_loaded(self.client, self.supabase_url, self.headers)
+        if book_catalog.loaded:
+            return self.rank_books(nearby_owners)
+        
+        owner_ids = [owner_id for owner_id, _ in nearby_owners]
+        
+        # Dense areas can have thousands of owners, so the owner_id IN list is
+        # split into bounded chunks fetched concurrently
+        try:
+            books = await fetch_rows_by_ids(
+                self.client,
+                f"{self.supabase_url}/rest/v1/books?select={','.join(BOOK_LIST_FIELDS)}&status=eq.available",
+                "owner_id",
+                owner_ids,
+                self.headers
             )
+        except httpx.HTTPStatusError:
+            return iter(())
             
-            if books_response.status_code != 200:
-                return []
-                
-            books = books_response.json()
-            
-            # Add distance information to each book
+        return self.rank_books(nearby_owners, books)
+    
+    def rank_books(self, nearby_owners: List[Tuple[str, float]],
+                   books: Optional[List[Dict[str, Any]]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the available books of nearby owners, closest first
+        
+        Owners arrive already ordered by distance, so books are emitted owner by
+        owner rather than sorted. Books are taken from the catalog unless an
+        explicit list (e.g. from a REST fallback) is given.
+        """
+        books_by_owner: Dict[str, List[Dict[str, Any]]] = {}
+        if books is not None:
             for book in books:
-                owner_id = book["owner_id"]
-                distance = owner_distances.get(owner_id, float('inf'))
+                books_by_owner.setdefault(book["owner_id"], []).append(book)
+        
+        for owner_id, distance in nearby_owners:
+            if books is None:
+                owner_books = book_catalog.find(owner_id=owner_id, status="available")
+            else:
+                owner_books = books_by_owner.get(owner_id, [])
+            
+            for book in owner_books:
+                # Add distance information to each book
+                book = dict(book)  # Catalog rows are shared; copy before annotating
                 book["distance"] = distance
                 book["score"] = max(0, 100 - (distance * 2))  # Score inversely proportional to distance
-            
-            # Sort by distance (closest first) and return top results
-            books.sort(key=lambda x: x["distance"])
-            return books[:limit]
+                yield book
     
     def _parse_location(self, location_data) -> Optional[Tuple[float, float]]:
         """Parse location data to extract coordinates"""
-        if not location_data:
-            return None
-            
-        # Handle string format (JSON)
-        if isinstance(location_data, str):
-            try:
-                location_dict = json.loads(location_data)
-            except json.JSONDecodeError:
-                return None
-        else:
-            location_dict = location_data
-            
-        # Extract latitude and longitude
-        lat = location_dict.get("latitude")
-        lng = location_dict.get("longitude")
-        
-        if lat is None or lng is None:
-            return None
-            
-        return float(lat), float(lng)
+        return parse_location(location_data)
     
     def _calculate_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """
         Calculate distance between two coordinates using the Haversine formula
         Returns distance in miles
         """
-        # Convert latitude and longitude from degrees to radians
-        lat1_rad = math.radians(lat1)
-        lon1_rad = math.radians(lon1)
-        lat2_rad = math.radians(lat2)
-        lon2_rad = math.radians(lon2)
-        
-        # Haversine formula
-        dlon = lon2_rad - lon1_rad
-        dlat = lat2_rad - lat1_rad
-        a = math.sin(dlat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon/2)**2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-        distance = self.EARTH_RADIUS_MILES * c
-        
-        return distance
\ No newline at end of file
+        return haversine_miles(lat1, lon1, lat2, lon2)
\ No newline at end of file
@@ -1,14 +1,42 @@
 # app/services/recommenders/recommendation_diversifier.py
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from collections import defaultdict
+import heapq
+import os
+import time
+import numpy as np
+from dotenv import load_dotenv
+from app.services.recommenders.genre_based_recommender import GENRE_IDS, genre_similarity_matrix
+from app.services.recommenders.content_similarity import content_index
+
+load_dotenv()
+
+# "heuristic" (genre quota penalties) or "mmr" (Maximal Marginal Relevance)
+RECOMMENDATION_DIVERSITY_MODE: str = os.getenv("RECOMMENDATION_DIVERSITY_MODE", "heuristic")
+# MMR trade-off: 1.0 ranks purely by relevance, 0.0 purely by novelty
+MMR_LAMBDA: float = float(os.getenv("MMR_LAMBDA", "0.7"))
+# Share of item similarity taken from the content index, when it is loaded
+MMR_CONTENT_WEIGHT: float = float(os.getenv("MMR_CONTENT_WEIGHT", "0.3"))
+
+DIVERSITY_MODES = ("heuristic", "mmr")
 
 class RecommendationDiversifier:
     """Ensures diversity in book recommendations"""
     
+    def __init__(self, mode: str = RECOMMENDATION_DIVERSITY_MODE, mmr_lambda: float = MMR_LAMBDA,
+                 content_weight: float = MMR_CONTENT_WEIGHT):
+        if mode not in DIVERSITY_MODES:
+            raise ValueError(f"Unknown diversity mode: {mode}")
+        self.mode = mode
+        self.mmr_lambda = mmr_lambda
+        self.content_weight = content_weight
+    
     def ensure_diversity(self, recommendations: List[Dict[str, Any]], 
                          diversity_factor: float = 0.3,
-                         min_per_category: int = 1) -> List[Dict[str, Any]]:
+                         min_per_category: int = 1,
+                         limit: Optional[int] = None,
+                         mode: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Apply diversity rules to ensure recommendations aren't too similar
         
@@ -18,10 +46,20 @@ class RecommendationDiversifier:
                               Higher values promote more diversity
             min_per_category: Minimum number of items to include from each category
                               when possible
+            limit: Number of items the caller needs; MMR stops selecting there
+            mode: Override the configured mode ("heuristic" or "mmr")
             
         Returns:
             Re-ranked list of recommendations with better diversity
         """
+        if (mode or self.mode) == "mmr":
+            return self.mmr_rerank(recommendations, limit)
+        return self.heuristic_rerank(recommendations, diversity_factor, min_per_category)
+    
+    def heuristic_rerank(self, recommendations: List[Dict[str, Any]],
+                         diversity_factor: float = 0.3,
+                         min_per_category: int = 1) -> List[Dict[str, Any]]:
+        """Penalise over-represented genres and guarantee one slot per genre"""
         if not recommendations or len(recommendations) <= 5:
             return recommendations  # Not enough items to diversify
             
@@ -88,30 +126,105 @@ class RecommendationDiversifier:
             else:
                 remaining_books.append(book)
         
-        # Second pass: fill the rest based on score
+        # Second pass: fill the rest based on score. Both lists were filled from
+        # the score-sorted list, so they are already in order and a linear merge
+        # replaces re-sorting them for presentation
         remaining_slots = total_recommendations - len(final_recommendations)
-        if remaining_slots > 0:
-            # Sort remaining books by adjusted score
-            remaining_books.sort(key=lambda x: x.get("score", 0), reverse=True)
-            final_recommendations.extend(remaining_books[:remaining_slots])
+        return list(heapq.merge(
+            final_recommendations,
+            remaining_books[:remaining_slots],
+            key=lambda x: -x.get("score", 0)
+        ))
+
+    def similarity_matrix(self, recommendations: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Pairwise (n x n) similarity of the recommended books
         
-        # Re-sort the final recommendations by score for presentation
-        final_recommendations.sort(key=lambda x: x.get("score", 0), reverse=True)
+        Genre similarity comes from the genre table; genres outside it only
+        match themselves. When the content index is loaded, its neighbour
+        scores are blended in with weight content_weight.
+        """
+        genres = [book.get("genre", "Unknown") for book in recommendations]
+        genre_ids = np.array([GENRE_IDS.get(genre, -1) for genre in genres], dtype=np.intp)
+        known = genre_ids >= 0
         
-        return final_recommendations
+        similarity = np.zeros((len(genres), len(genres)))
+        similarity[np.ix_(known, known)] = genre_similarity_matrix()[np.ix_(genre_ids[known], genre_ids[known])]
+        if not known.all():
+            labels = np.array(genres, dtype=object)
+            unknown = ~known
+            similarity[np.ix_(unknown, unknown)] = labels[unknown][:, None] == labels[unknown][None, :]
+        
+        if self.content_weight > 0 and content_index.ready:
+            positions = {str(book.get("id")): i for i, book in enumerate(recommendations)}
+            content = np.zeros_like(similarity)
+            for i, book in enumerate(recommendations):
+                for other_id, score in content_index.similar(book.get("id")):
+                    j = positions.get(other_id)
+                    if j is not None:
+                        content[i, j] = content[j, i] = max(content[i, j], score)
+            np.fill_diagonal(content, 1.0)
+            similarity = (1 - self.content_weight) * similarity + self.content_weight * content
+        return similarity
     
-    def calculate_diversity_metrics(self, recommendations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def mmr_rerank(self, recommendations: List[Dict[str, Any]], limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Re-rank with Maximal Marginal Relevance
+        
+        Each step picks the item maximising
+            lambda * relevance - (1 - lambda) * max similarity to the items already picked
+        with relevance being the score scaled to [0, 1]. The running maximum
+        similarity is one vectorised update per step, so selecting k of n items
+        costs O(k * n). Selected items are returned as copies whose score is
+        the marginal value mapped onto 0-100 (it never increases from one pick
+        to the next, so later stages that sort by score keep the MMR order);
+        the input dicts are left untouched.
+        """
+        if not recommendations:
+            return []
+        
+        k = len(recommendations) if limit is None else min(limit, len(recommendations))
+        scores = np.array([book.get("score", 0) for book in recommendations], dtype=np.float64)
+        top_score = scores.max()
+        relevance = scores / top_score if top_score > 0 else np.zeros_like(scores)
+        similarity = self.similarity_matrix(recommendations)
+        
+        weight = self.mmr_lambda
+        base = weight * relevance
+        max_similarity = np.zeros(len(recommendations))
+        available = np.ones(len(recommendations), dtype=bool)
+        
+        reranked = []
+        for _ in range(k):
+            marginal = np.where(available, base - (1 - weight) * max_similarity, -np.inf)
+            pick = int(marginal.argmax())  # First (highest-scored) item wins ties
+            available[pick] = False
+            np.maximum(max_similarity, similarity[pick], out=max_similarity)
+            
+            book = dict(recommendations[pick])
+            book["original_score"] = book.get("score", 0)
+            book["score"] = (marginal[pick] + (1 - weight)) * 100
+            reranked.append(book)
+        return reranked
+    
+    def calculate_diversity_metrics(self, recommendations: List[Dict[str, Any]],
+                                    compare_modes: bool = False,
+                                    limit: Optional[int] = None) -> Dict[str, Any]:
         """
         Calculate diversity metrics for a set of recommendations
         
         Args:
             recommendations: List of book recommendations
+            compare_modes: Also re-rank copies of the list with every diversity
+                           mode and report the metrics, mean relevance and
+                           latency of each mode's top `limit` items
+            limit: Number of items the compared modes select
             
         Returns:
             Dictionary with diversity metrics
         """
         if not recommendations:
-            return {"diversity_score": 0, "unique_genres": 0, "genre_distribution": {}}
+            return {"diversity_score": 0, "unique_genres": 0, "genre_distribution": {}, "intra_list_similarity": 0}
             
         # Count genres
         genre_counts = defaultdict(int)
@@ -141,8 +254,34 @@ class RecommendationDiversifier:
         # Convert to diversity score (1 is perfect diversity, 0 is all the same genre)
         diversity_score = 1 - distribution_deviation
         
-        return {
+        # Mean pairwise similarity between distinct items (lower is more diverse)
+        if total_books > 1:
+            similarity = self.similarity_matrix(recommendations)
+            intra_list_similarity = (similarity.sum() - np.trace(similarity)) / (total_books * (total_books - 1))
+        else:
+            intra_list_similarity = 0.0
+        
+        metrics = {
             "diversity_score": diversity_score,
             "unique_genres": unique_genres,
-            "genre_distribution": genre_distribution
-        }
\ No newline at end of file
+            "genre_distribution": genre_distribution,
+            "intra_list_similarity": float(intra_list_similarity)
+        }
+        
+        if compare_modes:
+            metrics["modes"] = {}
+            for mode in DIVERSITY_MODES:
+                candidates = [dict(book) for book in recommendations]  # The heuristic edits its input
+                start = time.perf_counter()
+                reranked = self.ensure_diversity(candidates, limit=limit, mode=mode)[:limit]
+                latency = time.perf_counter() - start
+                
+                mode_metrics = self.calculate_diversity_metrics(reranked)
+                mode_metrics["mean_relevance"] = (
+                    sum(book.get("original_score", book.get("score", 0)) for book in reranked) / len(reranked)
+                    if reranked else 0
+                )
+                mode_metrics["latency_ms"] = latency * 1000
+                metrics["modes"][mode] = mode_metrics
+        
+        return metrics
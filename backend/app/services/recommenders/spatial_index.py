@@ -0,0 +1,192 @@
+# app/services/recommenders/spatial_index.py
+
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+import math
+import os
+import time
+import httpx
+import numpy as np
+from dotenv import load_dotenv
+from app.core.refresh import BackgroundRefresh
+from app.services.recommenders.distance_engine import EARTH_RADIUS_MILES, haversine_miles_batch
+from app.services.recommenders.user_location_store import UserLocationStore, user_location_store, parse_location
+
+load_dotenv()
+
+MILES_PER_DEGREE_LAT = 69.05
+
+# Size of one grid cell in degrees (0.5 degrees is roughly 35 miles of latitude)
+OWNER_INDEX_CELL_DEGREES: float = float(os.getenv("OWNER_INDEX_CELL_DEGREES", "0.5"))
+# Seconds before the index is rebuilt from the users table (profile edits made in
+# other worker processes only become visible after a rebuild)
+OWNER_INDEX_TTL: float = float(os.getenv("OWNER_INDEX_TTL", "900"))
+
+
+def haversine_miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two coordinates in miles"""
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    dlat = lat2_rad - lat1_rad
+    dlon = math.radians(lon2 - lon1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2) ** 2
+    return EARTH_RADIUS_MILES * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+class OwnerSpatialIndex:
+    """
+    Grid index over book owner coordinates.
+
+    Owners are bucketed into fixed-size lat/lng cells, so a radius query only
+    visits the cells overlapping the search circle's bounding box and computes
+    exact distances for the owners inside them, instead of scanning every user.
+
+    The index holds no per-owner Python objects: it points into a
+    UserLocationStore's arrays. Store rows are sorted by cell, so each cell is
+    a contiguous slice of `rows` found by a binary search of `cell_keys`, 4
+    bytes per owner on top of the store. Profile edits made since the build
+    are read from the store's overlay at query time.
+    """
+
+    def __init__(self, cell_degrees: float = OWNER_INDEX_CELL_DEGREES, store: Optional[UserLocationStore] = None):
+        self.cell_degrees = cell_degrees
+        self.columns = int(math.ceil(360 / cell_degrees))
+        self.min_row = int(math.floor(-90 / cell_degrees))
+        self.store = store if store is not None else user_location_store
+        # Store rows ordered by cell; the i-th cell is rows[cell_starts[i]:cell_starts[i + 1]]
+        self.rows = np.empty(0, dtype=np.int32)
+        self.cell_keys = np.empty(0, dtype=np.int64)
+        self.cell_starts = np.zeros(1, dtype=np.int64)
+        self.loaded_at: Optional[float] = None
+        self._refresh = BackgroundRefresh("owner spatial index")
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    @property
+    def is_stale(self) -> bool:
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > OWNER_INDEX_TTL
+
+    def _cell_key(self, row: int, col: int) -> int:
+        return (row - self.min_row) * self.columns + col
+
+    def build(self, owners: Iterable[Dict[str, Any]]) -> None:
+        """Replace the store and index contents with the given user rows (id, location)"""
+        self.store.build(owners)
+        self.build_from_store()
+
+    def build_from_store(self) -> None:
+        """Bucket the store's rows into cells; rerun whenever the store's arrays are replaced"""
+        coords = np.asarray(self.store.coords, dtype=np.float64)
+        rows = np.floor(coords[:, 0] / self.cell_degrees).astype(np.int64)
+        cols = np.floor((coords[:, 1] + 180) / self.cell_degrees).astype(np.int64) % self.columns
+        keys = (rows - self.min_row) * self.columns + cols
+        order = np.argsort(keys, kind="stable")
+        self.rows = order.astype(np.int32)
+        self.cell_keys, starts = np.unique(keys[order], return_index=True)
+        self.cell_starts = np.append(starts, len(order)).astype(np.int64)
+        self.loaded_at = time.monotonic()
+
+    def get(self, owner_id: str) -> Optional[Tuple[float, float]]:
+        return self.store.get(owner_id)
+
+    def _candidate_cells(self, lat: float, lng: float, radius: float) -> Iterable[Tuple[int, int]]:
+        dlat = radius / MILES_PER_DEGREE_LAT
+        row_min = int(math.floor((lat - dlat) / self.cell_degrees))
+        row_max = int(math.floor((lat + dlat) / self.cell_degrees))
+
+        # Longitude degrees shrink towards the poles, so widen the box using the
+        # latitude closest to a pole that the circle can reach
+        max_abs_lat = min(90.0, abs(lat) + dlat)
+        cos_lat = math.cos(math.radians(max_abs_lat))
+        if cos_lat < 1e-6 or radius / (MILES_PER_DEGREE_LAT * cos_lat) >= 180:
+            columns: Iterable[int] = range(self.columns)
+        else:
+            dlng = radius / (MILES_PER_DEGREE_LAT * cos_lat)
+            col_min = int(math.floor((lng - dlng + 180) / self.cell_degrees))
+            col_max = int(math.floor((lng + dlng + 180) / self.cell_degrees))
+            columns = {col % self.columns for col in range(col_min, col_max + 1)}
+
+        for row in range(row_min, row_max + 1):
+            for col in columns:
+                yield row, col
+
+    def _candidate_rows(self, lat: float, lng: float, radius: float) -> np.ndarray:
+        """Store rows in the cells the search circle can reach"""
+        keys = np.fromiter(
+            (self._cell_key(row, col) for row, col in self._candidate_cells(lat, lng, radius)), dtype=np.int64
+        )
+        positions = np.searchsorted(self.cell_keys, keys)
+        found = positions < len(self.cell_keys)
+        found[found] = self.cell_keys[positions[found]] == keys[found]
+        slices = [self.rows[self.cell_starts[i]:self.cell_starts[i + 1]] for i in positions[found].tolist()]
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.int32)
+
+    def query_radius(self, lat: float, lng: float, radius: float,
+                     exclude_id: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        Find owners within `radius` miles of a point
+
+        Returns:
+            (owner_id, distance) pairs ordered by distance (closest first)
+        """
+        store = self.store
+        candidates = self._candidate_rows(lat, lng, radius)
+        # Wide searches touch most cells; a straight pass over the arrays is cheaper
+        if len(candidates) * 2 > len(self.rows):
+            candidates = np.arange(len(self.rows))
+            coords = store.coords
+        else:
+            coords = store.coords[candidates]
+
+        lat_rad = np.radians(coords[:, 0].astype(np.float64))
+        lng_rad = np.radians(coords[:, 1].astype(np.float64))
+        distances = haversine_miles_batch(lat, lng, lat_rad, lng_rad, np.cos(lat_rad))
+        inside = distances <= radius
+        rows = candidates[inside]
+        distances = distances[inside]
+
+        # Users edited since the build answer from the overlay, not their old row
+        overlay = list(store.overlay.items())
+        if overlay:
+            moved = [store.position(user_id) for user_id, _ in overlay]
+            keep = ~np.isin(rows, [row for row in moved if row is not None])
+            rows = rows[keep]
+            distances = distances[keep]
+
+        order = np.argsort(distances, kind="stable")
+        owners = list(zip(store.user_ids(rows[order]), distances[order].tolist()))
+        if overlay:
+            for user_id, location in overlay:
+                if location:
+                    distance = haversine_miles(lat, lng, *location)
+                    if distance <= radius:
+                        owners.append((user_id, distance))
+            owners.sort(key=lambda owner: owner[1])
+        return [(owner_id, distance) for owner_id, distance in owners if owner_id != exclude_id]
+
+    async def ensure_loaded(self, client: httpx.AsyncClient, supabase_url: str, headers: Dict[str, str]) -> None:
+        """
+        Build the index from the user location store on first use; once built,
+        a stale index is rebuilt in the background while queries use the current one
+        """
+        if self.is_stale:
+            await self._refresh.run(lambda: self._load(client, supabase_url, headers), wait=not self.loaded)
+
+    async def _load(self, client: httpx.AsyncClient, supabase_url: str, headers: Dict[str, str]) -> None:
+        # Reload the store in this task rather than its own: the index points
+        # into its arrays, so it is rebuilt in the same step they are replaced
+        if self.store.is_stale:
+            await self.store.reload(client, supabase_url, headers)
+        if not self.store.loaded:
+            return
+        self.build_from_store()
+        print(f"Owner spatial index built with {len(self)} owners")
+
+
+# Shared per-process index over the shared location store, which user_service
+# patches when a profile location changes
+owner_index = OwnerSpatialIndex()
@@ -0,0 +1,280 @@
+# app/services/recommenders/user_location_store.py
+
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+import json
+import os
+import time
+import uuid
+import httpx
+import numpy as np
+from dotenv import load_dotenv
+from app.core.refresh import BackgroundRefresh
+
+load_dotenv()
+
+# Seconds before locations are reloaded from the users table
+USER_LOCATION_STORE_TTL: float = float(os.getenv("USER_LOCATION_STORE_TTL", "900"))
+# Directory for the memory-mapped copy shared by worker processes; empty disables it
+USER_LOCATION_STORE_PATH: str = os.getenv("USER_LOCATION_STORE_PATH", "")
+USER_LOCATION_PAGE_SIZE: int = int(os.getenv("USER_LOCATION_PAGE_SIZE", "1000"))
+
+HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+# Positions of the 32 hex digits in a 36-character UUID string
+UUID_DIGIT_COLUMNS = [column for column in range(36) if column not in (8, 13, 18, 23)]
+
+
+def parse_location(location_data) -> Optional[Tuple[float, float]]:
+    """Parse location data (JSON string or dict) to extract coordinates"""
+    if not location_data:
+        return None
+
+    # Handle string format (JSON)
+    if isinstance(location_data, str):
+        try:
+            location_dict = json.loads(location_data)
+        except json.JSONDecodeError:
+            return None
+    else:
+        location_dict = location_data
+
+    if not isinstance(location_dict, dict):
+        return None
+
+    # Extract latitude and longitude
+    lat = location_dict.get("latitude")
+    lng = location_dict.get("longitude")
+
+    if lat is None or lng is None:
+        return None
+
+    try:
+        return float(lat), float(lng)
+    except (TypeError, ValueError):
+        return None
+
+
+class UserLocationStore:
+    """
+    Parsed user coordinates in compact parallel arrays
+
+    User ids are kept sorted as 16-byte UUID keys (or fixed-width UTF-8 when
+    some ids are not UUIDs) next to a float32 (n, 2) lat/lng array, about 24
+    bytes per user instead of a dict entry holding a JSON string. Lookups are
+    a binary search.
+
+    The arrays can be saved to disk and memory-mapped read-only, so every
+    worker process shares one copy. Profile edits made after loading go to a
+    small per-process overlay. A reload drops the edits made before its rows
+    were read, which the rows already contain; edits made while it was
+    running stay in the overlay.
+    """
+
+    def __init__(self, path: str = USER_LOCATION_STORE_PATH, ttl: float = USER_LOCATION_STORE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.uuid_keys = True
+        self.ids = np.empty(0, dtype="S16")
+        self.coords = np.empty((0, 2), dtype=np.float32)
+        # user id -> coordinates (None for a removed location), newer than the arrays
+        self.overlay: Dict[str, Optional[Tuple[float, float]]] = {}
+        # user id -> wall-clock time of the overlay edit
+        self.edited_at: Dict[str, float] = {}
+        # Wall-clock time the arrays' rows were read from the users table
+        self.read_at: Optional[float] = None
+        self.loaded_at: Optional[float] = None
+        self._refresh = BackgroundRefresh("user location store")
+
+    def __len__(self) -> int:
+        count = len(self.ids)
+        for user_id, location in self.overlay.items():
+            count += (1 if location else 0) - (1 if self.position(user_id) is not None else 0)
+        return count
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    @property
+    def is_stale(self) -> bool:
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > self.ttl
+
+    def _key(self, user_id: str) -> Optional[bytes]:
+        if not self.uuid_keys:
+            return str(user_id).encode()
+        try:
+            return uuid.UUID(str(user_id)).bytes
+        except ValueError:
+            return None
+
+    def build(self, users: Iterable[Dict[str, Any]], read_at: Optional[float] = None) -> None:
+        """
+        Replace the contents with the given user rows (id, location), parsing each once
+
+        read_at is when the rows were read; overlay edits made before then are
+        in them and are dropped. Without it every edit is dropped.
+        """
+        user_ids = []
+        coords = []
+        for user in users:
+            location = parse_location(user.get("location"))
+            if location:
+                user_ids.append(str(user["id"]))
+                coords.append(location)
+
+        self.uuid_keys = True
+        keys = []
+        for user_id in user_ids:
+            key = self._key(user_id)
+            if key is None:
+                self.uuid_keys = False
+                keys = [user_id.encode() for user_id in user_ids]
+                break
+            keys.append(key)
+
+        width = max((len(key) for key in keys), default=16)
+        ids = np.array(keys, dtype=f"S{width}")
+        coord_array = np.array(coords, dtype=np.float32).reshape(-1, 2)
+        order = np.argsort(ids, kind="stable")
+        self.ids = ids[order]
+        self.coords = coord_array[order]
+        self.read_at = time.time() if read_at is None else read_at
+        self._drop_edits_before(self.read_at)
+        self.loaded_at = time.monotonic()
+
+    def _drop_edits_before(self, read_at: float) -> None:
+        # New dicts rather than deletes: queries on worker threads may be iterating the overlay
+        keep = [user_id for user_id, edited_at in self.edited_at.items() if edited_at >= read_at]
+        self.overlay = {user_id: self.overlay[user_id] for user_id in keep}
+        self.edited_at = {user_id: self.edited_at[user_id] for user_id in keep}
+
+    def position(self, user_id: str) -> Optional[int]:
+        """Row of a user in the arrays (overlay edits aside), or None"""
+        key = self._key(user_id)
+        if key is None or not len(self.ids):
+            return None
+        position = int(np.searchsorted(self.ids, key))
+        if position < len(self.ids) and self.ids[position] == key.rstrip(b"\0"):
+            return position
+        return None
+
+    def get(self, user_id) -> Optional[Tuple[float, float]]:
+        user_id = str(user_id)
+        if user_id in self.overlay:
+            return self.overlay[user_id]
+        position = self.position(user_id)
+        if position is None:
+            return None
+        lat, lng = self.coords[position].tolist()
+        return lat, lng
+
+    def update(self, user_id, location_data) -> None:
+        """
+        Record a profile write once the users table has it; unparseable
+        locations remove the user
+        """
+        user_id = str(user_id)
+        self.edited_at[user_id] = time.time()
+        self.overlay[user_id] = parse_location(location_data)
+
+    def user_ids(self, rows: Iterable[int]) -> List[str]:
+        """User ids of the given array rows"""
+        keys = self.ids[np.asarray(rows, dtype=np.intp)]
+        if not self.uuid_keys:
+            return [key.decode() for key in keys.tolist()]
+        # Format every UUID at once: hex digits laid out around the dashes
+        raw = np.frombuffer(np.ascontiguousarray(keys, dtype="S16").tobytes(), dtype=np.uint8).reshape(-1, 16)
+        text = np.full((len(raw), 36), ord("-"), dtype=np.uint8)
+        text[:, UUID_DIGIT_COLUMNS] = HEX_DIGITS[np.stack([raw >> 4, raw & 15], axis=-1).reshape(-1, 32)]
+        return text.view("S36").ravel().astype("U36").tolist()
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Write the arrays (overlay excluded) as .npy files that load() can memory-map"""
+        path = path or self.path
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"uuid_keys": self.uuid_keys, "users": len(self.ids), "read_at": self.read_at}, f)
+        for name, array in (("ids", self.ids), ("coords", self.coords)):
+            tmp_path = os.path.join(path, f"{name}.tmp.npy")
+            np.save(tmp_path, array)
+            os.replace(tmp_path, os.path.join(path, f"{name}.npy"))
+
+    def load(self, path: Optional[str] = None, mmap: bool = True) -> None:
+        """Map (or read) arrays written by save()"""
+        path = path or self.path
+        mmap_mode = "r" if mmap else None
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        ids = np.load(os.path.join(path, "ids.npy"), mmap_mode=mmap_mode)
+        coords = np.load(os.path.join(path, "coords.npy"), mmap_mode=mmap_mode)
+        if len(ids) != meta["users"] or len(coords) != meta["users"]:
+            raise ValueError(f"Inconsistent user location files in {path}")
+        self.uuid_keys = meta["uuid_keys"]
+        self.ids = ids
+        self.coords = coords
+        # Copies saved without a read time keep every edit until the next reload
+        self.read_at = meta.get("read_at") or 0.0
+        self._drop_edits_before(self.read_at)
+        self.loaded_at = time.monotonic()
+
+    def _fresh_file(self) -> bool:
+        """A saved copy exists and was written within the TTL (by any process)"""
+        try:
+            age = time.time() - os.path.getmtime(os.path.join(self.path, "coords.npy"))
+        except OSError:
+            return False
+        return age < self.ttl
+
+    async def ensure_loaded(self, client: httpx.AsyncClient, supabase_url: str, headers: Dict[str, str]) -> None:
+        """
+        Load locations on first use; once loaded, stale locations are reloaded
+        in the background while callers keep reading the current arrays
+        """
+        if self.is_stale:
+            await self._refresh.run(lambda: self.reload(client, supabase_url, headers), wait=not self.loaded)
+
+    async def reload(self, client: httpx.AsyncClient, supabase_url: str, headers: Dict[str, str]) -> None:
+        """Replace the arrays from a fresh saved copy, or else from the users table"""
+        if self.path and self._fresh_file():
+            try:
+                self.load()
+                print(f"User location store mapped from {self.path} with {len(self.ids)} users")
+                return
+            except (OSError, ValueError) as e:
+                # Another worker may be mid-write; fall back to the database
+                print(f"Error mapping user location store: {e}")
+
+        # Edits recorded from here on may be missing from the pages read below
+        read_at = time.time()
+        # Page through the table; PostgREST caps the rows returned per request
+        users: List[Dict[str, Any]] = []
+        while True:
+            try:
+                response = await client.get(
+                    f"{supabase_url}/rest/v1/users?location=not.is.null&select=id,location&order=id"
+                    f"&limit={USER_LOCATION_PAGE_SIZE}&offset={len(users)}",
+                    headers=headers
+                )
+            except httpx.HTTPError as e:
+                print(f"Error loading user locations: {e}")
+                return
+            if response.status_code != 200:
+                print(f"Error loading user locations: {response.text}")
+                return
+            page = response.json()
+            users.extend(page)
+            if len(page) < USER_LOCATION_PAGE_SIZE:
+                break
+
+        self.build(users, read_at)
+        print(f"User location store loaded with {len(self.ids)} users")
+
+        if self.path:
+            try:
+                self.save()
+                self.load()  # Share the file's pages instead of keeping a private copy
+            except OSError as e:
+                print(f"Error saving user location store: {e}")
+
+
+# Shared per-process store, patched by user_service when a profile location changes
+user_location_store = UserLocationStore()
@@ -0,0 +1,224 @@
+# app/services/search_index.py
+
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+from collections import Counter, defaultdict
+import asyncio
+import heapq
+import math
+import os
+import re
+import threading
+import httpx
+from dotenv import load_dotenv
+from app.core.refresh import BackgroundRefresh
+from app.services.book_catalog import BookCatalog
+from app.services.recommenders.content_similarity import STOPWORDS
+
+load_dotenv()
+
+# BM25 term-frequency saturation and length normalisation
+SEARCH_BM25_K1: float = float(os.getenv("SEARCH_BM25_K1", "1.2"))
+SEARCH_BM25_B: float = float(os.getenv("SEARCH_BM25_B", "0.75"))
+# Lowest trigram similarity for a query word to match an indexed word it isn't equal to
+SEARCH_TRIGRAM_THRESHOLD: float = float(os.getenv("SEARCH_TRIGRAM_THRESHOLD", "0.35"))
+# Indexed words a misspelt query word may expand to
+SEARCH_FUZZY_EXPANSIONS: int = int(os.getenv("SEARCH_FUZZY_EXPANSIONS", "3"))
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Relative weight of a word in each searchable field
+FIELD_WEIGHTS = {"title": 3.0, "author": 2.0, "description": 1.0}
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return TOKEN_PATTERN.findall(text.casefold()) if text else []
+
+
+def trigrams(word: str) -> frozenset:
+    """Padded character trigrams, as pg_trgm builds them ("cat" -> "  c", " ca", "cat", "at ")"""
+    padded = f"  {word} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _fields(book: Dict[str, Any]) -> Tuple[Optional[str], ...]:
+    return tuple(book.get(field) for field in FIELD_WEIGHTS)
+
+
+class BookSearchIndex:
+    """
+    In-process inverted index over book titles, authors and descriptions
+
+    Results are ranked with BM25 over field-weighted term frequencies. Query
+    words missing from the index are matched to the closest indexed words by
+    trigram similarity, so small typos still find the book. The index follows
+    the book catalog: write paths update it per book, and ensure_synced()
+    reloads a stale catalog and reconciles the index with it in the
+    background, while searches use the current index.
+    """
+
+    def __init__(self, k1: float = SEARCH_BM25_K1, b: float = SEARCH_BM25_B,
+                 trigram_threshold: float = SEARCH_TRIGRAM_THRESHOLD,
+                 fuzzy_expansions: int = SEARCH_FUZZY_EXPANSIONS):
+        self.k1 = k1
+        self.b = b
+        self.trigram_threshold = trigram_threshold
+        self.fuzzy_expansions = fuzzy_expansions
+        # word -> book id -> weighted term frequency
+        self.postings: Dict[str, Dict[str, float]] = {}
+        # trigram -> indexed words containing it
+        self.trigram_words: Dict[str, set] = defaultdict(set)
+        # book id -> (weighted length, indexed field values)
+        self.docs: Dict[str, Tuple[float, Tuple[Optional[str], ...]]] = {}
+        self.total_length = 0.0
+        # book_catalog.loaded_at the index was last reconciled with
+        self.synced_at: Optional[float] = None
+        self._lock = threading.RLock()  # Sync write endpoints run in the threadpool
+        self._refresh = BackgroundRefresh("search index")
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    @property
+    def ready(self) -> bool:
+        return self.synced_at is not None
+
+    def build(self, books: Iterable[Dict[str, Any]], synced_at: Optional[float] = None) -> None:
+        """Replace the index with the given books"""
+        with self._lock:
+            self.postings = {}
+            self.trigram_words = defaultdict(set)
+            self.docs = {}
+            self.total_length = 0.0
+            for book in books:
+                self._add(str(book["id"]), book)
+            self.synced_at = synced_at
+
+    def sync(self, books: List[Dict[str, Any]], synced_at: Optional[float] = None) -> None:
+        """Reindex only the books whose searchable fields changed, and drop missing ones"""
+        with self._lock:
+            current = {str(book["id"]): book for book in books}
+            for book_id in [book_id for book_id in self.docs if book_id not in current]:
+                self._remove(book_id)
+            for book_id, book in current.items():
+                doc = self.docs.get(book_id)
+                if doc is None or doc[1] != _fields(book):
+                    self._remove(book_id)
+                    self._add(book_id, book)
+            self.synced_at = synced_at
+
+    async def ensure_synced(self, catalog: BookCatalog, client: httpx.AsyncClient, supabase_url: str,
+                            headers: Dict[str, str]) -> None:
+        """
+        Keep the index current with the books table: a stale catalog is
+        reloaded and the index reconciled with it in the background. Only an
+        index that was never built is waited for.
+        """
+        if catalog.is_stale or self.synced_at != catalog.loaded_at:
+            await self._refresh.run(lambda: self._load(catalog, client, supabase_url, headers), wait=not self.ready)
+
+    async def _load(self, catalog: BookCatalog, client: httpx.AsyncClient, supabase_url: str,
+                    headers: Dict[str, str]) -> None:
+        # Joins a reload a recommender already started rather than running another
+        await catalog.ensure_loaded(client, supabase_url, headers, wait=True)
+        if catalog.loaded and self.synced_at != catalog.loaded_at:
+            loaded_at = catalog.loaded_at
+            # Reconciling a large catalog takes a while; keep it off the event loop
+            await asyncio.to_thread(lambda: self.sync(catalog.find(), loaded_at))
+
+    def upsert(self, book: Dict[str, Any]) -> None:
+        with self._lock:
+            book_id = str(book["id"])
+            doc = self.docs.get(book_id)
+            if doc is not None and doc[1] == _fields(book):
+                return  # e.g. a status change; nothing searchable moved
+            self._remove(book_id)
+            self._add(book_id, book)
+
+    def remove(self, book_id) -> None:
+        with self._lock:
+            self._remove(str(book_id))
+
+    def _add(self, book_id: str, book: Dict[str, Any]) -> None:
+        frequencies: Counter = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for word in tokenize(book.get(field)):
+                frequencies[word] += weight
+        for word, frequency in frequencies.items():
+            postings = self.postings.get(word)
+            if postings is None:
+                postings = self.postings[word] = {}
+                for trigram in trigrams(word):
+                    self.trigram_words[trigram].add(word)
+            postings[book_id] = frequency
+        length = sum(frequencies.values())
+        self.docs[book_id] = (length, _fields(book))
+        self.total_length += length
+
+    def _remove(self, book_id: str) -> None:
+        doc = self.docs.pop(book_id, None)
+        if doc is None:
+            return
+        length, fields = doc
+        self.total_length -= length
+        words = {word for field in fields for word in tokenize(field)}
+        for word in words:
+            postings = self.postings.get(word)
+            if postings is None:
+                continue
+            postings.pop(book_id, None)
+            if not postings:
+                del self.postings[word]
+                for trigram in trigrams(word):
+                    bucket = self.trigram_words.get(trigram)
+                    if bucket is not None:
+                        bucket.discard(word)
+                        if not bucket:
+                            del self.trigram_words[trigram]
+
+    def similar_words(self, word: str) -> List[Tuple[str, float]]:
+        """Indexed words closest to a word by trigram (Jaccard) similarity"""
+        word_trigrams = trigrams(word)
+        shared: Counter = Counter()
+        for trigram in word_trigrams:
+            shared.update(self.trigram_words.get(trigram, ()))
+        matches = []
+        for candidate, count in shared.items():
+            similarity = count / (len(word_trigrams) + len(trigrams(candidate)) - count)
+            if similarity >= self.trigram_threshold:
+                matches.append((candidate, similarity))
+        return heapq.nlargest(self.fuzzy_expansions, matches, key=lambda match: (match[1], match[0]))
+
+    def _query_words(self, query: str) -> List[Tuple[str, float]]:
+        """Indexed words to score for a query, each with a match weight (1 for exact)"""
+        words = list(dict.fromkeys(tokenize(query)))
+        # Drop stopwords unless the query is nothing but stopwords (e.g. "It")
+        content_words = [word for word in words if word not in STOPWORDS]
+        words = content_words or words
+
+        matched: Dict[str, float] = {}
+        for word in words:
+            expansions = [(word, 1.0)] if word in self.postings else self.similar_words(word)
+            for match, weight in expansions:
+                matched[match] = max(weight, matched.get(match, 0.0))
+        return list(matched.items())
+
+    def search(self, query: str) -> Dict[str, float]:
+        """BM25 score of every book matching the query"""
+        with self._lock:
+            if not self.docs:
+                return {}
+            count = len(self.docs)
+            average_length = self.total_length / count or 1.0
+            scores: Dict[str, float] = defaultdict(float)
+            for word, weight in self._query_words(query):
+                postings = self.postings[word]
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for book_id, frequency in postings.items():
+                    length = self.docs[book_id][0]
+                    norm = self.k1 * (1 - self.b + self.b * length / average_length)
+                    scores[book_id] += weight * idf * frequency * (self.k1 + 1) / (frequency + norm)
+            return scores
+
+
+# Shared per-process index, kept current by the book write paths
+search_index = BookSearchIndex()
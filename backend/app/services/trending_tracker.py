@@ -0,0 +1,173 @@
+# app/services/trending_tracker.py
+
+from typing import List, Dict, Tuple, Optional
+import heapq
+import json
+import math
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Seconds for a book's activity score to halve
+TRENDING_HALF_LIFE: float = float(os.getenv("TRENDING_HALF_LIFE", "86400"))
+# Weight of each kind of activity event
+TRENDING_REQUEST_WEIGHT: float = float(os.getenv("TRENDING_REQUEST_WEIGHT", "5"))
+TRENDING_VIEW_WEIGHT: float = float(os.getenv("TRENDING_VIEW_WEIGHT", "1"))
+# Books kept in the leaderboard; larger than the endpoint limit so books that
+# are no longer available can be skipped
+TRENDING_CAPACITY: int = int(os.getenv("TRENDING_CAPACITY", "200"))
+# Where state is written on shutdown and periodically, and read at startup
+TRENDING_SNAPSHOT_PATH: str = os.getenv("TRENDING_SNAPSHOT_PATH", "data/trending.json")
+TRENDING_SNAPSHOT_INTERVAL: float = float(os.getenv("TRENDING_SNAPSHOT_INTERVAL", "300"))
+
+# Rescale stored scores before exp() of the growth exponent gets near overflow
+MAX_EXPONENT = 500.0
+
+
+class TrendingTracker:
+    """
+    Exponentially time-decayed activity scores with an incremental top-k
+
+    Uses forward decay: an event at time t adds weight * 2^((t - origin) / half_life)
+    to the book's stored score, and the decayed score now is the stored score
+    times 2^(-(now - origin) / half_life). Every score shares that decay factor,
+    so recording an event touches no other book's score and the relative order
+    of books only changes when they receive events. Since stored scores only grow, a book can only
+    enter the leaderboard on its own event, which keeps the top-k exact
+    without rescanning.
+
+    The weakest leader is the top of a min-heap of (score, book id) entries.
+    A leader's event pushes a new entry rather than updating its old one;
+    entries whose score no longer matches the leaderboard are skipped when
+    they reach the top, and the heap is rebuilt once they outnumber the
+    leaders, so an event costs O(log capacity) amortised.
+    """
+
+    def __init__(self, half_life: float = TRENDING_HALF_LIFE, capacity: int = TRENDING_CAPACITY):
+        self.half_life = half_life
+        self.capacity = capacity
+        self.rate = math.log(2) / half_life
+        self.origin = time.time()
+        self.scores: Dict[str, float] = {}
+        # book id -> stored score for the highest `capacity` books
+        self.leaders: Dict[str, float] = {}
+        # (stored score, book id) for every leader, plus outdated entries
+        self.heap: List[Tuple[float, str]] = []
+        self.events = 0
+        self._lock = threading.Lock()  # Sync book and exchange endpoints record from the threadpool
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def _rescale(self, now: float) -> None:
+        """Move the origin to `now`, shrinking every stored score by the same factor"""
+        factor = math.exp(-self.rate * (now - self.origin))
+        self.scores = {book_id: score * factor for book_id, score in self.scores.items()}
+        self.leaders = {book_id: score * factor for book_id, score in self.leaders.items()}
+        self._rebuild_heap()
+        self.origin = now
+
+    def _rebuild_heap(self) -> None:
+        self.heap = [(score, book_id) for book_id, score in self.leaders.items()]
+        heapq.heapify(self.heap)
+
+    def _push(self, book_id: str, score: float) -> None:
+        heapq.heappush(self.heap, (score, book_id))
+        if len(self.heap) > 2 * max(self.capacity, 16):
+            self._rebuild_heap()  # Drop the outdated entries
+
+    def _weakest(self) -> Tuple[float, str]:
+        """Smallest leader (score, book id), discarding outdated entries above it"""
+        heap = self.heap
+        while self.leaders.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0]
+
+    def record(self, book_id, weight: float = 1.0, now: Optional[float] = None) -> None:
+        """Add an activity event for a book"""
+        book_id = str(book_id)
+        now = time.time() if now is None else now
+        with self._lock:
+            exponent = self.rate * (now - self.origin)
+            if exponent > MAX_EXPONENT:
+                self._rescale(now)
+                exponent = 0.0
+            score = self.scores.get(book_id, 0.0) + weight * math.exp(exponent)
+            self.scores[book_id] = score
+            self.events += 1
+
+            if book_id in self.leaders or len(self.leaders) < self.capacity:
+                self.leaders[book_id] = score
+                self._push(book_id, score)
+            elif self.capacity > 0 and score > self._weakest()[0]:
+                _, weakest = heapq.heappop(self.heap)
+                del self.leaders[weakest]
+                self.leaders[book_id] = score
+                self._push(book_id, score)
+
+    def record_request(self, book_id) -> None:
+        self.record(book_id, TRENDING_REQUEST_WEIGHT)
+
+    def record_view(self, book_id) -> None:
+        self.record(book_id, TRENDING_VIEW_WEIGHT)
+
+    def remove(self, book_id) -> None:
+        """Forget a deleted book and refill the leaderboard if it was on it"""
+        book_id = str(book_id)
+        with self._lock:
+            self.scores.pop(book_id, None)
+            if self.leaders.pop(book_id, None) is not None:
+                self._refill()
+
+    def _refill(self) -> None:
+        ranked = sorted(self.scores.items(), key=lambda item: item[1], reverse=True)
+        self.leaders = dict(ranked[:self.capacity])
+        self._rebuild_heap()
+
+    def top(self, limit: Optional[int] = None, now: Optional[float] = None) -> List[Tuple[str, float]]:
+        """
+        Highest-scoring books
+
+        Returns:
+            (book_id, decayed score) pairs, highest first
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            factor = math.exp(-self.rate * (now - self.origin))
+            ranked = sorted(self.leaders.items(), key=lambda item: item[1], reverse=True)
+        return [(book_id, score * factor) for book_id, score in ranked[:limit]]
+
+    def save(self, path: str = TRENDING_SNAPSHOT_PATH) -> None:
+        with self._lock:
+            state = {
+                "half_life": self.half_life,
+                "origin": self.origin,
+                "events": self.events,
+                "scores": self.scores,
+            }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str = TRENDING_SNAPSHOT_PATH) -> None:
+        """Restore a snapshot written by save(), converting it to the current half-life"""
+        with open(path) as f:
+            state = json.load(f)
+        with self._lock:
+            # Decay the snapshot to its origin's present value, then re-express
+            # it against a fresh origin at the current half-life
+            now = time.time()
+            factor = math.exp(-math.log(2) / state["half_life"] * (now - state["origin"]))
+            self.origin = now
+            self.events = state.get("events", 0)
+            self.scores = {book_id: score * factor for book_id, score in state["scores"].items()}
+            self._refill()
+
+
+# Shared per-process tracker, fed by book views and exchange requests
+trending_tracker = TrendingTracker()
@@ -1,18 +1,82 @@
 # app/services/unified_recommendation_service.py
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple, Awaitable
+from collections import deque
+from itertools import islice
 import asyncio
+import heapq
+import os
+import threading
+import time
+from dotenv import load_dotenv
 from app.services.recommenders.genre_based_recommender import GenreBasedRecommender
 from app.services.recommenders.location_based_recommender import LocationBasedRecommender
+from app.services.recommenders.collaborative_recommender import CollaborativeRecommender
 from app.services.recommenders.recommendation_diversifier import RecommendationDiversifier
 
+load_dotenv()
+
+# Seconds each source may take before the feed is built without it
+RECOMMENDATION_SOURCE_TIMEOUT: float = float(os.getenv("RECOMMENDATION_SOURCE_TIMEOUT", "1.5"))
+# Recent calls per source kept for latency percentiles
+SOURCE_LATENCY_WINDOW = 1000
+
+class SourceStats:
+    """Call, timeout and error counters plus recent latencies for one recommendation source"""
+    
+    def __init__(self, window: int = SOURCE_LATENCY_WINDOW):
+        self.calls = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+    
+    def record(self, latency: float, outcome: str = "ok") -> None:
+        with self._lock:
+            self.calls += 1
+            self.latencies.append(latency)
+            if outcome == "timeout":
+                self.timeouts += 1
+            elif outcome == "error":
+                self.errors += 1
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self.latencies)
+        
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+        
+        return {
+            "calls": self.calls,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "p50_ms": percentile(0.5),
+            "p99_ms": percentile(0.99),
+            "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+        }
+
 class UnifiedRecommendationService:
     """Combines multiple recommendation sources into a unified recommendation feed"""
     
-    def __init__(self):
-        self.genre_recommender = GenreBasedRecommender()
-        self.location_recommender = LocationBasedRecommender()
+    def __init__(self,
+                 genre_recommender: Optional[GenreBasedRecommender] = None,
+                 location_recommender: Optional[LocationBasedRecommender] = None,
+                 collaborative_recommender: Optional[CollaborativeRecommender] = None,
+                 source_timeout: float = RECOMMENDATION_SOURCE_TIMEOUT):
+        self.genre_recommender = genre_recommender or GenreBasedRecommender()
+        self.location_recommender = location_recommender or LocationBasedRecommender()
+        self.collaborative_recommender = collaborative_recommender or CollaborativeRecommender()
         self.diversifier = RecommendationDiversifier()
+        self.source_timeout = source_timeout
+        self.source_stats = {"genre": SourceStats(), "location": SourceStats(), "collaborative": SourceStats()}
+    
+    async def aclose(self) -> None:
+        """Close the HTTP clients the recommenders created for themselves; a shared client stays open"""
+        for recommender in (self.genre_recommender, self.location_recommender, self.collaborative_recommender):
+            await recommender.aclose()
     
     async def get_unified_recommendations(self, user_id: int, limit: int = 20) -> List[Dict[str, Any]]:
         """
@@ -25,58 +89,139 @@ class UnifiedRecommendationService:
         Returns:
             A list of recommended books with source information
         """
-        # Define expanded limits for each source to ensure we have enough candidates
+        recommendations, _ = await self.get_unified_feed(user_id, limit)
+        return recommendations
+    
+    async def get_unified_feed(self, user_id: int, limit: int = 20) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        Generate the unified feed within the per-source latency budget
+        
+        Returns:
+            (recommendations, missing_sources): sources that timed out or failed
+            are left out of the feed and named in missing_sources, so callers
+            can flag the response as partial
+        """
+        # Get candidates from each source concurrently, each in score order
         source_limit = limit * 2
+        (genre_stream, genre_ok), (location_stream, location_ok), (collaborative_stream, collaborative_ok) = \
+            await asyncio.gather(
+                self._fetch_source("genre", self.genre_recommender.iter_recommendations(user_id), source_limit),
+                self._fetch_source("location", self.location_recommender.iter_recommendations(user_id), source_limit),
+                self._fetch_source("collaborative", self.collaborative_recommender.iter_recommendations(user_id),
+                                   source_limit)
+            )
+        missing_sources = [
+            name for name, ok in (
+                ("genre", genre_ok), ("location", location_ok), ("collaborative", collaborative_ok)
+            ) if not ok
+        ]
         
-        # Get candidate recommendations from each source concurrently
-        genre_recs_task = self.genre_recommender.get_recommendations(user_id, limit=source_limit)
-        location_recs_task = self.location_recommender.get_recommendations(user_id, limit=source_limit)
+        feed = self.combine(genre_stream, location_stream, user_id, limit, collaborative_stream)
+        return feed, missing_sources
+    
+    async def _fetch_source(self, name: str, source: Awaitable[Iterator[Dict[str, Any]]],
+                            count: int) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Pull a source's top `count` candidates within the latency budget
         
-        # Await results
-        genre_recs, location_recs = await asyncio.gather(
-            genre_recs_task,
-            location_recs_task
-        )
+        Sources return lazy streams that do their ranking as they are
+        consumed, so the candidates are drawn inside the timed section, on a
+        worker thread the deadline can walk away from. A source that overruns
+        is abandoned and one that raises is logged; either way it contributes
+        no candidates instead of failing the feed. The shared catalogs a
+        source reads reload in tasks of their own, so cancelling it never
+        cancels a reload.
+        """
+        async def pull() -> List[Dict[str, Any]]:
+            stream = await source
+            return await asyncio.to_thread(lambda: list(islice(stream, count)))
         
-        # Assign recommendation source and reason
-        for rec in genre_recs:
-            rec['source'] = 'genre'
-            rec['reason'] = f"Because you like {rec.get('matching_genre', rec['genre'])}"
+        start = time.perf_counter()
+        try:
+            candidates = await asyncio.wait_for(pull(), timeout=self.source_timeout)
+        except asyncio.TimeoutError:
+            self.source_stats[name].record(time.perf_counter() - start, "timeout")
+            print(f"Recommendation source '{name}' timed out after {self.source_timeout}s")
+            return [], False
+        except Exception as e:
+            self.source_stats[name].record(time.perf_counter() - start, "error")
+            print(f"Recommendation source '{name}' failed: {e}")
+            return [], False
         
-        for rec in location_recs:
-            rec['source'] = 'location'
-            distance = rec.get('distance', 0)
-            rec['reason'] = f"Near you: {distance:.1f} miles away"
+        self.source_stats[name].record(time.perf_counter() - start)
+        return candidates, True
+    
+    def combine(self, genre_stream: Iterable[Dict[str, Any]], location_stream: Iterable[Dict[str, Any]],
+                user_id: int, limit: int = 20,
+                collaborative_stream: Iterable[Dict[str, Any]] = ()) -> List[Dict[str, Any]]:
+        """
+        Merge score-ordered candidate streams into the final feed
         
-        # Combine all recommendations
-        all_recs = genre_recs + location_recs
+        Kept free of I/O so the offline precompute job can run it over
+        candidates it has already loaded.
+        """
+        # Define expanded limits for each source to ensure we have enough candidates
+        source_limit = limit * 2
+        
+        # Lazily merge the sources by score, pulling at most source_limit from each
+        merged = heapq.merge(
+            self._tag_genre(islice(genre_stream, source_limit)),
+            self._tag_location(islice(location_stream, source_limit)),
+            self._tag_collaborative(islice(collaborative_stream, source_limit)),
+            key=lambda rec: -rec.get('score', 0)
+        )
         
         # Remove duplicates (prioritize the one with highest score)
-        unique_recs = self._remove_duplicates(all_recs)
+        unique_recs = self._remove_duplicates(merged)
         
         # Apply diversity filter
-        diverse_recs = self.diversifier.ensure_diversity(unique_recs)
+        diverse_recs = self.diversifier.ensure_diversity(unique_recs, limit=limit)
         
         # Final scoring and ranking
-        final_recs = self._score_and_rank(diverse_recs, user_id)
-        
-        return final_recs[:limit]
+        return self._score_and_rank(diverse_recs, user_id, limit)
+    
+    def _tag_genre(self, recs: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Assign recommendation source and reason to genre candidates"""
+        for rec in recs:
+            rec['source'] = 'genre'
+            rec['reason'] = f"Because you like {rec.get('matching_genre', rec['genre'])}"
+            yield rec
+    
+    def _tag_location(self, recs: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Assign recommendation source and reason to location candidates"""
+        for rec in recs:
+            rec['source'] = 'location'
+            distance = rec.get('distance', 0)
+            rec['reason'] = f"Near you: {distance:.1f} miles away"
+            yield rec
     
-    def _remove_duplicates(self, recommendations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Remove duplicate book entries, keeping the one with highest score"""
+    def _tag_collaborative(self, recs: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Assign recommendation source to co-request candidates, keeping the recommender's reason"""
+        for rec in recs:
+            rec['source'] = 'collaborative'
+            yield rec
+    
+    def _remove_duplicates(self, recommendations: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Remove duplicate book entries, keeping the one with highest score
+        
+        Input arrives in descending score order, so the first occurrence of a
+        book is the one to keep.
+        """
         book_map = {}
         
         for rec in recommendations:
-            book_id = rec.get('id')
-            if book_id not in book_map or rec.get('score', 0) > book_map[book_id].get('score', 0):
-                book_map[book_id] = rec
+            book_map.setdefault(rec.get('id'), rec)
                 
         return list(book_map.values())
     
-    def _score_and_rank(self, recommendations: List[Dict[str, Any]], user_id: int) -> List[Dict[str, Any]]:
+    def _score_and_rank(self, recommendations: List[Dict[str, Any]], user_id: int, limit: int) -> List[Dict[str, Any]]:
         """Apply final scoring adjustments and rank recommendations"""
         # Ensure a good mix of recommendation sources in the top results
+        # Collaborative only counts once it contributes, as new users have no request history
         source_counts = {'genre': 0, 'location': 0}
+        if any(rec.get('source') == 'collaborative' for rec in recommendations):
+            source_counts['collaborative'] = 0
         
         for rec in recommendations:
             source = rec.get('source')
@@ -93,7 +238,5 @@ class UnifiedRecommendationService:
                     boost = (average_count - source_counts[source]) / average_count * 10
                     rec['score'] = rec.get('score', 0) + boost
         
-        # Sort by final score
-        recommendations.sort(key=lambda x: x.get('score', 0), reverse=True)
-        
-        return recommendations
\ No newline at end of file
+        # Keep the top results by final score in a bounded heap
+        return heapq.nlargest(limit, recommendations, key=lambda x: x.get('score', 0))
\ No newline at end of file
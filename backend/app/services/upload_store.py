@@ -0,0 +1,202 @@
+# app/services/upload_store.py
+
+from typing import Dict, Any, Optional, Iterable, Tuple
+import asyncio
+import glob
+import os
+import sqlite3
+import time
+from collections import Counter
+from dotenv import load_dotenv
+from fastapi import UploadFile
+from app.core.uploads import save_image_upload
+
+load_dotenv()
+
+# Directory served at /uploads
+UPLOAD_ROOT: str = os.getenv("UPLOAD_ROOT", "uploads")
+UPLOAD_BASE_URL: str = os.getenv("UPLOAD_BASE_URL", "http://localhost:8000/uploads")
+UPLOAD_STORE_PATH: str = os.getenv("UPLOAD_STORE_PATH", "data/uploads.db")
+# Seconds an unreferenced file is kept, so an upload whose row is still being
+# written (or a duplicate of it arriving) is never collected from under it
+UPLOAD_GC_GRACE: float = float(os.getenv("UPLOAD_GC_GRACE", "3600"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    refcount INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+class UploadStore:
+    """
+    Content-addressed image storage with reference counts
+
+    Files are named by the SHA-256 of their bytes and sharded two levels
+    deep, e.g. book_covers/ab/cd/abcd....jpg, so an identical upload maps
+    to the file already stored and no directory grows past a few hundred
+    entries. Rows that point at a file acquire it and release it when they
+    stop; collect() deletes files (and their rendered variants) that no row
+    has held for UPLOAD_GC_GRACE seconds. Counts live in SQLite, shared by
+    every worker process on the host.
+    """
+
+    def __init__(self, root: str = UPLOAD_ROOT, base_url: str = UPLOAD_BASE_URL,
+                 db_path: str = UPLOAD_STORE_PATH, grace: float = UPLOAD_GC_GRACE):
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+        self.db_path = db_path
+        self.grace = grace
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        connection = sqlite3.connect(self.db_path, timeout=5)
+        connection.execute(SCHEMA)
+        return connection
+
+    def url(self, path: str) -> str:
+        """Public URL of a stored file path"""
+        return f"{self.base_url}/{os.path.relpath(path, self.root).replace(os.sep, '/')}"
+
+    def path(self, url: str) -> Optional[str]:
+        """File path behind a URL from url(), or None for anything outside the store"""
+        if not url or not url.startswith(f"{self.base_url}/"):
+            return None
+        relative = os.path.normpath(url[len(self.base_url) + 1:])
+        if relative.startswith("..") or os.path.isabs(relative):
+            return None
+        return os.path.join(self.root, relative)
+
+    def blob_path(self, directory: str, sha256: str, extension: str) -> str:
+        return os.path.join(self.root, directory, sha256[:2], sha256[2:4], f"{sha256}{extension}")
+
+    async def save(self, upload_file: UploadFile, directory: str) -> Dict[str, Any]:
+        """
+        Stream an image upload into the store under a directory such as book_covers
+
+        The upload is hashed while it is written to a scratch file; if the
+        store already holds those bytes the scratch file is dropped and the
+        existing file reused. The file is registered unreferenced; acquire()
+        it once a row points at it.
+
+        Returns:
+            save_image_upload's details plus "url" and "duplicate"
+        """
+        incoming = os.path.join(self.root, ".incoming")
+        await asyncio.to_thread(os.makedirs, incoming, exist_ok=True)
+        saved = await save_image_upload(upload_file, incoming)
+        path, duplicate = await asyncio.to_thread(self._place, saved, directory)
+        return {**saved, "path": path, "filename": os.path.basename(path), "url": self.url(path),
+                "duplicate": duplicate}
+
+    def _place(self, saved: Dict[str, Any], directory: str) -> Tuple[str, bool]:
+        """
+        Move a scratch file to its content address, or drop it if that is
+        taken, and register it with a fresh grace period. Runs under the
+        database write lock, as collect() does, so a file is never reused
+        while it is being deleted.
+        """
+        extension = os.path.splitext(saved["filename"])[1]
+        path = self.blob_path(directory, saved["sha256"], extension)
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            duplicate = os.path.exists(path)
+            if duplicate:
+                os.remove(saved["path"])
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(saved["path"], path)
+            connection.execute(
+                "INSERT INTO blobs (path, size, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (path) DO UPDATE SET updated_at = excluded.updated_at",
+                (path, saved["size"], time.time())
+            )
+            connection.commit()
+        finally:
+            connection.close()
+        return path, duplicate
+
+    def _adjust(self, url: Optional[str], delta: int) -> None:
+        path = self.path(url)
+        if path is None:
+            return
+        try:
+            connection = self._connect()
+            try:
+                connection.execute(
+                    "UPDATE blobs SET refcount = MAX(refcount + ?, 0), updated_at = ? WHERE path = ?",
+                    (delta, time.time(), path)
+                )
+                connection.commit()
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            print(f"Error updating upload reference count for {path}: {e}")
+
+    def acquire(self, url: Optional[str]) -> None:
+        """A row now points at this file. URLs from before the store (uuid names) are ignored."""
+        self._adjust(url, 1)
+
+    def release(self, url: Optional[str]) -> None:
+        """A row no longer points at this file"""
+        self._adjust(url, -1)
+
+    def recount(self, urls: Iterable[Optional[str]]) -> int:
+        """
+        Reset every count from the URLs rows currently hold, correcting any
+        drift (a crash between a row write and its acquire or release)
+
+        Returns:
+            Number of files referenced
+        """
+        counts = Counter(path for path in map(self.path, urls) if path is not None)
+        connection = self._connect()
+        try:
+            known = {path for (path,) in connection.execute("SELECT path FROM blobs")}
+            connection.execute("UPDATE blobs SET refcount = 0")
+            connection.executemany("UPDATE blobs SET refcount = ? WHERE path = ?",
+                                   [(count, path) for path, count in counts.items() if path in known])
+            connection.commit()
+        finally:
+            connection.close()
+        return sum(1 for path in counts if path in known)
+
+    def collect(self, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Delete files no row has referenced for the grace period, with their variants
+
+        A dry run deletes nothing but sizes the same files, variants included.
+
+        Returns:
+            {"removed": files removed, "bytes": bytes freed}
+        """
+        cutoff = time.time() - self.grace
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            orphans = connection.execute(
+                "SELECT path FROM blobs WHERE refcount = 0 AND updated_at < ?", (cutoff,)
+            ).fetchall()
+            freed = 0
+            for (path,) in orphans:
+                for file_path in [path] + glob.glob(f"{glob.escape(os.path.splitext(path)[0])}_*"):
+                    try:
+                        freed += os.path.getsize(file_path)
+                        if not dry_run:
+                            os.remove(file_path)
+                    except FileNotFoundError:
+                        pass
+                if not dry_run:
+                    connection.execute("DELETE FROM blobs WHERE path = ?", (path,))
+            connection.commit()
+        finally:
+            connection.close()
+        return {"removed": len(orphans), "bytes": freed}
+
+
+# Shared store for book covers and profile photos
+upload_store = UploadStore()
@@ -1,14 +1,16 @@
-import os
-import uuid
-import shutil
+import asyncio
 from app.database import supabase
 from app.schemas.user import UserProfileUpdate
+from app.services.recommenders.user_location_store import user_location_store
+from app.services.recommendation_cache import recommendation_cache
+from app.services.precomputed_recommendations import precomputed_store
+from app.services.image_variants import generate_variants, variant_urls
+from app.services.upload_store import upload_store
 from typing import Dict, Any, Optional
 from fastapi import UploadFile
 
-# Define the base URL for your uploads
-UPLOAD_DIR = "uploads/profile_photos"
-BASE_URL = "http://localhost:8000"
+# Directory of the upload store that holds profile photos
+UPLOAD_DIR = "profile_photos"
 
 async def get_user_profile(user_id: str) -> Optional[Dict[str, Any]]:
     """Get a user's profile by their ID"""
@@ -39,6 +41,18 @@ async def update_user_profile(user_id: str, profile_data: UserProfileUpdate) ->
     if not response.data or len(response.data) == 0:
         return None
     
+    # Keep the recommender's owner locations and cached results in sync; the
+    # owner index reads edits from the location store
+    if "location" in update_data:
+        user_location_store.update(user_id, response.data[0].get("location"))
+        # Distances to this user's books changed for everyone nearby
+        recommendation_cache.invalidate_all()
+    elif "favorite_genres" in update_data:
+        recommendation_cache.invalidate_user(user_id)
+    if "location" in update_data or "favorite_genres" in update_data:
+        # Precomputed lists were built from the old profile
+        await asyncio.to_thread(precomputed_store.discard, user_id)
+    
     return response.data[0]
 
 async def get_user_by_username(username: str) -> Optional[Dict[str, Any]]:
@@ -51,21 +65,35 @@ async def get_user_by_username(username: str) -> Optional[Dict[str, Any]]:
     return response.data[0]
 
 async def save_profile_photo(upload_file: UploadFile) -> str:
-    """Save an uploaded profile photo and return its URL path."""
+    """Stream an uploaded profile photo to disk and return its URL path."""
     if not upload_file:
         return None
-        
-    # Create a unique filename
-    file_extension = os.path.splitext(upload_file.filename)[1]
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = os.path.join(UPLOAD_DIR, unique_filename)
-    
-    # Save the file
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(upload_file.file, buffer)
-    
-    # Return the URL path to the file
-    return f"{BASE_URL}/uploads/profile_photos/{unique_filename}"
+    saved = await upload_store.save(upload_file, UPLOAD_DIR)
+    return saved["url"]
+
+async def attach_profile_photo_variants(user_id: str, profile_photo_url: str):
+    """
+    Render the thumbnail and medium variants of a profile photo and record
+    their URLs on the user. Meant to run after the upload response is sent.
+    """
+    try:
+        path = upload_store.path(profile_photo_url)
+        if not path:
+            return None
+        variants = await generate_variants(path, "profile_photo")
+        urls = variant_urls(variants, upload_store.url)
+        # Matching on the photo URL keeps a slow render from overwriting a newer photo's variants
+        response = (supabase
+            .table("users")
+            .update({"profile_photo_thumbnail_url": urls["thumbnail"]["webp"], "profile_photo_variants": urls})
+            .eq("id", user_id)
+            .eq("profile_photo_url", profile_photo_url)
+            .execute()
+        )
+        return response.data
+    except Exception as e:
+        print(f"Error generating profile photo variants for user {user_id}: {str(e)}")
+        return None
 
 async def debug_user_id(user):
     """Debug function to find the correct way to query the user."""
@@ -196,8 +224,15 @@ async def upload_and_update_profile_photo(user, upload_file: UploadFile) -> dict
         if not profile_photo_url:
             raise Exception("Failed to save profile photo")
             
+        # The photo being replaced, so its stored file can be released
+        current_profile = await get_user_profile(user["sub"]) if isinstance(user, dict) and "sub" in user else None
+        previous_photo_url = (current_profile or {}).get("profile_photo_url")
+
         # Update the user profile with the new photo URL
         update_result = await update_user_profile_photo(user, profile_photo_url)
+
+        await asyncio.to_thread(upload_store.acquire, profile_photo_url)
+        await asyncio.to_thread(upload_store.release, previous_photo_url)
         
         return {
             "profile_photo_url": profile_photo_url,
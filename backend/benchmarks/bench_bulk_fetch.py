@@ -0,0 +1,108 @@
+# benchmarks/bench_bulk_fetch.py
+#
+# Fetching books for many owner ids: one owner_id=in.(...) request versus
+# bounded chunks fetched one at a time and concurrently. The fake Supabase
+# adds a fixed round-trip delay per request and rejects URLs past a typical
+# proxy limit, the way a real deployment behaves.
+# Run from the backend directory:  python -m benchmarks.bench_bulk_fetch [--scale 100k]
+
+import argparse
+import asyncio
+import os
+import random
+import time
+
+os.environ.setdefault("SUPABASE_URL", "http://supabase.bench")
+os.environ.setdefault("SUPABASE_KEY", "bench-key")
+
+import httpx
+from app.core.bulk_fetch import fetch_rows_by_ids, BULK_FETCH_CONCURRENCY
+from benchmarks.fake_supabase import FakeSupabase
+from benchmarks.synthetic import SCALES, generate_dataset
+
+FAKE_SUPABASE_URL = os.environ["SUPABASE_URL"]
+SIZES = [10, 100, 1_000, 10_000]
+ROUND_TRIP = 0.02  # Seconds of simulated network and query latency per request
+MAX_URL_LENGTH = 8192
+REPEATS = 3
+
+
+class SlowSupabase(FakeSupabase):
+    """FakeSupabase with a per-request delay and a URL length limit"""
+
+    async def slow_handler(self, request: httpx.Request) -> httpx.Response:
+        if len(str(request.url)) > MAX_URL_LENGTH:
+            return httpx.Response(414, json={"message": "URI Too Long"})
+        await asyncio.sleep(ROUND_TRIP)
+        return self.handler(request)
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.slow_handler))
+
+
+async def single_request(client, owner_ids):
+    """The original approach: every owner id in one URL"""
+    response = await client.get(
+        f"{FAKE_SUPABASE_URL}/rest/v1/books?status=eq.available&owner_id=in.({','.join(owner_ids)})"
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+async def chunked(client, owner_ids, concurrency):
+    return await fetch_rows_by_ids(
+        client, f"{FAKE_SUPABASE_URL}/rest/v1/books?status=eq.available", "owner_id", owner_ids, {},
+        concurrency=concurrency
+    )
+
+
+async def best_of(fn, repeats=REPEATS):
+    """Best wall time over repeats, or None if the fetch failed"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        try:
+            rows = await fn()
+        except httpx.HTTPStatusError as e:
+            return None, f"HTTP {e.response.status_code}"
+        except httpx.InvalidURL:
+            return None, "URL too long"  # httpx refuses to send it at all
+        timings.append(time.perf_counter() - start)
+    return min(timings), len(rows)
+
+
+def cell(timing, rows):
+    return f"{timing * 1000:>9.1f} ms" if timing is not None else f"{rows:>12}"
+
+
+async def run(scale: str):
+    data = generate_dataset(scale, 0)
+    supabase = SlowSupabase(data)
+    owners = sorted({book["owner_id"] for book in data["books"]})
+    rng = random.Random(42)
+
+    print(f"{len(data['books'])} books from {len(owners)} owners; {ROUND_TRIP * 1000:.0f} ms per request")
+    print(f"{'owners':>8} {'rows':>7} {'single':>12} {'sequential':>12} "
+          f"{f'concurrent x{BULK_FETCH_CONCURRENCY}':>16} {'speedup':>8}")
+    async with supabase.client() as client:
+        for size in SIZES:
+            if size > len(owners):
+                break
+            owner_ids = rng.sample(owners, size)
+            single, single_rows = await best_of(lambda: single_request(client, owner_ids))
+            sequential, rows = await best_of(lambda: chunked(client, owner_ids, 1))
+            concurrent, concurrent_rows = await best_of(lambda: chunked(client, owner_ids, BULK_FETCH_CONCURRENCY))
+            assert rows == concurrent_rows and (single is None or single_rows == rows)
+            print(f"{size:>8} {rows:>7} {cell(single, single_rows)} {cell(sequential, rows)} "
+                  f"{cell(concurrent, rows):>16} {sequential / concurrent:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chunked bulk fetches by id")
+    parser.add_argument("--scale", default="100k", choices=list(SCALES), help="Synthetic dataset size (books)")
+    args = parser.parse_args()
+    asyncio.run(run(args.scale))
+
+
+if __name__ == "__main__":
+    main()
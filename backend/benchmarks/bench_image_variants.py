@@ -0,0 +1,86 @@
+# benchmarks/bench_image_variants.py
+#
+# Image bytes a client downloads for one listing page, before (every card
+# loads the original upload) and after (cards load the WebP or JPEG
+# thumbnail), using the covers and photos in uploads/ plus a synthetic 12MP
+# phone photo. Variants are rendered through the same worker pool the API
+# uses, into a scratch directory. Run from the backend directory:
+#     python -m benchmarks.bench_image_variants [--page-size 20]
+
+import argparse
+import asyncio
+import glob
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from PIL import Image
+from app.services import image_variants
+
+UPLOAD_GLOBS = ["uploads/book_covers/*", "uploads/profile_photos/*"]
+
+
+def phone_photo(path: str):
+    """A 4000x3000 JPEG with camera EXIF, like an unedited phone upload"""
+    pixels = np.random.default_rng(0).integers(0, 256, size=(3000, 4000, 3), dtype=np.uint8)
+    # Smooth the noise so the photo compresses like a real one
+    image = Image.fromarray(pixels).resize((400, 300)).resize((4000, 3000), Image.BICUBIC)
+    exif = Image.Exif()
+    exif[0x010F] = "Phone"
+    exif[0x0112] = 6
+    image.save(path, "JPEG", quality=92, exif=exif)
+
+
+async def render_all(paths):
+    start = time.perf_counter()
+    variants = await asyncio.gather(*[image_variants.generate_variants(path, "book_cover") for path in paths])
+    return variants, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark listing-page image bytes with and without variants")
+    parser.add_argument("--page-size", type=int, default=20, help="Books per listing page")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="bench_images_")
+    try:
+        sources = []
+        for pattern in UPLOAD_GLOBS:
+            for path in sorted(glob.glob(pattern)):
+                target = os.path.join(scratch, os.path.basename(path))
+                shutil.copyfile(path, target)
+                sources.append(target)
+        photo = os.path.join(scratch, "phone_photo.jpg")
+        phone_photo(photo)
+        sources.append(photo)
+
+        variants, seconds = asyncio.run(render_all(sources))
+        image_variants.shutdown()
+        print(f"Rendered variants of {len(sources)} images in {seconds:.2f}s "
+              f"({image_variants.IMAGE_VARIANT_WORKERS} worker processes)")
+
+        sizes = {
+            "original": [os.path.getsize(path) for path in sources],
+            "thumbnail webp": [os.path.getsize(v["thumbnail"]["webp"]) for v in variants],
+            "thumbnail jpeg": [os.path.getsize(v["thumbnail"]["jpeg"]) for v in variants],
+            "medium webp": [os.path.getsize(v["medium"]["webp"]) for v in variants],
+            "medium jpeg": [os.path.getsize(v["medium"]["jpeg"]) for v in variants],
+        }
+        # A page cycles through the sample images, so its mix matches theirs
+        page = [i % len(sources) for i in range(args.page_size)]
+        baseline = sum(sizes["original"][i] for i in page)
+
+        print(f"{'served':>15} {'mean KB':>9} {'max KB':>9} {'page KB':>9} {'vs original':>12}")
+        for name, values in sizes.items():
+            page_bytes = sum(values[i] for i in page)
+            print(f"{name:>15} {np.mean(values) / 1024:>9.1f} {max(values) / 1024:>9.1f} "
+                  f"{page_bytes / 1024:>9.1f} {page_bytes / baseline:>11.1%}")
+        print(f"phone photo: {sizes['original'][-1] / 1024:.0f} KB original, "
+              f"{sizes['thumbnail webp'][-1] / 1024:.0f} KB thumbnail")
+    finally:
+        shutil.rmtree(scratch)
+
+
+if __name__ == "__main__":
+    main()
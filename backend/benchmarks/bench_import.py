@@ -0,0 +1,102 @@
+# benchmarks/bench_import.py
+#
+# Bulk book import throughput by batch size, from a synthetic CSV through
+# import_books into a fake PostgREST insert endpoint. Each insert request
+# costs a fixed simulated round trip plus a small per-row cost, so the
+# row-at-a-time baseline (batch size 1) shows what a naive loop of
+# create_book calls would take; it is timed on a sample and extrapolated.
+# Run from the backend directory:  python -m benchmarks.bench_import [--rows 50000]
+
+import argparse
+import io
+import csv
+import json
+import os
+import time
+
+os.environ.setdefault("SUPABASE_URL", "http://supabase.bench")
+# The Supabase client only checks that the key looks like a JWT
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.bench")
+
+import httpx
+from postgrest import SyncPostgrestClient
+from app.services.book_catalog import book_catalog
+from app.services.book_import import import_books, iter_csv_rows
+from benchmarks.synthetic import generate_books
+
+FAKE_SUPABASE_URL = os.environ["SUPABASE_URL"]
+ROUND_TRIP = 0.02  # Seconds of simulated network and query latency per request
+PER_ROW = 0.00002  # Seconds of simulated insert work per row
+BATCH_SIZES = [1, 50, 200, 500, 1000]
+SINGLE_ROW_SAMPLE = 200
+FIELDS = ["title", "author", "genre", "condition", "description", "status"]
+
+
+class FakeInsert:
+    """POST /books that echoes rows back with ids, like return=representation"""
+
+    def __init__(self):
+        self.next_id = 1
+        self.requests = 0
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        rows = json.loads(request.content)
+        rows = rows if isinstance(rows, list) else [rows]
+        time.sleep(ROUND_TRIP + PER_ROW * len(rows))
+        self.requests += 1
+        for row in rows:
+            row["id"] = self.next_id
+            self.next_id += 1
+        return httpx.Response(201, json=rows)
+
+    def client(self) -> SyncPostgrestClient:
+        client = SyncPostgrestClient(f"{FAKE_SUPABASE_URL}/rest/v1")
+        client.session = httpx.Client(base_url=f"{FAKE_SUPABASE_URL}/rest/v1",
+                                      transport=httpx.MockTransport(self.handler))
+        return client
+
+
+def make_csv(count: int) -> str:
+    books = generate_books(count, max(50, count // 20))
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(books)
+    # A few broken rows, so error reporting is part of the timing
+    out.write("Missing Fields Only,,,,,\n" * 10)
+    return out.getvalue()
+
+
+def run(text: str, batch_size: int):
+    fake = FakeInsert()
+    book_catalog.load([])
+    report = import_books(iter_csv_rows(io.StringIO(text, newline="")), "bench-user",
+                          batch_size=batch_size, client=fake.client())
+    return report, fake.requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk book import")
+    parser.add_argument("--rows", type=int, default=50_000, help="Rows in the synthetic CSV")
+    args = parser.parse_args()
+
+    text = make_csv(args.rows)
+    sample = "\n".join(text.splitlines()[:SINGLE_ROW_SAMPLE + 1]) + "\n"
+    print(f"{args.rows} rows, {len(text) / 1e6:.1f} MB CSV, {ROUND_TRIP * 1000:.0f}ms per request")
+    print(f"{'batch':>6} {'requests':>9} {'imported':>9} {'failed':>7} {'seconds':>9} {'rows/s':>9}")
+
+    for batch_size in BATCH_SIZES:
+        if batch_size == 1:
+            report, requests = run(sample, batch_size)
+            # Extrapolate the row-at-a-time baseline from its sample
+            seconds = report["seconds"] * args.rows / SINGLE_ROW_SAMPLE
+            print(f"{batch_size:>6} {args.rows:>9} {'~' + str(args.rows):>9} {'':>7} {seconds:>8.0f}~ "
+                  f"{report['rows_per_second']:>9.0f}")
+            continue
+        report, requests = run(text, batch_size)
+        print(f"{batch_size:>6} {requests:>9} {report['imported']:>9} {report['failed']:>7} "
+              f"{report['seconds']:>9.2f} {report['rows_per_second']:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
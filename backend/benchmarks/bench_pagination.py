@@ -0,0 +1,93 @@
+# benchmarks/bench_pagination.py
+#
+# Page 1 versus page 1000 of the book listing, with OFFSET and with keyset
+# (cursor) pagination on (created_at, id). Runs the same SQL shape PostgREST
+# generates against an indexed SQLite copy of the synthetic books table, so
+# the difference is the database's work, not the network's.
+# Run from the backend directory:  python -m benchmarks.bench_pagination [--scale 100k]
+
+import argparse
+import sqlite3
+import time
+from benchmarks.synthetic import SCALES, generate_dataset
+
+PAGE_SIZE = 20
+PAGES = [1, 10, 100, 1000]
+REPEATS = 20
+
+COLUMNS = "id, title, author, genre, status, owner_id, created_at"
+ORDER = "ORDER BY created_at DESC, id DESC"
+
+
+def load(scale: str) -> sqlite3.Connection:
+    books = generate_dataset(scale, 0)["books"]
+    db = sqlite3.connect(":memory:")
+    db.execute("CREATE TABLE books (id INTEGER PRIMARY KEY, title TEXT, author TEXT, genre TEXT, "
+               "status TEXT, owner_id TEXT, created_at TEXT)")
+    db.executemany(
+        f"INSERT INTO books ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(book["id"], book["title"], book["author"], book["genre"], book["status"], book["owner_id"],
+          book["created_at"]) for book in books]
+    )
+    db.execute("CREATE INDEX books_created_at_id ON books (created_at DESC, id DESC)")
+    db.execute("ANALYZE")
+    return db
+
+
+def offset_page(db, user_id, page):
+    return db.execute(
+        f"SELECT {COLUMNS} FROM books WHERE owner_id != ? {ORDER} LIMIT ? OFFSET ?",
+        (user_id, PAGE_SIZE + 1, (page - 1) * PAGE_SIZE)
+    ).fetchall()
+
+
+def keyset_page(db, user_id, cursor):
+    if cursor is None:
+        return db.execute(
+            f"SELECT {COLUMNS} FROM books WHERE owner_id != ? {ORDER} LIMIT ?",
+            (user_id, PAGE_SIZE + 1)
+        ).fetchall()
+    created_at, book_id = cursor
+    # The PostgREST filters created_at=lte.X&or=(created_at.lt.X,and(created_at.eq.X,id.lt.Y))
+    return db.execute(
+        f"SELECT {COLUMNS} FROM books WHERE owner_id != ? AND created_at <= ? "
+        f"AND (created_at < ? OR (created_at = ? AND id < ?)) {ORDER} LIMIT ?",
+        (user_id, created_at, created_at, created_at, book_id, PAGE_SIZE + 1)
+    ).fetchall()
+
+
+def best_of(fn, repeats=REPEATS):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offset and keyset pagination")
+    parser.add_argument("--scale", default="100k", choices=list(SCALES), help="Synthetic dataset size (books)")
+    args = parser.parse_args()
+
+    db = load(args.scale)
+    count = db.execute("SELECT COUNT(*) FROM books").fetchone()[0]
+    user_id = db.execute("SELECT owner_id FROM books LIMIT 1").fetchone()[0]
+    print(f"{count} books, {PAGE_SIZE} per page")
+    print(f"{'page':>6} {'offset ms':>11} {'keyset ms':>11} {'speedup':>8}")
+
+    for page in PAGES:
+        if (page - 1) * PAGE_SIZE >= count:
+            break
+        offset_time, offset_rows = best_of(lambda: offset_page(db, user_id, page))
+        # The cursor a client would hold on arriving at this page: the last row of the previous one
+        previous = offset_page(db, user_id, page - 1)[PAGE_SIZE - 1] if page > 1 else None
+        cursor = (previous[6], previous[0]) if previous else None
+        keyset_time, keyset_rows = best_of(lambda: keyset_page(db, user_id, cursor))
+        assert offset_rows == keyset_rows
+        print(f"{page:>6} {offset_time * 1000:>11.3f} {keyset_time * 1000:>11.3f} "
+              f"{offset_time / keyset_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# benchmarks/bench_projection.py
+#
+# Payload size and round-trip time of a page of books fetched with select=*
+# versus the list-view projection (BOOK_LIST_FIELDS), through the fake
+# Supabase REST layer. Synthetic descriptions are short, so they are padded to
+# --description-chars (auto-fill writes descriptions of up to 300 characters).
+# Run from the backend directory:  python -m benchmarks.bench_projection
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("SUPABASE_URL", "http://supabase.bench")
+os.environ.setdefault("SUPABASE_KEY", "bench-key")
+
+from app.schemas.book import BOOK_LIST_FIELDS, BOOK_DETAIL_FIELDS
+from benchmarks.fake_supabase import FakeSupabase
+from benchmarks.synthetic import SCALES, generate_dataset
+
+FAKE_SUPABASE_URL = os.environ["SUPABASE_URL"]
+PAGE_SIZES = [10, 100, 1000]
+REPEATS = 50
+
+PROJECTIONS = {
+    "select=*": "*",
+    "detail": ",".join(BOOK_DETAIL_FIELDS),
+    "list": ",".join(BOOK_LIST_FIELDS),
+}
+
+
+def pad_descriptions(books, chars: int):
+    for book in books:
+        description = book.get("description") or ""
+        while description and len(description) < chars:
+            description = f"{description} {description}"
+        book["description"] = description[:chars]
+
+
+async def fetch_page(client, select: str, book_ids: str):
+    # An indexed id filter keeps the fake's own query cost out of the timing
+    response = await client.get(f"{FAKE_SUPABASE_URL}/rest/v1/books?select={select}&id=in.({book_ids})")
+    return len(response.content), response.json()
+
+
+async def run(scale: str, description_chars: int):
+    data = generate_dataset(scale, 0)
+    pad_descriptions(data["books"], description_chars)
+    supabase = FakeSupabase(data)
+
+    print(f"{len(data['books'])} books, descriptions padded to {description_chars} chars")
+    print(f"{'rows':>6} {'projection':>10} {'bytes':>10} {'bytes/row':>10} {'ms':>8} {'vs *':>7}")
+    async with supabase.client() as client:
+        for limit in PAGE_SIZES:
+            book_ids = ",".join(str(book["id"]) for book in data["books"][:limit])
+            baseline = None
+            for name, select in PROJECTIONS.items():
+                timings = []
+                for _ in range(REPEATS):
+                    start = time.perf_counter()
+                    size, rows = await fetch_page(client, select, book_ids)
+                    timings.append(time.perf_counter() - start)
+                best = min(timings)
+                baseline = baseline or (size, best)
+                print(f"{len(rows):>6} {name:>10} {size:>10} {size / len(rows):>10.0f} {best * 1000:>8.2f} "
+                      f"{size / baseline[0]:>6.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark book column projections")
+    parser.add_argument("--scale", default="100k", choices=list(SCALES), help="Synthetic dataset size (books)")
+    parser.add_argument("--description-chars", type=int, default=300, help="Pad descriptions to this length")
+    args = parser.parse_args()
+    asyncio.run(run(args.scale, args.description_chars))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/bench_recommenders.py
+#
+# Latency and memory of each recommendation source against the fake Supabase
+# REST layer, steady state (catalog and owner index already loaded).
+# Run from the backend directory:  python -m pytest benchmarks/bench_recommenders.py --scale 1k
+
+import heapq
+from itertools import islice
+import pytest
+from app.services.book_catalog import book_catalog
+from app.services.recommenders.genre_based_recommender import GenreBasedRecommender
+from app.services.recommenders.location_based_recommender import LocationBasedRecommender
+from app.services.recommenders.collaborative_recommender import CollaborativeRecommender, co_requests
+from app.services.recommenders.recommendation_diversifier import RecommendationDiversifier, DIVERSITY_MODES
+from app.services.recommenders.spatial_index import owner_index
+from app.services.recommenders.user_location_store import user_location_store
+from app.services.unified_recommendation_service import UnifiedRecommendationService
+from benchmarks.conftest import FAKE_SUPABASE_URL
+
+LIMIT = 20
+CANDIDATES_PER_SOURCE = LIMIT * 2
+
+
+@pytest.fixture(scope="session")
+def service(fake_supabase, run) -> UnifiedRecommendationService:
+    client = fake_supabase.client()
+    genre_recommender = GenreBasedRecommender(client=client)
+    location_recommender = LocationBasedRecommender(client=client)
+    collaborative_recommender = CollaborativeRecommender(client=client)
+    for recommender in (genre_recommender, location_recommender, collaborative_recommender):
+        recommender.supabase_url = FAKE_SUPABASE_URL
+
+    # Load the shared in-memory indexes from this dataset, not whatever was loaded before
+    book_catalog.loaded_at = None
+    owner_index.loaded_at = None
+    user_location_store.loaded_at = None
+    co_requests.loaded_at = None
+    run(book_catalog.ensure_loaded(client, FAKE_SUPABASE_URL, genre_recommender.headers))
+    run(owner_index.ensure_loaded(client, FAKE_SUPABASE_URL, genre_recommender.headers))
+    run(co_requests.ensure_loaded(client, FAKE_SUPABASE_URL, genre_recommender.headers))
+    yield UnifiedRecommendationService(genre_recommender, location_recommender, collaborative_recommender)
+    run(client.aclose())
+
+
+@pytest.fixture(scope="session")
+def candidate_lists(service, sample_users, run):
+    """Per-user deduplicated candidates in score order, as the diversifier receives them"""
+    lists = []
+    for user_id in sample_users:
+        genre = run(service.genre_recommender.get_recommendations(user_id, CANDIDATES_PER_SOURCE))
+        location = run(service.location_recommender.get_recommendations(user_id, 50.0, CANDIDATES_PER_SOURCE))
+        unique = {}
+        for rec in heapq.merge(genre, location, key=lambda rec: -rec.get("score", 0)):
+            unique.setdefault(rec["id"], rec)
+        lists.append(list(unique.values()))
+    return lists
+
+
+def test_genre_recommender(bench, service, sample_users, run):
+    recommender = service.genre_recommender
+    bench("genre_recommender", lambda i: run(
+        recommender.get_recommendations(sample_users[i % len(sample_users)], LIMIT)
+    ))
+
+
+def test_location_recommender(bench, service, sample_users, run):
+    recommender = service.location_recommender
+    bench("location_recommender", lambda i: run(
+        recommender.get_recommendations(sample_users[i % len(sample_users)], 50.0, LIMIT)
+    ))
+
+
+def test_collaborative_recommender(bench, service, sample_users, run):
+    recommender = service.collaborative_recommender
+    bench("collaborative_recommender", lambda i: run(
+        recommender.get_recommendations(sample_users[i % len(sample_users)], LIMIT)
+    ))
+
+
+@pytest.mark.parametrize("mode", DIVERSITY_MODES)
+def test_diversifier(bench, candidate_lists, mode):
+    diversifier = RecommendationDiversifier(mode=mode)
+
+    def diversify(i):
+        # The heuristic edits its input, so every call gets fresh copies
+        candidates = [dict(rec) for rec in candidate_lists[i % len(candidate_lists)]]
+        return list(islice(diversifier.ensure_diversity(candidates, limit=LIMIT), LIMIT))
+
+    bench(f"diversifier[{mode}]", diversify)
+
+
+def test_unified_service(bench, service, sample_users, run):
+    bench("unified_service", lambda i: run(
+        service.get_unified_recommendations(sample_users[i % len(sample_users)], LIMIT)
+    ))
@@ -0,0 +1,71 @@
+# benchmarks/bench_similar_books.py
+#
+# Build time, memory and lookup latency of the similar-books index.
+# Run from the backend directory:  python -m benchmarks.bench_similar_books [--books N]
+
+import argparse
+import random
+import time
+import resource
+from app.services.recommenders.content_similarity import ContentSimilarityIndex
+from app.services.recommenders.genre_based_recommender import GENRES
+
+
+def synthetic_books(count: int, seed: int = 7):
+    """Books with Zipf-like vocabulary so that term frequencies resemble real text"""
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(20_000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    authors = [f"Author {i} Surname{i % 997}" for i in range(count // 20 + 1)]
+    books = []
+    for i in range(count):
+        words = rng.choices(vocabulary, weights=weights, k=45)
+        books.append({
+            "id": i,
+            "title": " ".join(words[:4]),
+            "author": rng.choice(authors),
+            "genre": rng.choice(GENRES),
+            "description": " ".join(words[4:]),
+        })
+    return books
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=100_000)
+    args = parser.parse_args()
+
+    books = synthetic_books(args.books)
+
+    # ru_maxrss is in KiB on Linux; tracemalloc would distort the build time
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    index = ContentSimilarityIndex()
+    index.build(books)
+    build_time = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(f"books:            {len(index):,}")
+    print(f"terms:            {len(index.term_ids):,}")
+    print(f"build time:       {build_time:.1f}s")
+    print(f"peak RSS growth:  {(rss_after - rss_before) / 2**10:.0f} MiB")
+
+    rng = random.Random(1)
+    sample = [str(rng.randrange(len(books))) for _ in range(10_000)]
+    start = time.perf_counter()
+    for book_id in sample:
+        index.similar(book_id)
+    lookup = (time.perf_counter() - start) / len(sample)
+    print(f"lookup:           {lookup * 1e6:.1f}us")
+
+    new_books = synthetic_books(200, seed=99)
+    for offset, book in enumerate(new_books):
+        book["id"] = len(books) + offset
+    start = time.perf_counter()
+    for book in new_books:
+        index.upsert(book)
+    print(f"incremental add:  {(time.perf_counter() - start) / len(new_books) * 1000:.2f}ms per book")
+
+
+if __name__ == "__main__":
+    main()
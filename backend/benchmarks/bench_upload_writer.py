@@ -0,0 +1,121 @@
+# benchmarks/bench_upload_writer.py
+#
+# Event-loop latency while uploads are being written: the old writer
+# (shutil.copyfileobj into open() inside an async function) against
+# save_image_upload, which reads in chunks and writes through worker
+# threads. A ticker task asks to wake every millisecond; how late it wakes
+# is the delay every other request on the loop would see. Writes go to a
+# scratch directory, throttled to --disk-mbps so the page cache doesn't hide
+# what a real disk or network volume costs (the throttle is per file, so
+# total times flatter the concurrent writer; the lag columns are the result).
+# Run from the backend directory:  python -m benchmarks.bench_upload_writer [--uploads 16 --size-mb 8]
+
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import uuid
+import numpy as np
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+from app.core import uploads
+from app.core.uploads import save_image_upload
+
+TICK = 0.001
+
+
+class ThrottledFile:
+    """A file whose writes take as long as they would at a given disk speed"""
+
+    def __init__(self, path: str, mode: str, bytes_per_second: float):
+        self.file = open(path, mode)
+        self.bytes_per_second = bytes_per_second
+
+    def write(self, data: bytes) -> int:
+        time.sleep(len(data) / self.bytes_per_second)
+        return self.file.write(data)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def throttled_open(bytes_per_second: float):
+    return lambda path, mode="r": ThrottledFile(path, mode, bytes_per_second)
+
+
+async def copyfileobj_writer(upload_file: UploadFile, directory: str):
+    """The writer save_upload_file used to be"""
+    path = os.path.join(directory, f"{uuid.uuid4()}.jpg")
+    with uploads.open(path, "wb") as buffer:
+        shutil.copyfileobj(upload_file.file, buffer)
+
+
+async def chunked_writer(upload_file: UploadFile, directory: str):
+    await save_image_upload(upload_file, directory, max_bytes=1 << 40)
+
+
+def make_upload(payload: bytes) -> UploadFile:
+    # Starlette spools multipart files over 1MB to disk; so does this
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    spooled.write(payload)
+    spooled.seek(0)
+    return UploadFile(spooled, size=len(payload), filename="cover.jpg",
+                      headers=Headers({"content-type": "image/jpeg"}))
+
+
+async def ticker(lags, stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def run(writer, payload: bytes, uploads: int, directory: str):
+    files = [make_upload(payload) for _ in range(uploads)]
+    lags = []
+    stop = asyncio.Event()
+    tick_task = asyncio.create_task(ticker(lags, stop))
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    await asyncio.gather(*[writer(upload_file, directory) for upload_file in files])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick_task
+    for upload_file in files:
+        await upload_file.close()
+    return elapsed, np.array(lags) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark event-loop latency during upload writes")
+    parser.add_argument("--uploads", type=int, default=16, help="Concurrent uploads")
+    parser.add_argument("--size-mb", type=float, default=8, help="Size of each upload")
+    parser.add_argument("--disk-mbps", type=float, default=200, help="Simulated disk write speed")
+    args = parser.parse_args()
+    # Both writers open files through the uploads module, so both get the slow disk
+    uploads.open = throttled_open(args.disk_mbps * 1024 * 1024)
+
+    # A JPEG signature followed by incompressible bytes
+    payload = b"\xff\xd8\xff\xe0" + os.urandom(int(args.size_mb * 1024 * 1024))
+    print(f"{args.uploads} concurrent uploads of {args.size_mb:g} MB, disk at {args.disk_mbps:g} MB/s")
+    print(f"{'writer':>14} {'total s':>8} {'lag p50 ms':>11} {'lag p99 ms':>11} {'lag max ms':>11}")
+    for name, writer in (("copyfileobj", copyfileobj_writer), ("chunked", chunked_writer)):
+        directory = tempfile.mkdtemp(prefix="bench_uploads_")
+        try:
+            elapsed, lags = asyncio.run(run(writer, payload, args.uploads, directory))
+        finally:
+            shutil.rmtree(directory)
+        print(f"{name:>14} {elapsed:>8.2f} {np.percentile(lags, 50):>11.2f} {np.percentile(lags, 99):>11.2f} "
+              f"{lags.max():>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+# benchmarks/conftest.py
+#
+# Fixtures and reporting for the pytest benchmark suite. Run from the backend
+# directory:
+#     python -m pytest benchmarks --scale 1k
+#     python -m pytest benchmarks --scale 100k --bench-json results.json
+#     python -m pytest benchmarks --bench-baseline results.json   # fail on p50 regressions
+
+import os
+
+FAKE_SUPABASE_URL = "http://supabase.bench"
+
+# Recommender modules read these at import; the fake accepts any key, but
+# the Supabase client (app.database) insists it looks like a JWT
+os.environ.setdefault("SUPABASE_URL", FAKE_SUPABASE_URL)
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.bench")
+# Never write fake users where the app would memory-map them
+os.environ["USER_LOCATION_STORE_PATH"] = ""
+
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, Any, List
+import pytest
+from benchmarks.fake_supabase import FakeSupabase
+from benchmarks.synthetic import SCALES, generate_dataset
+
+SAMPLE_USERS = 200
+# Calls traced for memory; tracemalloc slows calls down, so it gets its own pass
+MEMORY_CALLS = 20
+
+_results: List[Dict[str, Any]] = []
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmarks")
+    group.addoption("--scale", default="1k", choices=list(SCALES), help="Synthetic dataset size (books)")
+    group.addoption("--seed", type=int, default=0, help="Seed for the synthetic dataset")
+    group.addoption("--bench-calls", type=int, default=200, help="Timed calls per benchmark")
+    group.addoption("--bench-json", default=None, help="Write results to this JSON file")
+    group.addoption("--bench-baseline", default=None, help="Fail benchmarks whose p50 regressed against this JSON file")
+    group.addoption("--bench-tolerance", type=float, default=0.25, help="Allowed p50 slowdown against the baseline")
+
+
+def pytest_collect_file(file_path, parent):
+    # Benchmark modules are named bench_*.py so a plain test run never picks them up
+    if file_path.suffix == ".py" and file_path.name.startswith("bench_"):
+        return pytest.Module.from_parent(parent, path=file_path)
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(p * len(sorted_values)))]
+
+
+@pytest.fixture(scope="session")
+def dataset(request) -> Dict[str, List[Dict[str, Any]]]:
+    scale = request.config.getoption("--scale")
+    start = time.perf_counter()
+    data = generate_dataset(scale, request.config.getoption("--seed"))
+    print(f"\nGenerated {scale} dataset: {len(data['users'])} users, {len(data['books'])} books, "
+          f"{len(data['book_request'])} requests in {time.perf_counter() - start:.1f}s")
+    return data
+
+
+@pytest.fixture(scope="session")
+def fake_supabase(dataset) -> FakeSupabase:
+    return FakeSupabase(dataset)
+
+
+@pytest.fixture(scope="session")
+def run():
+    """Run a coroutine to completion on one event loop shared by the session"""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def sample_users(dataset, request) -> List[str]:
+    """Users with both a location and favourite genres, so every source has work to do"""
+    eligible = [user["id"] for user in dataset["users"] if user["location"] and user["favorite_genres"]]
+    return random.Random(request.config.getoption("--seed")).sample(eligible, min(SAMPLE_USERS, len(eligible)))
+
+
+@pytest.fixture
+def bench(request) -> Callable[[str, Callable[[int], Any]], Dict[str, Any]]:
+    """
+    Measure fn(i) for i = 0..calls-1: latency percentiles from an untraced
+    pass, then peak memory and retained allocations per call from a traced one
+    """
+    config = request.config
+    calls = config.getoption("--bench-calls")
+    baseline_path = config.getoption("--bench-baseline")
+    baseline = {}
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = {result["name"]: result for result in json.load(f)["results"]}
+
+    def measure(name: str, fn: Callable[[int], Any]) -> Dict[str, Any]:
+        fn(0)  # Warm caches and lazy initialisation
+
+        latencies = []
+        for i in range(calls):
+            start = time.perf_counter()
+            fn(i)
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+
+        peaks = []
+        blocks = []
+        tracemalloc.start()
+        try:
+            for i in range(min(calls, MEMORY_CALLS)):
+                tracemalloc.reset_peak()
+                before, _ = tracemalloc.get_traced_memory()
+                blocks_before = sys.getallocatedblocks()
+                fn(i)
+                _, peak = tracemalloc.get_traced_memory()
+                blocks.append(sys.getallocatedblocks() - blocks_before)
+                peaks.append(peak - before)
+        finally:
+            tracemalloc.stop()
+
+        result = {
+            "name": name,
+            "scale": config.getoption("--scale"),
+            "calls": calls,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "max_ms": latencies[-1] * 1000,
+            "peak_kib": statistics.median(peaks) / 1024,
+            "retained_blocks": statistics.mean(blocks),
+        }
+        _results.append(result)
+
+        previous = baseline.get(name)
+        if previous and previous.get("scale") == result["scale"]:
+            allowed = previous["p50_ms"] * (1 + config.getoption("--bench-tolerance"))
+            if result["p50_ms"] > allowed:
+                pytest.fail(f"{name}: p50 {result['p50_ms']:.2f}ms regressed past {allowed:.2f}ms "
+                            f"(baseline {previous['p50_ms']:.2f}ms)")
+        return result
+
+    return measure
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    if not _results:
+        return
+    terminalreporter.section("benchmark results")
+    terminalreporter.write_line(
+        f"{'benchmark':<28} {'scale':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} "
+        f"{'peak KiB':>10} {'retained':>9}"
+    )
+    for result in _results:
+        terminalreporter.write_line(
+            f"{result['name']:<28} {result['scale']:>6} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+            f"{result['p99_ms']:>9.2f} {result['max_ms']:>9.2f} {result['peak_kib']:>10.0f} "
+            f"{result['retained_blocks']:>9.1f}"
+        )
+
+    path = config.getoption("--bench-json")
+    if path:
+        with open(path, "w") as f:
+            json.dump({"results": _results}, f, indent=2)
+        terminalreporter.write_line(f"Wrote {path}")
@@ -0,0 +1,170 @@
+# benchmarks/fake_supabase.py
+#
+# In-process fake of the Supabase (PostgREST) REST API, served through an
+# httpx.MockTransport so recommenders run their real request code without a
+# network. Supports the filters the recommenders and listings use: eq, neq,
+# lt, lte, gt, gte, in, is, not.is and or=(...) with nested and(...), plus
+# select, order (one or more columns), limit and offset. Equality filters on
+# indexed columns are answered from hash indexes so large tables stay cheap
+# to query.
+
+import json
+from collections import defaultdict
+from typing import List, Dict, Any, Callable, Optional
+import httpx
+
+INDEXED_COLUMNS = ("id", "owner_id", "status", "book_id", "from_user_id", "to_user_id")
+RESERVED_PARAMS = ("select", "order", "limit", "offset")
+COMPARISONS = {
+    "lt": lambda a, b: a < b,
+    "lte": lambda a, b: a <= b,
+    "gt": lambda a, b: a > b,
+    "gte": lambda a, b: a >= b,
+}
+
+
+def _unquote(operand: str) -> str:
+    if len(operand) >= 2 and operand[0] == operand[-1] == '"':
+        return operand[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return operand
+
+
+def _split(expression: str) -> List[str]:
+    """Split a logic filter's terms on the commas outside parentheses and quotes"""
+    terms, depth, quoted, start = [], 0, False, 0
+    for i, char in enumerate(expression):
+        if char == '"' and expression[i - 1] != "\\":
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and char == "," and depth == 0:
+            terms.append(expression[start:i])
+            start = i + 1
+    terms.append(expression[start:])
+    return terms
+
+
+def _logic_matcher(operator: str, expression: str) -> Callable[[Dict[str, Any]], bool]:
+    """Matcher for or=(...) / and(...): terms are column.operator.value or nested logic"""
+    matchers = []
+    for term in _split(expression.strip()[1:-1]):
+        name, _, rest = term.partition("(")
+        if name in ("and", "or"):
+            matchers.append(_logic_matcher(name, "(" + rest))
+        else:
+            column, _, condition = term.partition(".")
+            matchers.append(_matcher(column, condition))
+    combine = any if operator == "or" else all
+    return lambda row: combine(match(row) for match in matchers)
+
+
+def _compare(value: Any, operand: str, compare: Callable[[Any, Any], bool]) -> bool:
+    if value is None:
+        return False
+    if isinstance(value, (int, float)):
+        return compare(value, float(operand))
+    return compare(str(value), operand)
+
+
+def _matcher(column: str, expression: str) -> Callable[[Dict[str, Any]], bool]:
+    if column in ("or", "and"):
+        return _logic_matcher(column, expression)
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    operator, _, operand = expression.partition(".")
+    operand = _unquote(operand)
+
+    if operator in COMPARISONS:
+        compare = COMPARISONS[operator]
+        test = lambda row: _compare(row.get(column), operand, compare)
+    elif operator == "eq":
+        test = lambda row: str(row.get(column)) == operand
+    elif operator == "neq":
+        test = lambda row: str(row.get(column)) != operand
+    elif operator == "in":
+        values = set(operand.strip("()").split(","))
+        test = lambda row: str(row.get(column)) in values
+    elif operator == "is" and operand == "null":
+        test = lambda row: row.get(column) is None
+    else:
+        raise ValueError(f"Unsupported filter {column}={expression}")
+    return (lambda row: not test(row)) if negate else test
+
+
+class FakeSupabase:
+    """Tables of rows plus the MockTransport handler that serves them"""
+
+    def __init__(self, tables: Dict[str, List[Dict[str, Any]]]):
+        self.tables = tables
+        self.requests = 0
+        self.indexes: Dict[str, Dict[str, Dict[str, List[int]]]] = {}
+        for name, rows in tables.items():
+            indexes = {}
+            for column in INDEXED_COLUMNS:
+                if rows and column in rows[0]:
+                    index = defaultdict(list)
+                    for position, row in enumerate(rows):
+                        index[str(row.get(column))].append(position)
+                    indexes[column] = index
+            self.indexes[name] = indexes
+
+    def _candidates(self, table: str, filters: Dict[str, str]) -> Optional[List[int]]:
+        """Row positions narrowed by the most selective indexed eq/in filter"""
+        best = None
+        for column, expression in filters.items():
+            index = self.indexes[table].get(column)
+            if index is None:
+                continue
+            if expression.startswith("eq."):
+                positions = index.get(expression[3:], [])
+            elif expression.startswith("in."):
+                positions = sorted(p for value in expression[3:].strip("()").split(",") for p in index.get(value, []))
+            else:
+                continue
+            if best is None or len(positions) < len(best):
+                best = positions
+        return best
+
+    def query(self, table: str, params: Dict[str, str]) -> List[Dict[str, Any]]:
+        rows = self.tables[table]
+        filters = {key: value for key, value in params.items() if key not in RESERVED_PARAMS}
+        positions = self._candidates(table, filters)
+        candidates = rows if positions is None else [rows[p] for p in positions]
+
+        matchers = [_matcher(column, expression) for column, expression in filters.items()]
+        result = [row for row in candidates if all(match(row) for match in matchers)]
+
+        if "order" in params:
+            # Stable sorts from the last column to the first give the combined order
+            for term in reversed(params["order"].split(",")):
+                column, _, direction = term.partition(".")
+                result.sort(key=lambda row: (row.get(column) is None, row.get(column)),
+                            reverse=direction.startswith("desc"))
+        offset = int(params.get("offset", 0))
+        if "limit" in params:
+            result = result[offset:offset + int(params["limit"])]
+        elif offset:
+            result = result[offset:]
+
+        columns = params.get("select", "*")
+        if columns != "*":
+            names = [name.strip() for name in columns.split(",")]
+            result = [{name: row.get(name) for name in names} for row in result]
+        return result
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        table = request.url.path.rstrip("/").rsplit("/", 1)[-1]
+        if request.method != "GET" or table not in self.tables:
+            return httpx.Response(404, json={"message": f"Unsupported request {request.method} {request.url}"})
+        try:
+            rows = self.query(table, dict(request.url.params))
+        except ValueError as e:
+            return httpx.Response(400, json={"message": str(e)})
+        return httpx.Response(200, content=json.dumps(rows), headers={"Content-Type": "application/json"})
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
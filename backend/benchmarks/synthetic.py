@@ -0,0 +1,132 @@
+# benchmarks/synthetic.py
+#
+# Deterministic synthetic users, books and book_request history for benchmarks.
+# The same scale and seed always produce the same rows.
+
+import json
+from typing import List, Dict, Any
+import numpy as np
+from app.services.recommenders.genre_based_recommender import GENRES
+
+# Scale name -> number of books; users and requests are derived from it
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+BOOKS_PER_USER = 4
+REQUESTS_PER_BOOK = 0.5
+
+# Metro areas owners cluster around (lat, lng, spread in degrees)
+METROS = [
+    (40.71, -74.01, 0.6),   # New York
+    (34.05, -118.24, 0.8),  # Los Angeles
+    (41.88, -87.63, 0.5),   # Chicago
+    (29.76, -95.37, 0.5),   # Houston
+    (47.61, -122.33, 0.4),  # Seattle
+    (51.51, -0.13, 0.5),    # London
+    (1.35, 103.82, 0.2),    # Singapore
+]
+METRO_WEIGHTS = [0.3, 0.2, 0.15, 0.1, 0.1, 0.1, 0.05]
+
+CONDITIONS = ["New", "Like New", "Good", "Fair", "Poor"]
+WORDS = [f"word{i}" for i in range(5_000)]
+
+
+def user_id(i: int) -> str:
+    """UUID-shaped, like Supabase auth ids"""
+    return f"00000000-0000-4000-8000-{i:012d}"
+
+
+def genre_popularity(rng: np.random.Generator) -> np.ndarray:
+    """Zipf-like genre popularity in a seeded random order"""
+    weights = 1 / np.arange(1, len(GENRES) + 1)
+    rng.shuffle(weights)
+    return weights / weights.sum()
+
+
+def generate_users(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = np.random.default_rng(seed)
+    popularity = genre_popularity(np.random.default_rng(seed + 1))
+    metros = rng.choice(len(METROS), size=count, p=METRO_WEIGHTS)
+    offsets = rng.normal(size=(count, 2))
+    genre_counts = rng.integers(1, 4, size=count)
+    has_location = rng.random(count) >= 0.1   # 10% never set a location
+    has_genres = rng.random(count) >= 0.05    # 5% never picked genres
+
+    users = []
+    for i in range(count):
+        lat, lng, spread = METROS[metros[i]]
+        favorite_genres = (
+            [GENRES[g] for g in rng.choice(len(GENRES), size=genre_counts[i], replace=False, p=popularity)]
+            if has_genres[i] else None
+        )
+        location = (
+            json.dumps({"latitude": round(lat + offsets[i, 0] * spread, 6),
+                        "longitude": round(lng + offsets[i, 1] * spread, 6)})
+            if has_location[i] else None
+        )
+        users.append({
+            "id": user_id(i),
+            "username": f"reader{i}",
+            "favorite_genres": favorite_genres,
+            "location": location,
+        })
+    return users
+
+
+def generate_books(count: int, user_count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = np.random.default_rng(seed + 2)
+    popularity = genre_popularity(np.random.default_rng(seed + 1))
+    genres = rng.choice(len(GENRES), size=count, p=popularity)
+    # A few prolific owners list many books
+    owners = np.minimum((rng.pareto(1.5, size=count) * user_count / 20).astype(np.int64), user_count - 1)
+    statuses = rng.choice(["available", "reserved", "exchanged"], size=count, p=[0.8, 0.1, 0.1])
+    conditions = rng.choice(len(CONDITIONS), size=count)
+    words = rng.choice(len(WORDS), size=(count, 12))
+    days = rng.integers(0, 365, size=count)
+
+    return [
+        {
+            "id": i + 1,
+            "title": " ".join(WORDS[w] for w in words[i, :3]).title(),
+            "author": f"Author {words[i, 3]}",
+            "genre": GENRES[genres[i]],
+            "condition": CONDITIONS[conditions[i]],
+            "description": " ".join(WORDS[w] for w in words[i, 4:]),
+            "status": str(statuses[i]),
+            "owner_id": user_id(int(owners[i])),
+            "image_url": None,
+            "created_at": f"2025-{1 + days[i] // 31 % 12:02d}-{1 + days[i] % 28:02d}T12:00:00+00:00",
+        }
+        for i in range(count)
+    ]
+
+
+def generate_requests(count: int, books: List[Dict[str, Any]], user_count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = np.random.default_rng(seed + 3)
+    # Popular books attract most requests
+    book_index = np.minimum((rng.pareto(1.2, size=count) * len(books) / 50).astype(np.int64), len(books) - 1)
+    requesters = rng.integers(0, user_count, size=count)
+    statuses = rng.choice(["pending", "accepted", "rejected"], size=count, p=[0.3, 0.4, 0.3])
+    seconds = rng.integers(0, 90 * 86400, size=count)
+
+    requests = []
+    for i in range(count):
+        book = books[book_index[i]]
+        days, rest = divmod(int(seconds[i]), 86400)
+        requests.append({
+            "id": f"10000000-0000-4000-8000-{i:012d}",
+            "book_id": book["id"],
+            "from_user_id": user_id(int(requesters[i])),
+            "to_user_id": book["owner_id"],
+            "status": str(statuses[i]),
+            "created_at": f"2025-{1 + days // 30:02d}-{1 + days % 28:02d}T{rest // 3600:02d}:{rest // 60 % 60:02d}:00+00:00",
+        })
+    return requests
+
+
+def generate_dataset(scale: str = "1k", seed: int = 0) -> Dict[str, List[Dict[str, Any]]]:
+    """Users, books and book_request rows for a named scale (see SCALES)"""
+    book_count = SCALES[scale]
+    user_count = max(50, book_count // BOOKS_PER_USER)
+    users = generate_users(user_count, seed)
+    books = generate_books(book_count, user_count, seed)
+    requests = generate_requests(int(book_count * REQUESTS_PER_BOOK), books, user_count, seed)
+    return {"users": users, "books": books, "book_request": requests}
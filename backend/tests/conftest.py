@@ -0,0 +1,52 @@
+# tests/conftest.py
+#
+# Fixtures for the behavioural tests. Supabase is replaced by the in-process
+# fake from the benchmark suite (an httpx.MockTransport over synthetic rows),
+# so services run their real request code without a network.
+# Run from the backend directory:  python -m pytest tests
+
+import os
+
+FAKE_SUPABASE_URL = "http://supabase.test"
+
+# Recommender modules read these at import; the fake accepts any key, but
+# the Supabase client (app.database) insists it looks like a JWT
+os.environ.setdefault("SUPABASE_URL", FAKE_SUPABASE_URL)
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.test")
+# Never write fake users where the app would memory-map them
+os.environ["USER_LOCATION_STORE_PATH"] = ""
+
+import asyncio
+import random
+from typing import Dict, Any, List
+import pytest
+from benchmarks.fake_supabase import FakeSupabase
+from benchmarks.synthetic import generate_dataset
+
+SCALE = "1k"
+SAMPLE_USERS = 50
+
+
+@pytest.fixture(scope="session")
+def dataset() -> Dict[str, List[Dict[str, Any]]]:
+    return generate_dataset(SCALE, 0)
+
+
+@pytest.fixture(scope="session")
+def fake_supabase(dataset) -> FakeSupabase:
+    return FakeSupabase(dataset)
+
+
+@pytest.fixture(scope="session")
+def run():
+    """Run a coroutine to completion on one event loop shared by the session"""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def sample_users(dataset) -> List[str]:
+    """Users with both a location and favourite genres, so every source has work to do"""
+    eligible = [user["id"] for user in dataset["users"] if user["location"] and user["favorite_genres"]]
+    return random.Random(0).sample(eligible, min(SAMPLE_USERS, len(eligible)))
@@ -0,0 +1,93 @@
+# tests/test_auto_fill_batch.py
+#
+# Batch auto-fill: results stream back in completion order with their
+# request index, a failed title is reported without stopping the rest, no
+# more than `concurrency` lookups run at once, and a caller that stops
+# reading cancels the lookups still waiting.
+# Run from the backend directory:  python -m pytest tests/test_auto_fill_batch.py
+
+import asyncio
+import json
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.dependencies.auth import get_current_user
+from app.routers import book
+from app.services import book_service
+
+# title -> seconds its lookup takes
+DELAYS = {"Slow": 0.15, "Medium": 0.08, "Fast": 0.0, "Broken": 0.04}
+
+
+class StubLookup:
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+        self.started = []
+
+    async def __call__(self, title, client=None):
+        self.started.append(title)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(DELAYS.get(title, 0.01))
+            if title == "Broken":
+                raise ValueError("model returned nonsense")
+            return {"title": title, "author": f"Author of {title}"}
+        finally:
+            self.running -= 1
+
+
+async def collect(titles, concurrency, stop_after=None):
+    results = []
+    stream = book_service.auto_fill_batch(titles, None, concurrency=concurrency)
+    async for result in stream:
+        results.append(result)
+        if len(results) == stop_after:
+            await stream.aclose()
+            break
+    return results
+
+
+def test_results_stream_in_completion_order(monkeypatch, run):
+    monkeypatch.setattr(book_service, "auto_fill_book_details", StubLookup())
+    results = run(collect(["Slow", "Medium", "Fast", "Broken"], concurrency=4))
+
+    assert [result["title"] for result in results] == ["Fast", "Broken", "Medium", "Slow"]
+    assert [result["index"] for result in results] == [2, 3, 1, 0]
+    assert results[1] == {"index": 3, "title": "Broken", "error": "Failed to auto-fill book info"}
+    assert results[0]["details"]["author"] == "Author of Fast"
+
+
+def test_concurrency_is_bounded(monkeypatch, run):
+    lookup = StubLookup()
+    monkeypatch.setattr(book_service, "auto_fill_book_details", lookup)
+    titles = [f"Title {i}" for i in range(20)]
+    results = run(collect(titles, concurrency=3))
+
+    assert sorted(result["index"] for result in results) == list(range(20))
+    assert lookup.peak == 3
+
+
+def test_stopping_early_cancels_waiting_lookups(monkeypatch, run):
+    lookup = StubLookup()
+    monkeypatch.setattr(book_service, "auto_fill_book_details", lookup)
+    titles = [f"Title {i}" for i in range(20)]
+    results = run(collect(titles, concurrency=2, stop_after=1))
+
+    assert len(results) == 1
+    assert len(lookup.started) < len(titles)
+    assert lookup.running == 0
+
+
+def test_route_streams_ndjson(monkeypatch):
+    monkeypatch.setattr(book_service, "auto_fill_book_details", StubLookup())
+    app = FastAPI()
+    app.include_router(book.router)
+    app.state.http_client = None
+    app.dependency_overrides[get_current_user] = lambda: {"sub": "user"}
+
+    response = TestClient(app).post("/books/auto-fill/batch", json={"titles": ["Slow", "Fast"]})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["index"] for line in lines] == [1, 0]
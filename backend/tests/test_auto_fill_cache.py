@@ -0,0 +1,44 @@
+# tests/test_auto_fill_cache.py
+#
+# Auto-fill cache counters and the route that exposes them: a repeated title
+# is a hit, concurrent callers for one title share a call and count as
+# coalesced, and GET /books/auto-fill/cache/stats reports the counters.
+# Run from the backend directory:  python -m pytest tests/test_auto_fill_cache.py
+
+import asyncio
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.dependencies.auth import get_current_user
+from app.routers import book
+from app.services.auto_fill_cache import AutoFillCache
+
+
+def test_counters(tmp_path, run):
+    cache = AutoFillCache(path=str(tmp_path / "auto_fill.db"))
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"author": "Frank Herbert"}
+
+    async def lookups():
+        await asyncio.gather(*(cache.get_or_fetch("Dune", fetch) for _ in range(3)))
+        return await cache.get_or_fetch("  dune! ", fetch)
+
+    assert run(lookups()) == {"author": "Frank Herbert"}
+    assert len(calls) == 1
+    assert cache.stats() == {"hits": 1, "misses": 1, "coalesced": 2, "ttl": cache.ttl}
+
+
+def test_stats_route(tmp_path, monkeypatch):
+    cache = AutoFillCache(path=str(tmp_path / "auto_fill.db"))
+    cache.hits, cache.misses, cache.coalesced = 4, 2, 1
+    monkeypatch.setattr(book, "auto_fill_cache", cache)
+
+    app = FastAPI()
+    app.include_router(book.router)
+    app.dependency_overrides[get_current_user] = lambda: {"sub": "user"}
+    response = TestClient(app).get("/books/auto-fill/cache/stats")
+    assert response.status_code == 200
+    assert response.json() == {"hits": 4, "misses": 2, "coalesced": 1, "ttl": cache.ttl}
@@ -0,0 +1,71 @@
+# tests/test_book_catalog.py
+#
+# Book catalog lookups: find() with any mix of genre, owner, status and
+# exclude_owner returns the same books, in catalog order, as filtering every
+# row, and upserts and removals keep the indexes current.
+# Run from the backend directory:  python -m pytest tests/test_book_catalog.py
+
+import itertools
+import pytest
+from app.services.book_catalog import BookCatalog
+
+
+def brute_force(books, genre=None, owner_id=None, status=None, exclude_owner=None):
+    return [
+        book for book in books
+        if (genre is None or book["genre"] == genre)
+        and (owner_id is None or book["owner_id"] == owner_id)
+        and (status is None or book["status"] == status)
+        and (exclude_owner is None or book["owner_id"] != exclude_owner)
+    ]
+
+
+@pytest.fixture
+def catalog(dataset):
+    catalog = BookCatalog()
+    catalog.load(dict(book) for book in dataset["books"])
+    return catalog
+
+
+def ids(books):
+    return [book["id"] for book in books]
+
+
+def test_find_matches_brute_force(catalog, dataset):
+    books = dataset["books"]
+    owner = books[0]["owner_id"]
+    genre = books[0]["genre"]
+    for genre_filter, owner_filter, status_filter, exclude_filter in itertools.product(
+        (None, genre), (None, owner), (None, "available"), (None, owner, books[1]["owner_id"])
+    ):
+        expected = brute_force(books, genre_filter, owner_filter, status_filter, exclude_filter)
+        found = catalog.find(genre=genre_filter, owner_id=owner_filter, status=status_filter,
+                             exclude_owner=exclude_filter)
+        assert ids(found) == ids(expected)
+
+
+def test_exclude_owner_drops_only_that_owner(catalog, dataset):
+    owner = dataset["books"][0]["owner_id"]
+    available = catalog.find(status="available")
+    others = catalog.find(status="available", exclude_owner=owner)
+    assert others and all(book["owner_id"] != owner for book in others)
+    assert len(available) - len(others) == sum(book["owner_id"] == owner for book in available)
+
+
+def test_unknown_values_match_nothing(catalog):
+    assert catalog.find(genre="No Such Genre") == []
+    assert catalog.find(owner_id="nobody", status="available") == []
+
+
+def test_upsert_and_remove_keep_indexes_current(catalog, dataset):
+    book = dataset["books"][0]
+    catalog.upsert({"id": book["id"], "status": "reserved", "genre": "Poetry"})
+    assert book["id"] not in ids(catalog.find(genre=book["genre"]))
+    assert book["id"] in ids(catalog.find(genre="Poetry", status="reserved"))
+    # Partial rows are merged into the cached one
+    assert catalog.get(book["id"])["title"] == book["title"]
+
+    catalog.remove(book["id"])
+    assert catalog.get(book["id"]) is None
+    assert catalog.find(genre="Poetry", status="reserved", owner_id=book["owner_id"]) == []
+    assert all(str(book["id"]) not in bucket for index in catalog.indexes.values() for bucket in index.values())
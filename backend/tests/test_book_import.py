@@ -0,0 +1,88 @@
+# tests/test_book_import.py
+#
+# Bulk import reports: a batch the database rejects is retried row by row,
+# so only the offending row fails and the rest of its batch is imported, and
+# parse and validation errors are reported with their line numbers.
+# Run from the backend directory:  python -m pytest tests/test_book_import.py
+
+import io
+import itertools
+from app.services import book_import
+
+HEADER = "title,author,genre,condition,status,description\n"
+
+
+class FakeInsert:
+    def __init__(self, client, rows):
+        self.client = client
+        self.rows = rows
+
+    def execute(self):
+        self.client.calls.append([row["title"] for row in self.rows])
+        if any(row["title"] == self.client.rejected_title for row in self.rows):
+            raise Exception("violates check constraint")
+        return type("Response", (), {"data": [{**row, "id": next(self.client.ids)} for row in self.rows]})
+
+
+class FakeClient:
+    """Stands in for the supabase client: books.insert fails for any batch holding the rejected title"""
+
+    def __init__(self, rejected_title):
+        self.rejected_title = rejected_title
+        self.calls = []
+        self.ids = itertools.count(1)
+
+    def table(self, name):
+        assert name == "books"
+        return self
+
+    def insert(self, rows):
+        return FakeInsert(self, rows)
+
+
+def csv_rows(*titles):
+    lines = [f"{title},Author,Fiction,Good,available,\n" for title in titles]
+    return book_import.iter_csv_rows(io.StringIO(HEADER + "".join(lines)))
+
+
+def test_rejected_row_is_retried_alone(monkeypatch):
+    applied = []
+    monkeypatch.setattr(book_import, "apply_book_changes", lambda rows, **kwargs: applied.extend(rows))
+    client = FakeClient(rejected_title="Bad")
+
+    report = book_import.import_books(csv_rows("A", "Bad", "C", "D", "E"), "owner", batch_size=3, client=client)
+
+    assert client.calls == [["A", "Bad", "C"], ["A"], ["Bad"], ["C"], ["D", "E"]]
+    assert report["imported"] == 4 and report["failed"] == 1
+    assert [error["row"] for error in report["errors"]] == [3]  # The header is line 1
+    assert report["errors"][0]["error"].startswith("Insert failed")
+    assert sorted(book["title"] for book in applied) == ["A", "C", "D", "E"]
+    assert all(book["owner_id"] == "owner" for book in applied)
+
+
+def test_invalid_rows_are_reported_and_skipped(monkeypatch):
+    monkeypatch.setattr(book_import, "apply_book_changes", lambda rows, **kwargs: None)
+    client = FakeClient(rejected_title=None)
+    rows = iter([
+        (2, {"title": "A", "author": "X", "genre": "Fiction", "condition": "Good", "status": "available"}, None),
+        (3, {"title": "No author"}, None),
+        (4, {}, "Invalid JSON: Expecting value"),
+        (5, {"title": "B", "author": "Y", "genre": "Fiction", "condition": "Good", "status": "available"}, None),
+    ])
+
+    report = book_import.import_books(rows, "owner", batch_size=10, client=client)
+
+    assert client.calls == [["A", "B"]]
+    assert report["imported"] == 2 and report["failed"] == 2
+    assert [error["row"] for error in report["errors"]] == [3, 4]
+    assert "author" in report["errors"][0]["error"]
+
+
+def test_errors_are_capped_but_counted():
+    report = book_import.ImportReport(max_errors=2)
+    for line in (5, 4, 3, 2, 1):
+        report.fail(line, "Invalid JSON")
+
+    result = report.as_dict()
+    assert result["failed"] == 5 and result["errors_truncated"]
+    assert [error["row"] for error in result["errors"]] == [4, 5]
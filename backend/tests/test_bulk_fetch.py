@@ -0,0 +1,83 @@
+# tests/test_bulk_fetch.py
+#
+# Chunked bulk fetches: id lists are split within the count and length caps
+# without losing or repeating ids, every matching row comes back once, no
+# more than `concurrency` chunk requests are in flight, and a failed chunk
+# raises. Run from the backend directory:
+#     python -m pytest tests/test_bulk_fetch.py
+
+import asyncio
+import httpx
+import pytest
+from app.core.bulk_fetch import chunk_ids, fetch_rows_by_ids
+from benchmarks.fake_supabase import FakeSupabase
+from tests.conftest import FAKE_SUPABASE_URL
+
+BOOKS_URL = f"{FAKE_SUPABASE_URL}/rest/v1/books?select=id,owner_id&status=eq.available"
+
+
+def test_chunks_respect_both_caps():
+    ids = [f"owner-{i:0{i % 7 + 1}d}" for i in range(1000)] + ["owner-1", "owner-2"]
+    chunks = list(chunk_ids(ids, chunk_size=40, max_length=300))
+
+    assert all(len(chunk) <= 40 and len(",".join(chunk)) <= 300 for chunk in chunks)
+    assert [value for chunk in chunks for value in chunk] == list(dict.fromkeys(ids))
+    assert list(chunk_ids([])) == []
+
+
+class CountingSupabase(FakeSupabase):
+    """A fake that records how many requests overlap and can fail chosen ids"""
+
+    def __init__(self, tables, fail_id=None):
+        super().__init__(tables)
+        self.fail_id = fail_id
+        self.in_flight = 0
+        self.peak = 0
+        self.chunk_requests = 0
+
+    async def counting_handler(self, request: httpx.Request) -> httpx.Response:
+        self.chunk_requests += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(0.005)
+            if self.fail_id is not None and str(self.fail_id) in str(request.url):
+                return httpx.Response(500, json={"message": "boom"})
+            return self.handler(request)
+        finally:
+            self.in_flight -= 1
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.counting_handler))
+
+
+@pytest.mark.parametrize("concurrency", [1, 3, 8])
+def test_every_row_once_within_the_concurrency(dataset, run, concurrency):
+    fake = CountingSupabase(dataset)
+    owners = sorted({book["owner_id"] for book in dataset["books"]})
+
+    async def fetch():
+        async with fake.client() as client:
+            return await fetch_rows_by_ids(client, BOOKS_URL, "owner_id", owners + owners[:10], {},
+                                           chunk_size=10, concurrency=concurrency)
+
+    rows = run(fetch())
+    expected = sorted(book["id"] for book in dataset["books"] if book["status"] == "available")
+    assert sorted(row["id"] for row in rows) == expected
+    assert fake.chunk_requests == len(list(chunk_ids(owners, chunk_size=10)))
+    assert fake.peak <= concurrency
+    if concurrency > 1:
+        assert fake.peak > 1
+
+
+def test_a_failed_chunk_raises(dataset, run):
+    owners = sorted({book["owner_id"] for book in dataset["books"]})
+    fake = CountingSupabase(dataset, fail_id=owners[25])
+
+    async def fetch():
+        async with fake.client() as client:
+            return await fetch_rows_by_ids(client, BOOKS_URL, "owner_id", owners, {}, chunk_size=10)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        run(fetch())
+    assert fake.in_flight == 0
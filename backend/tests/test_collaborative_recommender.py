@@ -0,0 +1,96 @@
+# tests/test_collaborative_recommender.py
+#
+# The co-request matrix against counts taken over every pair of requesters,
+# incremental records matching a rebuild, and the recommender leaving out
+# books the user already requested, owns, or can't get.
+# Run from the backend directory:  python -m pytest tests/test_collaborative_recommender.py
+
+import math
+from collections import defaultdict
+import pytest
+from app.services.book_catalog import BookCatalog
+from app.services.recommenders import collaborative_recommender as collaborative_module
+from app.services.recommenders.collaborative_recommender import CoRequestMatrix, CollaborativeRecommender
+
+
+def oldest_first(requests):
+    return sorted(requests, key=lambda request: request["created_at"])
+
+
+def brute_force_similarity(requests):
+    """(book, book) -> cosine of their requester sets"""
+    requesters = defaultdict(set)
+    for request in requests:
+        requesters[str(request["book_id"])].add(request["from_user_id"])
+    return {
+        (a, b): len(requesters[a] & requesters[b]) / math.sqrt(len(requesters[a]) * len(requesters[b]))
+        for a in requesters for b in requesters
+        if a != b and requesters[a] & requesters[b]
+    }
+
+
+def test_similarity_matches_requester_sets(dataset):
+    requests = oldest_first(dataset["book_request"])
+    matrix = CoRequestMatrix(max_history=len(requests))
+    matrix.build(requests)
+    expected = brute_force_similarity(requests)
+
+    found = {
+        (book_id, other_id): similarity
+        for book_id in matrix.book_counts
+        for other_id, similarity in matrix.neighbours(book_id, k=len(requests))
+    }
+    assert found.keys() == expected.keys()
+    for pair, similarity in expected.items():
+        assert found[pair] == pytest.approx(similarity)
+
+
+def test_records_match_a_rebuild(dataset):
+    requests = oldest_first(dataset["book_request"])
+    built = CoRequestMatrix()
+    built.build(requests)
+    recorded = CoRequestMatrix()
+    recorded.build(requests[:100])
+    for request in requests[100:]:
+        recorded.record(request["from_user_id"], request["book_id"])
+
+    assert recorded.book_counts == built.book_counts
+    assert recorded.co_counts == built.co_counts
+
+
+def test_history_is_bounded():
+    matrix = CoRequestMatrix(max_history=2)
+    matrix.build({"from_user_id": "u", "book_id": book_id} for book_id in (1, 2, 3, 4, 4))
+    # Book 4 pairs with the two requests before it; the repeat adds nothing
+    assert matrix.co_counts["4"] == {"2": 1, "3": 1}
+    assert matrix.book_counts["4"] == 1
+
+
+BOOKS = [
+    {"id": book_id, "title": f"Book {book_id}", "genre": "Fiction", "owner_id": owner, "status": status}
+    for book_id, owner, status in [
+        (1, "x", "available"), (2, "x", "available"), (3, "y", "available"),
+        (4, "me", "available"), (5, "y", "reserved"), (6, "y", "available"),
+    ]
+]
+# Readers a and b requested 1 and 2 like "me"; they also went for 3, 4 (owned by me) and 5 (reserved)
+REQUESTS = [
+    {"from_user_id": user_id, "book_id": book_id}
+    for user_id, book_ids in [("a", (1, 3, 4, 5)), ("b", (2, 3, 6)), ("me", (1, 2))]
+    for book_id in book_ids
+]
+
+
+def test_recommends_co_requested_books(monkeypatch):
+    matrix = CoRequestMatrix()
+    matrix.build(REQUESTS)
+    catalog = BookCatalog()
+    catalog.load(dict(book) for book in BOOKS)
+    monkeypatch.setattr(collaborative_module, "co_requests", matrix)
+    monkeypatch.setattr(collaborative_module, "book_catalog", catalog)
+
+    books = list(CollaborativeRecommender().rank_from_catalog("me"))
+    # 3 was co-requested with both of my books, 6 with one
+    assert [book["id"] for book in books] == [3, 6]
+    assert books[0]["score"] > books[1]["score"]
+    assert books[1]["reason"] == "People who requested Book 2 also requested this"
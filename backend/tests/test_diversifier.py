@@ -0,0 +1,78 @@
+# tests/test_diversifier.py
+#
+# MMR re-ranking: picks match a direct evaluation of the MMR formula, scores
+# never increase down the list, lambda 1 keeps the relevance order, and a
+# close runner-up from another genre is pulled above same-genre duplicates.
+# Run from the backend directory:  python -m pytest tests/test_diversifier.py
+
+import random
+import pytest
+from app.services.recommenders.genre_based_recommender import GENRE_IDS
+from app.services.recommenders.recommendation_diversifier import RecommendationDiversifier
+
+GENRES = list(GENRE_IDS)
+
+
+def candidates(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        {"id": i, "genre": rng.choice(GENRES + ["Zine"]), "score": rng.uniform(0, 100)}
+        for i in range(count)
+    ]
+
+
+def reference_mmr(diversifier, books, limit):
+    """MMR evaluated term by term, recomputing each max similarity from scratch"""
+    similarity = diversifier.similarity_matrix(books)
+    top_score = max(book["score"] for book in books)
+    weight = diversifier.mmr_lambda
+    picked, remaining = [], list(range(len(books)))
+    while remaining and len(picked) < limit:
+        def marginal(i):
+            redundancy = max((similarity[i][j] for j in picked), default=0.0)
+            return weight * books[i]["score"] / top_score - (1 - weight) * redundancy
+        best = max(remaining, key=lambda i: (marginal(i), -i))
+        picked.append(best)
+        remaining.remove(best)
+    return [books[i]["id"] for i in picked]
+
+
+@pytest.mark.parametrize("mmr_lambda", [0.3, 0.7])
+def test_picks_match_the_formula(mmr_lambda):
+    diversifier = RecommendationDiversifier(mode="mmr", mmr_lambda=mmr_lambda, content_weight=0)
+    books = candidates(60)
+    reranked = diversifier.mmr_rerank(books, limit=20)
+    assert [book["id"] for book in reranked] == reference_mmr(diversifier, books, 20)
+
+
+def test_scores_never_increase_and_inputs_are_untouched():
+    diversifier = RecommendationDiversifier(mode="mmr", content_weight=0)
+    books = candidates(40, seed=1)
+    before = [dict(book) for book in books]
+    reranked = diversifier.mmr_rerank(books)
+
+    scores = [book["score"] for book in reranked]
+    assert scores == sorted(scores, reverse=True)
+    assert sorted(book["id"] for book in reranked) == list(range(40))
+    assert {book["id"]: book["original_score"] for book in reranked} == {book["id"]: book["score"] for book in before}
+    assert books == before
+
+
+def test_lambda_one_keeps_relevance_order():
+    diversifier = RecommendationDiversifier(mode="mmr", mmr_lambda=1.0, content_weight=0)
+    books = candidates(30, seed=2)
+    reranked = diversifier.mmr_rerank(books, limit=10)
+    expected = sorted(books, key=lambda book: book["score"], reverse=True)[:10]
+    assert [book["id"] for book in reranked] == [book["id"] for book in expected]
+
+
+def test_another_genre_beats_duplicates():
+    diversifier = RecommendationDiversifier(mode="mmr", mmr_lambda=0.5, content_weight=0)
+    books = [
+        {"id": 1, "genre": "Fantasy", "score": 100},
+        {"id": 2, "genre": "Fantasy", "score": 98},
+        {"id": 3, "genre": "Fantasy", "score": 96},
+        {"id": 4, "genre": "Business", "score": 90},
+    ]
+    reranked = diversifier.ensure_diversity(books, limit=3)
+    assert [book["id"] for book in reranked] == [1, 4, 2]
@@ -0,0 +1,75 @@
+# tests/test_genre_recommender.py
+#
+# Genre scoring through the similarity matrix, checked against a loop over
+# the similarity table: the same books with the same scores and matching
+# genres, highest first with ties in catalog order, and books with no genre
+# relevance left out.
+# Run from the backend directory:  python -m pytest tests/test_genre_recommender.py
+
+import random
+import pytest
+from app.services.recommenders.genre_based_recommender import (
+    GenreBasedRecommender, GENRES, GENRE_SIMILARITY, parse_favorite_genres,
+)
+
+
+def reference_scores(favorite_genres, books):
+    """Best similarity of each book's genre to any favorite, first favorite winning ties"""
+    scored = []
+    for book in books:
+        best_score, best_genre = 0.0, None
+        for favorite in favorite_genres:
+            if favorite in GENRE_SIMILARITY and book["genre"] in GENRE_SIMILARITY[favorite]:
+                similarity = GENRE_SIMILARITY[favorite][book["genre"]] * 100
+            else:
+                similarity = 100.0 if favorite == book["genre"] else 0.0
+            if similarity > best_score:
+                best_score, best_genre = similarity, favorite
+        if best_score > 0:
+            scored.append({**book, "score": best_score, "matching_genre": best_genre})
+    return sorted(scored, key=lambda book: book["score"], reverse=True)
+
+
+def candidates(count, seed):
+    rng = random.Random(seed)
+    return [{"id": i, "genre": rng.choice(GENRES + ["Zine", "Cookbooks"])} for i in range(count)]
+
+
+@pytest.mark.parametrize("favorite_genres", [
+    ["Fantasy"],
+    ["Business", "Poetry"],
+    ["Mystery", "Thriller", "Horror"],
+    ["Zine", "Science Fiction"],
+    ["Not A Genre"],
+])
+def test_scores_match_the_similarity_table(favorite_genres):
+    books = candidates(500, seed=len(favorite_genres))
+    ranked = list(GenreBasedRecommender().rank_books(favorite_genres, books))
+    expected = reference_scores(favorite_genres, books)
+
+    assert [book["id"] for book in ranked] == [book["id"] for book in expected]
+    assert [book["score"] for book in ranked] == pytest.approx([book["score"] for book in expected])
+    assert [book["matching_genre"] for book in ranked] == [book["matching_genre"] for book in expected]
+
+
+def test_limit_and_inputs_are_untouched():
+    books = candidates(200, seed=7)
+    before = [dict(book) for book in books]
+    recommender = GenreBasedRecommender()
+    top = recommender.score_books(["Fantasy"], books, limit=10)
+
+    assert len(top) == 10
+    assert [book["id"] for book in top] == [book["id"] for book in reference_scores(["Fantasy"], books)[:10]]
+    assert books == before
+
+
+@pytest.mark.parametrize("column, expected", [
+    (None, []),
+    ("", []),
+    ('["Fantasy", "Poetry"]', ["Fantasy", "Poetry"]),
+    ('"Fantasy"', ["Fantasy"]),
+    ("Fantasy", ["Fantasy"]),
+    (["Mystery"], ["Mystery"]),
+])
+def test_parse_favorite_genres(column, expected):
+    assert parse_favorite_genres(column) == expected
@@ -0,0 +1,49 @@
+# tests/test_http_client.py
+#
+# Who closes the recommenders' HTTP clients: a shared client is left to the
+# app lifespan, a client a recommender made for itself is closed by aclose(),
+# and one that never made a request is never opened.
+# Run from the backend directory:  python -m pytest tests/test_http_client.py
+
+import httpx
+import pytest
+from app.services.recommenders.genre_based_recommender import GenreBasedRecommender
+from app.services.recommenders.location_based_recommender import LocationBasedRecommender
+from app.services.recommenders.collaborative_recommender import CollaborativeRecommender
+from app.services.unified_recommendation_service import UnifiedRecommendationService
+
+RECOMMENDERS = (GenreBasedRecommender, LocationBasedRecommender, CollaborativeRecommender)
+
+
+@pytest.mark.parametrize("recommender_class", RECOMMENDERS)
+def test_a_shared_client_stays_open(recommender_class, run):
+    shared = httpx.AsyncClient()
+    recommender = recommender_class(client=shared)
+    assert recommender.client is shared
+    run(recommender.aclose())
+    assert not shared.is_closed
+    run(shared.aclose())
+
+
+@pytest.mark.parametrize("recommender_class", RECOMMENDERS)
+def test_an_own_client_is_created_on_use_and_closed(recommender_class, run):
+    recommender = recommender_class()
+    assert recommender._client is None
+    own = recommender.client
+    assert recommender.client is own
+    run(recommender.aclose())
+    assert own.is_closed
+    # A later request gets a fresh client rather than the closed one
+    assert not recommender.client.is_closed
+    run(recommender.aclose())
+
+
+def test_unified_service_closes_only_what_its_recommenders_own(run):
+    shared = httpx.AsyncClient()
+    service = UnifiedRecommendationService(location_recommender=LocationBasedRecommender(client=shared))
+    own = service.genre_recommender.client
+    run(service.aclose())
+    assert own.is_closed and not shared.is_closed
+    # Never used, so never opened
+    assert service.collaborative_recommender._client is None
+    run(shared.aclose())
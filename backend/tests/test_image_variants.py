@@ -0,0 +1,94 @@
+# tests/test_image_variants.py
+#
+# Image variants: thumbnails are cropped to the exact size of their kind,
+# medium variants fit the size cap without upscaling, EXIF orientation is
+# applied and the metadata dropped, transparency becomes white, and variants
+# already on disk are reused. Run from the backend directory:
+#     python -m pytest tests/test_image_variants.py
+
+import os
+import pytest
+from PIL import Image
+from app.services import image_variants
+from app.services.image_variants import render_variants, variant_urls, THUMBNAIL_SIZES
+
+ORIENTATION = 0x0112
+MAKE = 0x010F
+
+
+def photo(path, size, exif=None, mode="RGB", color=(200, 30, 30)):
+    image = Image.new(mode, size, color)
+    if exif:
+        image.save(path, "JPEG", exif=exif)
+    else:
+        image.save(path)
+    return str(path)
+
+
+def open_variant(path):
+    with Image.open(path) as image:
+        image.load()
+        return image
+
+
+@pytest.mark.parametrize("kind", list(THUMBNAIL_SIZES))
+def test_sizes(tmp_path, kind):
+    source = photo(tmp_path / "cover.jpg", (3000, 2000))
+    variants = render_variants(source, THUMBNAIL_SIZES[kind], medium_size=1024)
+
+    for extension, (pil_format, _) in image_variants.FORMATS.items():
+        thumbnail = open_variant(variants["thumbnail"][extension])
+        medium = open_variant(variants["medium"][extension])
+        assert thumbnail.format == pil_format
+        assert thumbnail.size == THUMBNAIL_SIZES[kind]
+        assert medium.size == (1024, 683)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".part")]
+
+
+def test_small_images_are_not_upscaled(tmp_path):
+    source = photo(tmp_path / "small.png", (300, 200))
+    variants = render_variants(source, (400, 300), medium_size=1024)
+    assert open_variant(variants["medium"]["jpeg"]).size == (300, 200)
+    assert open_variant(variants["thumbnail"]["jpeg"]).size == (400, 300)
+
+
+def test_orientation_is_applied_and_exif_dropped(tmp_path):
+    exif = Image.Exif()
+    exif[MAKE] = "Phone"
+    exif[ORIENTATION] = 6  # Rotated 90 degrees: stored landscape, shown portrait
+    source = photo(tmp_path / "phone.jpg", (1600, 1200), exif=exif)
+    variants = render_variants(source, (400, 300), medium_size=800)
+
+    for extension in image_variants.FORMATS:
+        medium = open_variant(variants["medium"][extension])
+        assert medium.size == (600, 800)
+        assert not medium.getexif()
+
+
+def test_transparency_becomes_white(tmp_path):
+    source = photo(tmp_path / "logo.png", (400, 300), mode="RGBA", color=(0, 0, 0, 0))
+    variants = render_variants(source, (400, 300))
+    pixel = open_variant(variants["thumbnail"]["jpeg"]).convert("RGB").getpixel((200, 150))
+    assert all(channel > 245 for channel in pixel)
+
+
+def test_existing_variants_are_reused(tmp_path):
+    source = photo(tmp_path / "cover.jpg", (800, 600))
+    variants = render_variants(source, (400, 300))
+    paths = [path for formats in variants.values() for path in formats.values()]
+    for path in paths:
+        os.utime(path, (0, 0))
+
+    assert render_variants(source, (400, 300)) == variants
+    assert all(os.path.getmtime(path) == 0 for path in paths)
+
+
+def test_generate_variants_in_the_pool(tmp_path, run):
+    source = photo(tmp_path / "cover.jpg", (1200, 900))
+    try:
+        variants = run(image_variants.generate_variants(source, "profile_photo"))
+    finally:
+        image_variants.shutdown()
+    assert open_variant(variants["thumbnail"]["webp"]).size == THUMBNAIL_SIZES["profile_photo"]
+    urls = variant_urls(variants, lambda path: "/uploads/" + os.path.basename(path))
+    assert urls["medium"]["jpeg"] == "/uploads/cover_medium.jpeg"
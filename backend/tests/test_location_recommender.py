@@ -0,0 +1,70 @@
+# tests/test_location_recommender.py
+#
+# Location recommendations served through the owner spatial index, checked
+# against a full scan of every user and book: the same books within the
+# radius, the user's own books left out, closest owners first. Covers both
+# the catalog path and the REST fallback used before the catalog loads.
+# Run from the backend directory:  python -m pytest tests/test_location_recommender.py
+
+import pytest
+from app.services.book_catalog import BookCatalog
+from app.services.recommenders import location_based_recommender as location_module
+from app.services.recommenders.location_based_recommender import LocationBasedRecommender
+from app.services.recommenders.spatial_index import OwnerSpatialIndex, haversine_miles
+from app.services.recommenders.user_location_store import UserLocationStore, parse_location
+
+RADII = (10.0, 50.0, 300.0)
+
+
+def brute_force(dataset, user_id, radius):
+    """book id -> distance of every available book whose owner is within the radius"""
+    locations = {user["id"]: parse_location(user["location"]) for user in dataset["users"]}
+    lat, lng = locations[user_id]
+    books = {}
+    for book in dataset["books"]:
+        owner_location = locations.get(book["owner_id"])
+        if book["status"] != "available" or book["owner_id"] == user_id or not owner_location:
+            continue
+        distance = haversine_miles(lat, lng, *owner_location)
+        if distance <= radius:
+            books[book["id"]] = distance
+    return books
+
+
+@pytest.fixture(params=["catalog", "rest"])
+def recommender(request, fake_supabase, monkeypatch, run):
+    store = UserLocationStore(path="")
+    catalog = BookCatalog()
+    monkeypatch.setattr(location_module, "user_location_store", store)
+    monkeypatch.setattr(location_module, "owner_index", OwnerSpatialIndex(store=store))
+    monkeypatch.setattr(location_module, "book_catalog", catalog)
+    if request.param == "rest":
+        # A catalog that never loads sends books through the chunked REST fetch
+        async def not_loaded(*args, **kwargs):
+            pass
+        monkeypatch.setattr(catalog, "ensure_loaded", not_loaded)
+
+    recommender = LocationBasedRecommender(client=fake_supabase.client())
+    yield recommender
+    run(recommender.client.aclose())
+
+
+def test_recommendations_match_a_full_scan(recommender, dataset, sample_users, run):
+    for user_id in sample_users[:10]:
+        for radius in RADII:
+            books = run(recommender.get_recommendations(user_id, max_distance=radius, limit=10_000))
+            expected = brute_force(dataset, user_id, radius)
+
+            assert sorted(book["id"] for book in books) == sorted(expected)
+            # Coordinates are stored as float32, a few metres of precision
+            assert [book["distance"] for book in books] == pytest.approx(
+                [expected[book["id"]] for book in books], abs=0.01)
+            assert [book["distance"] for book in books] == sorted(book["distance"] for book in books)
+
+
+def test_limit_keeps_the_closest(recommender, dataset, sample_users, run):
+    user_id = sample_users[0]
+    everything = run(recommender.get_recommendations(user_id, max_distance=300.0, limit=10_000))
+    assert len(everything) > 5
+    closest = run(recommender.get_recommendations(user_id, max_distance=300.0, limit=5))
+    assert [book["id"] for book in closest] == [book["id"] for book in everything[:5]]
@@ -0,0 +1,124 @@
+# tests/test_owner_index.py
+#
+# The owner spatial index against a brute-force scan of the same users, the
+# paged load of user locations from the fake Supabase, and profile edits made
+# while a reload is running. Run from the backend directory:
+#     python -m pytest tests/test_owner_index.py
+
+import random
+import httpx
+import pytest
+from app.services.recommenders import user_location_store as store_module
+from app.services.recommenders.spatial_index import OwnerSpatialIndex, haversine_miles
+from app.services.recommenders.user_location_store import UserLocationStore, parse_location
+from benchmarks.fake_supabase import FakeSupabase
+from tests.conftest import FAKE_SUPABASE_URL
+
+RADII = (5.0, 50.0, 500.0, 5000.0)
+
+
+def brute_force(users, lat, lng, radius, exclude_id=None):
+    owners = []
+    for user in users:
+        location = parse_location(user["location"])
+        if location and user["id"] != exclude_id:
+            distance = haversine_miles(lat, lng, *location)
+            if distance <= radius:
+                owners.append((user["id"], distance))
+    return sorted(owners, key=lambda owner: owner[1])
+
+
+def assert_same_owners(found, expected):
+    assert sorted(owner_id for owner_id, _ in found) == sorted(owner_id for owner_id, _ in expected)
+    # Coordinates are stored as float32, a few metres of precision
+    assert [distance for _, distance in found] == pytest.approx([distance for _, distance in expected], abs=0.01)
+
+
+@pytest.fixture
+def index(dataset):
+    index = OwnerSpatialIndex(store=UserLocationStore(path=""))
+    index.build(dataset["users"])
+    return index
+
+
+def test_radius_queries_match_a_full_scan(index, dataset, sample_users):
+    users = dataset["users"]
+    for user_id in sample_users[:20]:
+        lat, lng = index.get(user_id)
+        for radius in RADII:
+            found = index.query_radius(lat, lng, radius, exclude_id=user_id)
+            assert_same_owners(found, brute_force(users, lat, lng, radius, exclude_id=user_id))
+
+
+def test_radius_queries_across_the_antimeridian():
+    users = [
+        {"id": f"user-{i}", "location": {"latitude": random.Random(i).uniform(-60, 60),
+                                         "longitude": random.Random(-i).choice([-179.9, 179.9, 0.0])}}
+        for i in range(200)
+    ]
+    index = OwnerSpatialIndex(store=UserLocationStore(path=""))
+    index.build(users)
+    for radius in RADII:
+        assert_same_owners(index.query_radius(10.0, 179.95, radius), brute_force(users, 10.0, 179.95, radius))
+
+
+def test_profile_edits_are_seen_before_the_rebuild(index, dataset, sample_users):
+    moved, removed = sample_users[:2]
+    target = index.get(sample_users[2])
+    index.store.update(moved, {"latitude": target[0], "longitude": target[1]})
+    index.store.update(removed, None)
+    index.store.update("new-owner", {"latitude": target[0], "longitude": target[1]})
+
+    found = dict(index.query_radius(*target, 1.0))
+    assert found[moved] == pytest.approx(0.0, abs=0.01)
+    assert found["new-owner"] == pytest.approx(0.0, abs=0.01)
+    assert removed not in found
+    assert removed not in dict(index.query_radius(*target, 5000.0))
+
+
+def test_locations_load_a_page_at_a_time(dataset, fake_supabase, run, monkeypatch):
+    monkeypatch.setattr(store_module, "USER_LOCATION_PAGE_SIZE", 100)
+    index = OwnerSpatialIndex(store=UserLocationStore(path=""))
+    client = fake_supabase.client()
+    requests = fake_supabase.requests
+    run(index.ensure_loaded(client, FAKE_SUPABASE_URL, {}))
+    run(client.aclose())
+
+    located = [user for user in dataset["users"] if parse_location(user["location"])]
+    assert len(index) == len(located)
+    assert fake_supabase.requests - requests == len(located) // 100 + 1
+    assert set(index.store.user_ids(range(len(located)))) == {user["id"] for user in located}
+
+
+@pytest.mark.parametrize("mapped", [False, True], ids=["in-memory", "memory-mapped"])
+def test_edits_made_during_a_reload_survive_it(dataset, run, tmp_path, mapped):
+    users = [dict(user) for user in dataset["users"]]
+    fake = FakeSupabase({"users": users})
+    store = UserLocationStore(path=str(tmp_path) if mapped else "")
+    store.build(users)
+    located = [user for user in users if parse_location(user["location"])]
+    before, during = located[0], located[1]
+
+    # An edit that reached the users table before the reload started
+    before["location"] = {"latitude": 1.5, "longitude": 2.5}
+    store.update(before["id"], before["location"])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        # Another edit lands while the first page is in flight; the page may not have it
+        if during["id"] not in store.overlay:
+            store.update(during["id"], {"latitude": 3.5, "longitude": 4.5})
+        return fake.handler(request)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    run(store.reload(client, FAKE_SUPABASE_URL, {}))
+    run(client.aclose())
+
+    assert store.get(before["id"]) == pytest.approx((1.5, 2.5))
+    assert before["id"] not in store.overlay  # Folded into the arrays
+    assert store.get(during["id"]) == pytest.approx((3.5, 4.5))
+    assert during["id"] in store.overlay
+
+    if mapped:
+        # Another worker maps the saved copy: the edit still outlives it
+        store.load()
+        assert store.get(during["id"]) == pytest.approx((3.5, 4.5))
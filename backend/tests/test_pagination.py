@@ -0,0 +1,108 @@
+# tests/test_pagination.py
+#
+# Cursor (keyset) pagination through the real postgrest query builder, served
+# by the fake Supabase: following next_cursor visits every row exactly once
+# in (created_at, id) order, ties on created_at included, and a page doesn't
+# shift when newer rows arrive. Run from the backend directory:
+#     python -m pytest tests/test_pagination.py
+
+import httpx
+import pytest
+from postgrest import SyncPostgrestClient
+from app.core.pagination import paginate, encode_cursor, decode_cursor
+from app.services import book_service
+from benchmarks.fake_supabase import FakeSupabase
+from tests.conftest import FAKE_SUPABASE_URL
+
+PAGE_SIZE = 25
+COLUMNS = "id,title,owner_id,created_at"
+
+
+def newest_first(books):
+    return sorted(books, key=lambda book: (book["created_at"], book["id"]), reverse=True)
+
+
+def walk(query, limit=PAGE_SIZE):
+    """Every page of a query, following next_cursor from the first"""
+    pages, cursor = [], None
+    while True:
+        rows, cursor = paginate(query(), limit, cursor=cursor)
+        pages.append(rows)
+        if cursor is None:
+            return pages
+
+
+@pytest.fixture
+def fake(dataset):
+    return FakeSupabase({"books": list(dataset["books"])})
+
+
+@pytest.fixture
+def postgrest(fake):
+    client = SyncPostgrestClient(f"{FAKE_SUPABASE_URL}/rest/v1")
+    client.session = httpx.Client(base_url=f"{FAKE_SUPABASE_URL}/rest/v1", headers=client.session.headers,
+                                  transport=httpx.MockTransport(fake.handler))
+    yield client
+    client.session.close()
+
+
+def test_cursors_visit_every_row_once_in_order(postgrest, dataset):
+    books = dataset["books"]
+    # Many books share a created_at, so pages end inside runs of ties
+    assert len({book["created_at"] for book in books}) < len(books) / 2
+
+    pages = walk(lambda: postgrest.table("books").select(COLUMNS))
+    assert all(len(page) == PAGE_SIZE for page in pages[:-1]) and 0 < len(pages[-1]) <= PAGE_SIZE
+    ids = [book["id"] for page in pages for book in page]
+    assert ids == [book["id"] for book in newest_first(books)]
+
+
+def test_cursor_pages_match_offset_pages(postgrest):
+    query = lambda: postgrest.table("books").select(COLUMNS).neq("status", "unavailable")
+    for number, page in enumerate(walk(query)[:5]):
+        rows, _ = paginate(query(), PAGE_SIZE, offset=number * PAGE_SIZE)
+        assert rows == page
+
+
+def test_new_rows_do_not_shift_the_next_page(postgrest, fake):
+    query = lambda: postgrest.table("books").select(COLUMNS)
+    first, cursor = paginate(query(), PAGE_SIZE)
+    expected, _ = paginate(query(), PAGE_SIZE, offset=PAGE_SIZE)
+
+    newest = max(book["created_at"] for book in fake.tables["books"])
+    fake.tables["books"].append({**fake.tables["books"][0], "id": 10 ** 9, "created_at": newest})
+    second, _ = paginate(query(), PAGE_SIZE, cursor=cursor)
+    assert second == expected
+    shifted, _ = paginate(query(), PAGE_SIZE, offset=PAGE_SIZE)
+    assert shifted[0] == first[-1]
+
+
+def test_my_books_pages(postgrest, dataset, monkeypatch):
+    monkeypatch.setattr(book_service, "supabase", postgrest)
+    owner_id = dataset["books"][0]["owner_id"]
+    owned = newest_first([book for book in dataset["books"] if book["owner_id"] == owner_id])
+
+    rows, cursor = book_service.get_my_books(owner_id)
+    assert [book["id"] for book in rows] == [book["id"] for book in owned] and cursor is None
+
+    pages = walk(lambda: postgrest.table("books").select(COLUMNS).eq("owner_id", owner_id), limit=2)
+    assert [book["id"] for page in pages for book in page] == [book["id"] for book in owned]
+    rows, cursor = book_service.get_my_books(owner_id, limit=len(owned))
+    assert len(rows) == len(owned) and cursor is None
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    encode_cursor("2025-01-01T12:00:00+00:00"),
+    encode_cursor("2025-01-01T12:00:00+00:00", 1, 2),
+    encode_cursor(20250101, 1),
+    encode_cursor("2025-01-01T12:00:00+00:00", None),
+])
+def test_invalid_cursors_are_rejected(postgrest, cursor):
+    with pytest.raises(ValueError):
+        paginate(postgrest.table("books").select(COLUMNS), PAGE_SIZE, cursor=cursor)
+
+
+def test_cursor_round_trip():
+    values = ['2025-03-04T12:00:00+00:00', 'a"quoted,id.']
+    assert decode_cursor(encode_cursor(*values)) == values
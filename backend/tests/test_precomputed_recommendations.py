@@ -0,0 +1,58 @@
+# tests/test_precomputed_recommendations.py
+#
+# The precompute job's SQLite store: stored lists are served until they age
+# out, reserved books are dropped on the way out, and a discarded user falls
+# back to live recommendations. The endpoints read it off the event loop.
+# Run from the backend directory:
+#     python -m pytest tests/test_precomputed_recommendations.py
+
+import threading
+import pytest
+from app.routers import recommendation
+from app.services import precomputed_recommendations
+from app.services.book_catalog import BookCatalog
+from app.services.precomputed_recommendations import PrecomputedRecommendationStore
+
+BOOKS = [{"id": i, "title": f"Book {i}", "status": "available"} for i in range(5)]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    catalog = BookCatalog()
+    catalog.load(BOOKS)
+    monkeypatch.setattr(precomputed_recommendations, "book_catalog", catalog)
+    store = PrecomputedRecommendationStore(path=str(tmp_path / "precomputed.db"))
+    store.write([("user-1", "genre", [{"id": book["id"], "score": 10 - book["id"]} for book in BOOKS])])
+    return store
+
+
+def test_lookup_serves_stored_lists(store):
+    assert [rec["id"] for rec in store.lookup("user-1", "genre", 3)] == [0, 1, 2]
+    assert store.lookup("user-1", "location", 3) is None
+    assert store.lookup("user-2", "genre", 3) is None
+    assert (store.hits, store.misses) == (1, 2)
+
+
+def test_reserved_books_are_dropped(store):
+    precomputed_recommendations.book_catalog.upsert({**BOOKS[1], "status": "reserved"})
+    assert [rec["id"] for rec in store.lookup("user-1", "genre", 10)] == [0, 2, 3, 4]
+
+
+def test_old_and_discarded_lists_are_not_served(store):
+    store.max_age = -1
+    assert store.lookup("user-1", "genre", 3) is None
+    store.max_age = 3600
+    store.discard("user-1")
+    assert store.lookup("user-1", "genre", 3) is None
+
+
+def test_endpoints_read_the_store_off_the_event_loop(store, run, monkeypatch):
+    monkeypatch.setattr(recommendation, "precomputed_store", store)
+    monkeypatch.setattr(recommendation, "RECOMMENDATIONS_SERVE_PRECOMPUTED", True)
+    lookup = store.lookup
+    threads = []
+    monkeypatch.setattr(store, "lookup", lambda *args: threads.append(threading.get_ident()) or lookup(*args))
+
+    recs = run(recommendation.serve_precomputed("user-1", "genre", 2))
+    assert [rec["id"] for rec in recs] == [0, 1]
+    assert threads and threads[0] != threading.get_ident()
@@ -0,0 +1,84 @@
+# tests/test_recommendation_cache.py
+#
+# Recommendation cache eviction and invalidation: the least recently used
+# entry goes first once the cache is full, entries expire after the TTL, and
+# profile and book writes drop a user's entries or all of them.
+# Run from the backend directory:  python -m pytest tests/test_recommendation_cache.py
+
+from app.services import recommendation_cache as recommendation_cache_module
+from app.services.recommendation_cache import RecommendationCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def books(*ids):
+    return [{"id": book_id} for book_id in ids]
+
+
+def test_least_recently_used_is_evicted():
+    cache = RecommendationCache(maxsize=2, ttl=60)
+    cache.set(("a", "genre", 20), books(1))
+    cache.set(("b", "genre", 20), books(2))
+    assert cache.get(("a", "genre", 20)) == books(1)  # b is now the oldest
+
+    cache.set(("c", "genre", 20), books(3))
+    assert cache.get(("b", "genre", 20)) is None
+    assert cache.get(("a", "genre", 20)) == books(1)
+    assert cache.get(("c", "genre", 20)) == books(3)
+    assert cache.stats()["evictions"] == 1 and cache.stats()["size"] == 2
+
+
+def test_entries_expire(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(recommendation_cache_module, "time", clock)
+    cache = RecommendationCache(maxsize=8, ttl=60)
+    cache.set(("a", "genre", 20), books(1))
+
+    clock.now += 59
+    assert cache.get(("a", "genre", 20)) == books(1)
+    clock.now += 1
+    assert cache.get(("a", "genre", 20)) is None
+    assert cache.stats()["size"] == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cached_lists_are_copies():
+    cache = RecommendationCache(maxsize=8, ttl=60)
+    value = books(1)
+    cache.set(("a", "genre", 20), value)
+    value.append({"id": 2})
+    cache.get(("a", "genre", 20)).append({"id": 3})
+    assert cache.get(("a", "genre", 20)) == books(1)
+
+
+def test_invalidate_user_keeps_other_users():
+    cache = RecommendationCache(maxsize=8, ttl=60)
+    cache.set(("a", "genre", 20), books(1))
+    cache.set(("a", "location:50.0", 20), books(2))
+    cache.set(("b", "genre", 20), books(3))
+
+    cache.invalidate_user("a")
+    assert cache.get(("a", "genre", 20)) is None
+    assert cache.get(("a", "location:50.0", 20)) is None
+    assert cache.get(("b", "genre", 20)) == books(3)
+
+
+def test_invalidate_all():
+    cache = RecommendationCache(maxsize=8, ttl=60)
+    cache.set(("a", "genre", 20), books(1))
+    cache.set(("b", "genre", 20), books(2))
+
+    cache.invalidate_all()
+    assert cache.stats()["size"] == 0 and cache.stats()["invalidations"] == 1
+
+
+def test_zero_size_disables_caching():
+    cache = RecommendationCache(maxsize=0, ttl=60)
+    cache.set(("a", "genre", 20), books(1))
+    assert cache.get(("a", "genre", 20)) is None
@@ -0,0 +1,159 @@
+# tests/test_search_index.py
+#
+# Ranking of the in-process book search: an exact title match beats passing
+# mentions, misspelt words still find the book through trigrams, write-path
+# updates show up at once, writes made elsewhere arrive through a background
+# catalog reload, and search_books pages by (score, id) cursor over the
+# catalog without repeats. Run from the backend directory:
+#     python -m pytest tests/test_search_index.py
+
+from collections import Counter
+import asyncio
+import time
+import pytest
+from app.core.pagination import encode_cursor
+from app.services import book_service
+from app.services.book_catalog import BookCatalog
+from app.services.search_index import BookSearchIndex, tokenize
+from benchmarks.fake_supabase import FakeSupabase
+from tests.conftest import FAKE_SUPABASE_URL
+
+BOOKS = [
+    {"id": 1, "title": "Dune", "author": "Frank Herbert", "description": "Spice, sandworms and politics on Arrakis"},
+    {"id": 2, "title": "Children of Dune", "author": "Frank Herbert", "description": "The third Dune novel"},
+    {"id": 3, "title": "Sand and Sky", "author": "Ana Ruiz", "description": "A travel memoir that mentions Dune once"},
+    {"id": 4, "title": "The Hobbit", "author": "J. R. R. Tolkien", "description": "There and back again"},
+    {"id": 5, "title": "Foundation", "author": "Isaac Asimov", "description": "Psychohistory and the fall of an empire"},
+    {"id": 6, "title": "It", "author": "Stephen King", "description": "A clown haunts Derry"},
+]
+
+
+def ranked(index: BookSearchIndex, query: str) -> list:
+    scores = index.search(query)
+    return [int(book_id) for book_id in sorted(scores, key=lambda book_id: (-scores[book_id], book_id))]
+
+
+@pytest.fixture
+def index():
+    index = BookSearchIndex()
+    index.build(BOOKS, synced_at=0.0)
+    return index
+
+
+def test_title_matches_rank_above_passing_mentions(index):
+    dune = ranked(index, "dune")
+    assert set(dune[:2]) == {1, 2} and dune[2:] == [3]
+    assert ranked(index, "children of dune")[0] == 2
+    assert set(ranked(index, "herbert")) == {1, 2}
+    assert ranked(index, "tolkien hobbit") == [4]
+
+
+def test_misspelt_words_match_by_trigrams(index):
+    assert ranked(index, "foundaton")[0] == 5
+    assert ranked(index, "asimoov")[0] == 5
+    assert ranked(index, "hobit")[0] == 4
+    assert ranked(index, "qwxzv") == []
+
+
+def test_stopword_only_queries_still_match(index):
+    # "it" is a stopword, but a query of nothing else keeps it
+    assert ranked(index, "It") == [6]
+
+
+def test_writes_are_reflected(index):
+    index.upsert({"id": 7, "title": "Dune Messiah", "author": "Frank Herbert", "description": None})
+    assert ranked(index, "messiah") == [7]
+    assert ranked(index, "dune")[-1] == 3
+
+    index.upsert({"id": 1, "title": "Arrakis", "author": "Frank Herbert", "description": None})
+    assert 1 not in ranked(index, "sandworms")
+    assert ranked(index, "arrakis") == [1]
+
+    index.remove(7)
+    index.remove("1")
+    assert ranked(index, "messiah") == [] and ranked(index, "arrakis") == []
+    assert len(index) == len(BOOKS) - 1
+    # Words no book uses any more leave no trigrams behind to match against
+    assert index.similar_words("messiah") == []
+
+
+def test_sync_reindexes_only_what_changed(index):
+    books = [dict(book) for book in BOOKS if book["id"] != 3]
+    books[0]["title"] = "Dune (Deluxe Edition)"
+    index.sync(books, synced_at=1.0)
+    assert ranked(index, "deluxe") == [1]
+    assert 3 not in ranked(index, "sand")
+    assert index.synced_at == 1.0
+
+
+@pytest.fixture
+def search(dataset, monkeypatch):
+    """book_service.search_books over a catalog and index of the synthetic books"""
+    catalog = BookCatalog()
+    catalog.load(dataset["books"])
+    index = BookSearchIndex()
+    index.build(catalog.find(), catalog.loaded_at)
+    monkeypatch.setattr(book_service, "book_catalog", catalog)
+    monkeypatch.setattr(book_service, "search_index", index)
+    return book_service.search_books
+
+
+def test_search_books_pages_by_cursor(search, dataset):
+    # The commonest synthetic words, so results span pages and include tied scores
+    words = Counter(word for book in dataset["books"] for word in tokenize(f"{book['title']} {book['description']}"))
+    query = " ".join(word for word, _ in words.most_common(30))
+    user_id = dataset["users"][0]["id"]
+    everything, cursor = search(user_id, query, limit=1000)
+    assert cursor is None and len(everything) > 50
+    assert all(book["owner_id"] != user_id for book in everything)
+
+    pages, cursor = [], None
+    while True:
+        rows, cursor = search(user_id, query, limit=7, cursor=cursor)
+        pages.append(rows)
+        if cursor is None:
+            break
+    assert [book["id"] for page in pages for book in page] == [book["id"] for book in everything]
+
+    genre = everything[0]["genre"]
+    in_genre, _ = search(user_id, query, genre=genre, limit=1000)
+    assert in_genre == [book for book in everything if book["genre"] == genre]
+
+    with pytest.raises(ValueError):
+        search(user_id, query, cursor=encode_cursor("high", "1"))
+
+
+async def settle(*refreshing, timeout: float = 10.0) -> None:
+    """Wait for the background reloads of the given catalog and index to finish"""
+    deadline = time.monotonic() + timeout
+    while any(data._refresh.running for data in refreshing) and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+
+
+def test_writes_made_elsewhere_arrive_in_the_background(dataset, run):
+    fake = FakeSupabase({"books": list(dataset["books"])})
+    client = fake.client()
+    catalog = BookCatalog()
+    index = BookSearchIndex()
+
+    # Nothing built yet: the first search waits for the catalog and the index
+    run(index.ensure_synced(catalog, client, FAKE_SUPABASE_URL, {}))
+    assert index.ready and len(index) == len(catalog) == len(dataset["books"])
+
+    # Another worker adds a book; once the catalog is stale, a search starts
+    # the reload and returns with the current index
+    fake.tables["books"].append({**dataset["books"][0], "id": 10 ** 9, "title": "Zyzzyva"})
+    catalog.loaded_at -= 24 * 3600
+    run(index.ensure_synced(catalog, client, FAKE_SUPABASE_URL, {}))
+    run(settle(catalog, index))
+    assert index.synced_at == catalog.loaded_at
+    assert list(index.search("zyzzyva")) == [str(10 ** 9)]
+
+    # A catalog reload started by a recommender is reconciled on the next search
+    fake.tables["books"].pop()
+    catalog.loaded_at -= 24 * 3600
+    run(catalog.ensure_loaded(client, FAKE_SUPABASE_URL, {}, wait=True))
+    run(index.ensure_synced(catalog, client, FAKE_SUPABASE_URL, {}))
+    run(settle(catalog, index))
+    assert index.search("zyzzyva") == {}
+    run(client.aclose())
@@ -0,0 +1,121 @@
+# tests/test_similar_books.py
+#
+# The content-similarity neighbour table against cosine scores computed over
+# every pair of books, its incremental upserts, removals and snapshot round
+# trip, and the fallbacks of GET /recommendations/similar/{id} when the
+# precomputed neighbours are not available.
+# Run from the backend directory:  python -m pytest tests/test_similar_books.py
+
+import numpy as np
+from fastapi import HTTPException
+import pytest
+from app.routers import recommendation
+from app.services.book_catalog import BookCatalog
+from app.services.recommenders.content_similarity import ContentSimilarityIndex
+
+NEIGHBOURS = 10
+
+
+def dense_scores(index):
+    """Cosine score of every pair of documents from their stored vectors"""
+    vectors = np.zeros((len(index.ids), len(index.term_ids)))
+    for doc, (terms, weights) in enumerate(zip(index.doc_terms, index.doc_weights)):
+        vectors[doc, terms] = weights
+    scores = vectors @ vectors.T
+    np.fill_diagonal(scores, 0)
+    return scores
+
+
+@pytest.fixture(scope="module")
+def index(dataset):
+    # Every term scorable, so the table can be checked against the dense product
+    index = ContentSimilarityIndex(neighbours=NEIGHBOURS, max_df=len(dataset["books"]))
+    index.build(dataset["books"])
+    return index
+
+
+def test_neighbours_match_dense_cosine(index, dataset):
+    scores = dense_scores(index)
+    for book in dataset["books"][:100]:
+        doc = index.docs[str(book["id"])]
+        neighbours = index.similar(book["id"])
+        expected = np.sort(scores[doc][scores[doc] > 0])[::-1][:NEIGHBOURS]
+
+        assert [score for _, score in neighbours] == pytest.approx(expected.tolist(), abs=1e-5)
+        for other_id, score in neighbours:
+            assert other_id != str(book["id"])
+            assert scores[doc, index.docs[other_id]] == pytest.approx(score, abs=1e-5)
+
+
+def test_upserted_copy_is_the_closest_neighbour(dataset):
+    index = ContentSimilarityIndex(neighbours=NEIGHBOURS)
+    index.build(dataset["books"])
+    original = dataset["books"][0]
+
+    index.upsert({**original, "id": "copy"})
+    # Added books use the build's idf values, so the copy is close to but not exactly 1
+    assert index.similar(original["id"])[0] == ("copy", pytest.approx(1.0, abs=0.01))
+    assert index.similar("copy")[0] == (str(original["id"]), pytest.approx(1.0, abs=0.01))
+
+    index.remove("copy")
+    assert index.similar("copy") == []
+    assert "copy" not in [other_id for other_id, _ in index.similar(original["id"])]
+
+
+def test_snapshot_round_trip(index, dataset, tmp_path):
+    path = str(tmp_path / "similar_books.pkl")
+    index.save(path)
+    loaded = ContentSimilarityIndex()
+    loaded.load(path)
+    for book in dataset["books"][:20]:
+        assert loaded.similar(book["id"]) == index.similar(book["id"])
+
+
+BOOKS = [
+    {"id": 1, "title": "Dune", "author": "Frank Herbert", "genre": "Science Fiction", "status": "available"},
+    {"id": 2, "title": "Dune Messiah", "author": "Frank Herbert", "genre": "Science Fiction", "status": "reserved"},
+    {"id": 3, "title": "Hyperion", "author": "Dan Simmons", "genre": "Science Fiction", "status": "available"},
+    {"id": 4, "title": "Emma", "author": "Jane Austen", "genre": "Romance", "status": "available"},
+    {"id": 5, "title": "Persuasion", "author": "Jane Austen", "genre": "Romance", "status": "reserved"},
+]
+
+
+@pytest.fixture
+def similar(monkeypatch, run):
+    catalog = BookCatalog()
+    catalog.load(dict(book) for book in BOOKS)
+    index = ContentSimilarityIndex()
+    index.build(BOOKS)
+    monkeypatch.setattr(recommendation, "book_catalog", catalog)
+    monkeypatch.setattr(recommendation, "content_index", index)
+    return lambda book_id: run(recommendation.get_similar_books(book_id, limit=10, current_user={}))
+
+
+def test_similar_serves_available_neighbours(similar):
+    # Dune Messiah is the closest neighbour but reserved
+    books = similar(1)
+    assert [book["id"] for book in books] == [3]
+    assert books[0]["reason"] == "Similar to Dune"
+
+
+def test_similar_falls_back_to_the_genre(similar):
+    # Every neighbour of Dune is reserved; Solaris is in the genre but not yet indexed
+    recommendation.book_catalog.upsert({"id": 3, "status": "reserved"})
+    recommendation.book_catalog.upsert({"id": 6, "title": "Solaris", "author": "Stanislaw Lem",
+                                        "genre": "Science Fiction", "status": "available"})
+    books = similar(1)
+    assert [book["id"] for book in books] == [6]
+    assert books[0]["reason"] == "Same genre: Science Fiction"
+
+
+def test_similar_falls_back_to_any_available_book(similar):
+    # Emma's only neighbour, Persuasion, is reserved, as is the rest of Romance
+    books = similar(4)
+    assert sorted(book["id"] for book in books) == [1, 3]
+    assert all(book["reason"] == "Available now" for book in books)
+
+
+def test_similar_unknown_book(similar):
+    with pytest.raises(HTTPException) as error:
+        similar(99)
+    assert "Book not found" in str(error.value.detail)
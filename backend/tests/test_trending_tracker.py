@@ -0,0 +1,61 @@
+# tests/test_trending_tracker.py
+#
+# The incremental trending leaderboard against a full sort of every score,
+# through entries, evictions, deletions and origin rescales.
+# Run from the backend directory:  python -m pytest tests/test_trending_tracker.py
+
+import random
+import pytest
+from app.services.trending_tracker import TrendingTracker
+
+HALF_LIFE = 3600.0
+CAPACITY = 10
+
+
+def expected_top(tracker: TrendingTracker, limit: int):
+    ranked = sorted(tracker.scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return [book_id for book_id, _ in ranked]
+
+
+def test_leaderboard_matches_a_full_sort():
+    tracker = TrendingTracker(half_life=HALF_LIFE, capacity=CAPACITY)
+    rng = random.Random(7)
+    now = tracker.origin
+    for i in range(5000):
+        now += rng.uniform(0, 60)
+        # A few popular books plus a long tail, so leaders keep changing
+        book_id = rng.randrange(20) if rng.random() < 0.5 else rng.randrange(2000)
+        tracker.record(book_id, rng.choice([1.0, 5.0]), now=now)
+        if i % 500 == 0:
+            assert [book_id for book_id, _ in tracker.top(now=now)] == expected_top(tracker, CAPACITY)
+
+    assert [book_id for book_id, _ in tracker.top(now=now)] == expected_top(tracker, CAPACITY)
+    # Outdated heap entries are dropped as they pile up
+    assert len(tracker.heap) <= 2 * max(CAPACITY, 16)
+
+
+def test_removed_leaders_are_replaced():
+    tracker = TrendingTracker(half_life=HALF_LIFE, capacity=3)
+    now = tracker.origin
+    for book_id, weight in (("a", 5), ("b", 4), ("c", 3), ("d", 2), ("e", 1)):
+        tracker.record(book_id, weight, now=now)
+    assert [book_id for book_id, _ in tracker.top(now=now)] == ["a", "b", "c"]
+
+    tracker.remove("a")
+    assert [book_id for book_id, _ in tracker.top(now=now)] == ["b", "c", "d"]
+    tracker.record("e", 10, now=now)
+    assert [book_id for book_id, _ in tracker.top(now=now)] == ["e", "b", "c"]
+
+
+def test_scores_decay_and_survive_a_rescale():
+    tracker = TrendingTracker(half_life=HALF_LIFE, capacity=3)
+    now = tracker.origin
+    tracker.record("old", 8, now=now)
+    # Far enough ahead that the stored scores are rescaled to a new origin
+    later = now + HALF_LIFE * 1000
+    tracker.record("new", 1, now=later)
+    assert tracker.origin == later
+    assert dict(tracker.top(now=later))["new"] == pytest.approx(1.0)
+    tracker.record("new", 1, now=later + HALF_LIFE)
+    assert dict(tracker.top(now=later + HALF_LIFE))["new"] == pytest.approx(1.5)
+    assert [book_id for book_id, _ in tracker.top(now=later)] == ["new", "old"]
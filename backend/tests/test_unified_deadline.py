@@ -0,0 +1,171 @@
+# tests/test_unified_deadline.py
+#
+# The per-source deadline of the unified feed: a source whose ranking runs
+# past it is dropped and counted, and shared data that is slow to reload (a
+# stale catalog, owner index or co-request matrix) is served while it
+# reloads in the background, with a reload that outlives the deadline still
+# landing. Run from the backend directory:
+#     python -m pytest tests/test_unified_deadline.py
+
+import asyncio
+import time
+import httpx
+import pytest
+from app.services.book_catalog import book_catalog
+from app.services.recommenders.genre_based_recommender import GenreBasedRecommender
+from app.services.recommenders.location_based_recommender import LocationBasedRecommender
+from app.services.recommenders.collaborative_recommender import CollaborativeRecommender, co_requests
+from app.services.recommenders.spatial_index import owner_index
+from app.services.recommenders.user_location_store import user_location_store
+from app.services.unified_recommendation_service import UnifiedRecommendationService
+from benchmarks.fake_supabase import FakeSupabase
+from tests.conftest import FAKE_SUPABASE_URL
+
+DEADLINE = 0.2
+SLOW_LOAD = 0.5
+SHARED = (book_catalog, co_requests, owner_index, user_location_store)
+
+
+class SlowSupabase(FakeSupabase):
+    """A fake whose table scans (requests without an id filter) take `delay` seconds"""
+
+    delay = 0.0
+
+    async def slow_handler(self, request: httpx.Request) -> httpx.Response:
+        if "id" not in request.url.params:
+            await asyncio.sleep(self.delay)
+        return self.handler(request)
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.slow_handler))
+
+
+class StubSource:
+    """A recommender whose stream yields `count` candidates, sleeping `delay` seconds before each"""
+
+    def __init__(self, source: str, count: int = 40, delay: float = 0.0, error: bool = False):
+        self.source = source
+        self.count = count
+        self.delay = delay
+        self.error = error
+        self.yielded = 0
+
+    def _stream(self):
+        for i in range(self.count):
+            time.sleep(self.delay)
+            self.yielded += 1
+            yield {"id": f"{self.source}-{i}", "title": f"Book {i}", "genre": "Fantasy", "distance": 1.0,
+                   "reason": "Stub", "score": 100.0 - i}
+
+    async def iter_recommendations(self, user_id):
+        if self.error:
+            raise RuntimeError("source unavailable")
+        # Ranking happens as the stream is consumed, after this coroutine returns
+        return self._stream()
+
+
+async def settle(timeout: float = 10.0) -> None:
+    """Wait for every background reload to finish"""
+    deadline = time.monotonic() + timeout
+    while any(data._refresh.running for data in SHARED) and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+
+
+def age(*shared) -> None:
+    """Make loaded data look older than any TTL"""
+    for data in shared:
+        data.loaded_at -= 24 * 3600
+
+
+@pytest.fixture
+def fake(dataset):
+    # Own copies of the tables, so a test can add rows
+    return SlowSupabase({name: list(rows) for name, rows in dataset.items()})
+
+
+@pytest.fixture
+def service(fake, run):
+    client = fake.client()
+    recommenders = [GenreBasedRecommender(client=client), LocationBasedRecommender(client=client),
+                    CollaborativeRecommender(client=client)]
+    for recommender in recommenders:
+        recommender.supabase_url = FAKE_SUPABASE_URL
+    for data in SHARED:
+        data.loaded_at = None
+    yield UnifiedRecommendationService(*recommenders, source_timeout=DEADLINE)
+
+    # Let reloads still running finish here rather than inside a later test
+    run(settle())
+    run(client.aclose())
+    for data in SHARED:
+        data.loaded_at = None
+
+
+def test_stale_data_is_served_while_it_reloads(service, fake, sample_users, run):
+    user_id = sample_users[0]
+    feed, missing = run(service.get_unified_feed(user_id))
+    assert feed and missing == []
+
+    age(*SHARED)
+    fake.delay = SLOW_LOAD
+    start = time.perf_counter()
+    stale_feed, stale_missing = run(service.get_unified_feed(user_id))
+    assert time.perf_counter() - start < SLOW_LOAD
+    assert stale_missing == []
+    assert [rec["id"] for rec in stale_feed] == [rec["id"] for rec in feed]
+
+    # The reloads were started, not cancelled with the request
+    run(settle())
+    assert not any(data.is_stale for data in SHARED)
+
+
+def test_first_load_outlives_the_deadline(service, fake, dataset, sample_users, run):
+    fake.delay = SLOW_LOAD
+    _, missing = run(service.get_unified_feed(sample_users[0]))
+    assert set(missing) == {"genre", "location", "collaborative"}
+
+    run(settle())
+    assert len(book_catalog) == len(dataset["books"])
+    assert owner_index.loaded and co_requests.loaded
+
+    feed, missing = run(service.get_unified_feed(sample_users[0]))
+    assert feed and missing == []
+
+
+def test_catalog_reload_picks_up_new_books(service, fake, run):
+    client = service.genre_recommender.client
+    headers = service.genre_recommender.headers
+    run(book_catalog.ensure_loaded(client, FAKE_SUPABASE_URL, headers))
+    before = len(book_catalog)
+
+    book = {**fake.tables["books"][0], "id": 10 ** 9, "title": "Added elsewhere"}
+    fake.tables["books"].append(book)
+    age(book_catalog)
+    fake.delay = SLOW_LOAD
+    run(book_catalog.ensure_loaded(client, FAKE_SUPABASE_URL, headers))
+    assert len(book_catalog) == before  # Returned at once with the current copy
+
+    run(settle())
+    assert len(book_catalog) == before + 1
+    assert book_catalog.get(book["id"])["title"] == "Added elsewhere"
+
+
+def test_slow_ranking_is_dropped_and_counted(run):
+    genre = StubSource("genre", delay=0.05)
+    location = StubSource("location")
+    collaborative = StubSource("collaborative", error=True)
+    service = UnifiedRecommendationService(genre, location, collaborative, source_timeout=DEADLINE)
+
+    start = time.perf_counter()
+    feed, missing = run(service.get_unified_feed("user-1", limit=10))
+    assert time.perf_counter() - start < genre.count * genre.delay / 2
+    assert missing == ["genre", "collaborative"]
+    assert feed and {rec["source"] for rec in feed} == {"location"}
+    # Only the candidates the feed can use are drawn from a source
+    assert location.yielded == 20
+
+    stats = {name: source_stats.snapshot() for name, source_stats in service.source_stats.items()}
+    assert stats["genre"]["calls"] == 1 and stats["genre"]["timeouts"] == 1
+    assert stats["genre"]["max_ms"] >= DEADLINE * 1000
+    assert stats["location"]["calls"] == 1 and stats["location"]["timeouts"] == stats["location"]["errors"] == 0
+    assert stats["collaborative"]["errors"] == 1
@@ -0,0 +1,109 @@
+# tests/test_upload_store.py
+#
+# Content-addressed uploads: identical bytes are stored once, reference
+# counts decide what collect() deletes (variants included), and a dry run
+# of the collect job changes nothing. Run from the backend directory:
+#     python -m pytest tests/test_upload_store.py
+
+import io
+import os
+import pytest
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+from app.jobs import collect_uploads
+from app.services.upload_store import UploadStore
+
+BASE_URL = "http://uploads.test/uploads"
+COVER = b"\xff\xd8\xff\xe0" + os.urandom(64 * 1024)
+
+
+def make_upload(payload: bytes, filename: str = "cover.jpg") -> UploadFile:
+    return UploadFile(io.BytesIO(payload), size=len(payload), filename=filename,
+                      headers=Headers({"content-type": "image/jpeg"}))
+
+
+def write_variants(path: str) -> list:
+    """Stand-ins for the thumbnail and medium files image_variants renders next to an upload"""
+    stem = os.path.splitext(path)[0]
+    paths = [f"{stem}_{name}.{extension}" for name in ("thumbnail", "medium") for extension in ("webp", "jpeg")]
+    for variant_path in paths:
+        with open(variant_path, "wb") as f:
+            f.write(b"\0" * 1000)
+    return paths
+
+
+def refcount(store: UploadStore, path: str) -> int:
+    connection = store._connect()
+    try:
+        return connection.execute("SELECT refcount FROM blobs WHERE path = ?", (path,)).fetchone()[0]
+    finally:
+        connection.close()
+
+
+@pytest.fixture
+def store(tmp_path):
+    # A negative grace period makes every unreferenced file collectable at once
+    return UploadStore(root=str(tmp_path / "uploads"), base_url=BASE_URL,
+                       db_path=str(tmp_path / "uploads.db"), grace=-1)
+
+
+def test_identical_uploads_are_stored_once(store, run):
+    first = run(store.save(make_upload(COVER, "a.jpg"), "book_covers"))
+    second = run(store.save(make_upload(COVER, "b.jpg"), "book_covers"))
+    other = run(store.save(make_upload(COVER + b"!"), "book_covers"))
+
+    assert not first["duplicate"] and second["duplicate"] and not other["duplicate"]
+    assert first["url"] == second["url"] != other["url"]
+    assert first["path"].endswith(os.path.join(first["sha256"][:2], first["sha256"][2:4], f"{first['sha256']}.jpg"))
+    assert store.path(first["url"]) == first["path"]
+    assert os.listdir(os.path.join(store.root, ".incoming")) == []
+
+
+def test_collect_removes_only_unreferenced_files_and_their_variants(store, run):
+    kept = run(store.save(make_upload(COVER), "book_covers"))
+    dropped = run(store.save(make_upload(COVER + b"!"), "book_covers"))
+    kept_variants = write_variants(kept["path"])
+    dropped_variants = write_variants(dropped["path"])
+
+    store.acquire(kept["url"])
+    store.acquire(dropped["url"])
+    store.release(dropped["url"])
+    # Legacy uploads outside the store are ignored
+    store.acquire("http://elsewhere.test/cover.jpg")
+
+    expected_bytes = dropped["size"] + 4 * 1000
+    dry_run = store.collect(dry_run=True)
+    assert dry_run == {"removed": 1, "bytes": expected_bytes}
+    assert all(os.path.exists(path) for path in [dropped["path"]] + dropped_variants)
+
+    assert store.collect() == {"removed": 1, "bytes": expected_bytes}
+    assert not any(os.path.exists(path) for path in [dropped["path"]] + dropped_variants)
+    assert all(os.path.exists(path) for path in [kept["path"]] + kept_variants)
+    assert store.collect() == {"removed": 0, "bytes": 0}
+
+
+def test_recount_corrects_drift(store, run):
+    saved = run(store.save(make_upload(COVER), "book_covers"))
+    for _ in range(3):
+        store.acquire(saved["url"])
+
+    assert store.recount([saved["url"], None, "http://elsewhere.test/cover.jpg"]) == 1
+    assert refcount(store, saved["path"]) == 1
+    store.recount([])
+    assert store.collect()["removed"] == 1
+
+
+def test_dry_run_job_leaves_reference_counts_alone(store, run, monkeypatch):
+    saved = run(store.save(make_upload(COVER), "book_covers"))
+    store.acquire(saved["url"])
+    monkeypatch.setattr(collect_uploads, "upload_store", store)
+    # No row references the file any more, so a recount would zero it
+    monkeypatch.setattr(collect_uploads, "fetch_urls", lambda table, column: [])
+
+    result = collect_uploads.main(["--dry-run", "--grace", "-1"])
+    assert result["removed"] == 0
+    assert refcount(store, saved["path"]) == 1
+
+    result = collect_uploads.main(["--grace", "-1"])
+    assert result["removed"] == 1
+    assert not os.path.exists(saved["path"])
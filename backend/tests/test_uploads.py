@@ -0,0 +1,69 @@
+# tests/test_uploads.py
+#
+# Image upload checks: a non-image is refused by its declared type or its
+# signature (415), an upload past the size cap is refused whether or not it
+# declares its size (413), and a refused upload leaves no file behind.
+# Run from the backend directory:  python -m pytest tests/test_uploads.py
+
+import hashlib
+import io
+import os
+import pytest
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+from app.core import uploads
+from app.core.uploads import save_image_upload, UploadRejected
+
+JPEG = b"\xff\xd8\xff\xe0" + bytes(range(256)) * 64
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(1000)
+WEBP = b"RIFF\x00\x00\x00\x00WEBPVP8 " + bytes(1000)
+
+
+def make_upload(payload: bytes, content_type: str = "image/jpeg", declare_size: bool = True) -> UploadFile:
+    return UploadFile(io.BytesIO(payload), size=len(payload) if declare_size else None, filename="cover",
+                      headers=Headers({"content-type": content_type}))
+
+
+@pytest.mark.parametrize("payload, content_type, extension", [
+    (JPEG, "image/jpeg", ".jpg"),
+    (PNG, "image/png", ".png"),
+    (WEBP, "image/webp", ".webp"),
+    # The file's own signature decides, whatever the client declared
+    (PNG, "application/octet-stream", ".png"),
+])
+def test_images_are_saved(tmp_path, run, payload, content_type, extension):
+    saved = run(save_image_upload(make_upload(payload, content_type), str(tmp_path)))
+    assert saved["filename"].endswith(extension)
+    assert saved["size"] == len(payload)
+    assert saved["sha256"] == hashlib.sha256(payload).hexdigest()
+    with open(saved["path"], "rb") as f:
+        assert f.read() == payload
+    assert os.listdir(tmp_path) == [saved["filename"]]
+
+
+@pytest.mark.parametrize("payload, content_type", [
+    (JPEG, "text/html"),
+    (b"<html><body>not an image</body></html>", "image/jpeg"),
+    (b"GIF86a" + bytes(100), "image/gif"),
+    (b"", "image/png"),
+])
+def test_non_images_are_refused(tmp_path, run, payload, content_type):
+    with pytest.raises(UploadRejected) as rejected:
+        run(save_image_upload(make_upload(payload, content_type), str(tmp_path)))
+    assert rejected.value.status_code == 415
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.parametrize("declare_size", [True, False])
+def test_oversized_uploads_are_refused(tmp_path, run, monkeypatch, declare_size):
+    # Small chunks, so an undeclared upload is cut off part way through writing
+    monkeypatch.setattr(uploads, "UPLOAD_CHUNK_SIZE", 1024)
+    with pytest.raises(UploadRejected) as rejected:
+        run(save_image_upload(make_upload(JPEG, declare_size=declare_size), str(tmp_path), max_bytes=4096))
+    assert rejected.value.status_code == 413
+    assert os.listdir(tmp_path) == []
+
+
+def test_upload_at_the_cap_is_accepted(tmp_path, run):
+    saved = run(save_image_upload(make_upload(JPEG, declare_size=False), str(tmp_path), max_bytes=len(JPEG)))
+    assert saved["size"] == len(JPEG)
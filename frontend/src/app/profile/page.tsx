@@ -133,7 +133,7 @@ useEffect(() => {
         
         // Set profile photo URL if it exists
         if (profileData.profile_photo_url) {
-          setProfilePhotoUrl(profileData.profile_photo_url);
+          setProfilePhotoUrl(profileData.profile_photo_thumbnail_url || profileData.profile_photo_url);
         }
         
         // Set form default values
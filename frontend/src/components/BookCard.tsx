@@ -14,6 +14,7 @@ interface Book {
   description?: string;
   status: string,
   image_url?: string;
+  thumbnail_url?: string;
   owner_id?: string;
   distance?: number; // For location-based recommendations
 }
@@ -42,7 +43,7 @@ const BookCard: React.FC<BookCardProps> = ({
     <div className="relative h-48 bg-gray-100 flex items-center justify-center overflow-hidden">
       {book.image_url ? (
         <Image
-            src={book.image_url}
+            src={book.thumbnail_url || book.image_url}
             alt={book.title}
             width={500} // required
             height={300} // required
@@ -118,10 +119,6 @@ const BookCard: React.FC<BookCardProps> = ({
               <Badge variant="outline" className="bg-purple-100">{book.genre}</Badge>
               <Badge variant="outline">{book.condition}</Badge>
             </div>
-    
-            {book.description && (
-              <p className="text-sm text-gray-500 mt-2 line-clamp-2 min-h-[40px]">{book.description}</p>
-            )}
           </div>
     
           <div className="flex justify-between items-center mt-4">
@@ -220,12 +217,6 @@ const BookCard: React.FC<BookCardProps> = ({
             <Badge variant="outline" className="bg-purple-100">{book.genre}</Badge>
             <Badge variant="outline">{book.condition}</Badge>
           </div>
-          
-          {book.description && (
-            <p className="text-sm text-gray-600 line-clamp-2 min-h-[40px]">
-              {book.description}
-            </p>
-          )}
         </CardContent>
         
         <CardFooter className="pt-0 mt-auto">
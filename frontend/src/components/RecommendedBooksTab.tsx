@@ -15,6 +15,7 @@ interface Book {
   description?: string;
   status: string;
   image_url?: string;
+  thumbnail_url?: string;
   owner_id?: string;
   distance?: number;
 }
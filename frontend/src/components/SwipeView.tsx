@@ -1,4 +1,5 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
+import axios from 'axios';
 import { AnimatePresence, motion } from "framer-motion";
 import { Badge } from "@/components/ui/badge";
 import { Button } from "@/components/ui/button";
@@ -6,6 +7,7 @@ import { Heart, X, Undo } from 'lucide-react';
 import { toast } from "sonner";
 import BookCard from '@/components/BookCard';
 import { Book } from '@/hooks/useBooksData';
+import { API_BASE_URL } from '@/lib/constants';
 
 interface SwipeViewProps {
   books: Book[];
@@ -17,6 +19,24 @@ const SwipeView: React.FC<SwipeViewProps> = ({ books, user, onRequestBook }) =>
   const [currentIndex, setCurrentIndex] = useState(0);
   const [direction, setDirection] = useState<'left' | 'right' | null>(null);
   const [swipeHistory, setSwipeHistory] = useState<number[]>([]);
+  // Full books by id; list responses leave out the description, so the card
+  // on screen is fetched from the detail endpoint
+  const [details, setDetails] = useState<Record<string, Book>>({});
+  
+  const currentBook = books[currentIndex];
+  
+  useEffect(() => {
+    if (!currentBook || details[currentBook.id]) return;
+    
+    axios.get(`${API_BASE_URL}/books/${currentBook.id}`)
+      .then(response => {
+        setDetails(prev => ({ ...prev, [currentBook.id]: response.data }));
+      })
+      .catch(error => {
+        // The card still shows everything but the description
+        console.error('Error fetching book details:', error);
+      });
+  }, [currentBook, details]);
   
   const handleSwipe = (dir: 'left' | 'right') => {
     setDirection(dir);
@@ -88,7 +108,7 @@ const SwipeView: React.FC<SwipeViewProps> = ({ books, user, onRequestBook }) =>
           transition={{ duration: 0.3 }}
         >
           <BookCard 
-            book={books[currentIndex]} 
+            book={(currentBook && details[currentBook.id]) || currentBook} 
             mode="swipe"
             currentUser={user}
           />
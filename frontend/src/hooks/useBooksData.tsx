@@ -13,6 +13,7 @@ export interface Book {
   description?: string;
   status: string;
   image_url?: string;
+  thumbnail_url?: string;
   owner_id?: string;
 }
 